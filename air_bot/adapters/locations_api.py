@@ -1,6 +1,10 @@
 import asyncio
 import json
+import sqlite3
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import Callable
 
 from aiohttp import ClientConnectionError, ClientSession
 from async_timeout import timeout
@@ -11,6 +15,9 @@ from air_bot.domain.exceptions import (
     LocationsApiRespondedWithError,
 )
 from air_bot.domain.model import Location
+from air_bot.http_session import NO_RETRIES, RateLimitExceeded, RetryPolicy, get_bytes
+from air_bot.json_decoder import DecodeError, loads, response_error
+from air_bot.ttl_cache import TTLCache
 
 
 class AbstractLocationsApi(ABC):
@@ -21,35 +28,172 @@ class AbstractLocationsApi(ABC):
 
 class TravelPayoutsLocationsApi(AbstractLocationsApi):
     def __init__(self, session_maker, locale: str):
-        self.session = session_maker()
+        self.session_maker = session_maker
         self.locale = locale
 
     async def get_locations(self, airport_or_city: str) -> list[Location]:
         response = await get_locations_response(
-            self.session, self.locale, airport_or_city
+            self.session_maker(),
+            self.locale,
+            airport_or_city,
+            self.session_maker.retry_policy,
         )
-        json_response = json.loads(response)
-        if "error" in response:
+        try:
+            json_response = loads(response)
+        except DecodeError:
             logger.error(
-                f'Location API responded with error {json_response["error"]}, '
+                f"Location API responded with invalid JSON: {response[:200]!r}"
+            )
+            raise LocationsApiRespondedWithError()
+        error = response_error(json_response)
+        if error:
+            logger.error(
+                f"Location API responded with error {error}, "
                 f"airport_or_city {airport_or_city}"
             )
             raise LocationsApiRespondedWithError()
         return parse_locations(json_response)
 
 
+def normalize_term(term: str) -> str:
+    """Makes differently typed names the same: case, extra whitespace, hyphens and 'ё' don't matter"""
+    return " ".join(term.casefold().replace("ё", "е").replace("-", " ").split())
+
+
+class SqliteLocationsStore:
+    """Found locations by (locale, normalized term) in an SQLite file. Methods are blocking,
+    they're meant to be called in a thread."""
+
+    def __init__(self, path: str, ttl: float, timer: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS locations (locale TEXT NOT NULL, term TEXT NOT NULL, "
+                "locations TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (locale, term))"
+            )
+
+    def get(self, locale: str, term: str) -> list[Location] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT locations FROM locations WHERE locale = ? AND term = ? AND expires_at > ?",
+                (locale, term, self._timer()),
+            ).fetchone()
+        if row is None:
+            return None
+        return _locations_from_json(row[0])
+
+    def set(self, locale: str, term: str, locations: list[Location]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO locations (locale, term, locations, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (locale, term, _locations_to_json(locations), self._timer() + self.ttl),
+            )
+
+    def recent(self, locale: str, limit: int) -> list[tuple[str, list[Location]]]:
+        """Returns up to 'limit' not expired entries, most recently stored first"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT term, locations FROM locations WHERE locale = ? AND expires_at > ? "
+                "ORDER BY expires_at DESC LIMIT ?",
+                (locale, self._timer(), limit),
+            ).fetchall()
+        return [(term, _locations_from_json(locations)) for term, locations in rows]
+
+    def delete_expired(self) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM locations WHERE expires_at <= ?", (self._timer(),)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _locations_to_json(locations: list[Location]) -> str:
+    return json.dumps(
+        [
+            [location.code, location.name, location.country_code]
+            for location in locations
+        ],
+        ensure_ascii=False,
+    )
+
+
+def _locations_from_json(locations_json: str) -> list[Location]:
+    return [
+        Location(code=code, name=name, country_code=country_code)
+        for code, name, country_code in json.loads(locations_json)
+    ]
+
+
+class CachingLocationsApi(AbstractLocationsApi):
+    """Keeps found locations by normalized term in memory and, if 'store' is passed, in a persistent
+    store, so cached locations survive restarts"""
+
+    def __init__(
+        self,
+        locations_api: AbstractLocationsApi,
+        locale: str,
+        maxsize: int,
+        ttl: float,
+        store: SqliteLocationsStore | None = None,
+    ):
+        self.locations_api = locations_api
+        self.locale = locale
+        self.store = store
+        self.locations: TTLCache[str, list[Location]] = TTLCache(maxsize, ttl)
+
+    async def get_locations(self, airport_or_city: str) -> list[Location]:
+        term = normalize_term(airport_or_city)
+        locations = self.locations.get(term)
+        if locations is None and self.store is not None:
+            locations = await asyncio.to_thread(self.store.get, self.locale, term)
+            if locations is not None:
+                self.locations.set(term, locations)
+        if locations is None:
+            locations = await self.locations_api.get_locations(airport_or_city)
+            self.locations.set(term, locations)
+            if self.store is not None:
+                await asyncio.to_thread(self.store.set, self.locale, term, locations)
+        return list(locations)
+
+    async def warm_up(self):
+        """Removes expired locations from the store and loads recently stored ones into memory"""
+        if self.store is None:
+            return
+        await asyncio.to_thread(self.store.delete_expired)
+        entries = await asyncio.to_thread(
+            self.store.recent, self.locale, self.locations.maxsize
+        )
+        # The most recent entries are set last, so they're the last to be evicted
+        for term, locations in reversed(entries):
+            self.locations.set(term, locations)
+        logger.info(f"Loaded {len(entries)} cached location searches")
+
+
 PLACES_ENDPOINT_URL = "https://autocomplete.travelpayouts.com/places2"
 REQUEST_TIMEOUT = 10
 
 
 async def get_locations_response(
-    session: ClientSession, locale: str, airport_or_city: str
-) -> str:
+    session: ClientSession,
+    locale: str,
+    airport_or_city: str,
+    retry_policy: RetryPolicy = NO_RETRIES,
+) -> bytes:
     params = {"locale": locale, "types[]": ["airport", "city"], "term": airport_or_city}
     try:
         async with timeout(REQUEST_TIMEOUT):
-            async with session.get(PLACES_ENDPOINT_URL, params=params) as response:
-                return await response.text()
+            return await get_bytes(session, PLACES_ENDPOINT_URL, params, retry_policy)
+    except RateLimitExceeded as e:
+        logger.warning(f"{e}, params={params}")
+        raise LocationsApiConnectionError()
     except ClientConnectionError as e:
         logger.error(f"ClientConnectionError: {e}, params={params}")
         raise LocationsApiConnectionError()
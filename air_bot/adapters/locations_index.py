@@ -0,0 +1,395 @@
+"""Local index of cities and airports built from Travelpayouts data files, so locations are found
+without a request to the autocomplete API"""
+import asyncio
+import bisect
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from async_timeout import timeout
+from loguru import logger
+
+from air_bot.adapters.locations_api import AbstractLocationsApi, normalize_term
+from air_bot.domain.model import Location
+from air_bot.http_session import HttpSessionMaker, background_requests, get_bytes
+from air_bot.json_decoder import loads
+from air_bot.metrics import registry
+
+DATA_URL_TEMPLATE = "https://api.travelpayouts.com/data/{locale}/{name}.json"
+DATA_FILES = ("cities", "airports")
+DOWNLOAD_TIMEOUT = 60
+MAX_LOCATIONS = 10
+# Minimal share of common trigrams for a name to match a misspelled term
+MIN_TRIGRAM_SIMILARITY = 0.5
+MIN_TRIGRAM_TERM_LENGTH = 4
+MAX_TRIE_DEPTH = 6
+
+index_lookups = registry.counter(
+    "locations_index_lookups_total",
+    "Location lookups in the local index, misses are passed to the autocomplete API",
+)
+
+
+def _trigrams(name: str) -> set[str]:
+    padded = f"  {name} "
+    return {"".join(chars) for chars in zip(padded, padded[1:], padded[2:])}
+
+
+class _TrieNode:
+    __slots__ = ("children", "top", "tail")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.top: list[int] = []
+        # Names longer than MAX_TRIE_DEPTH, only in nodes of the maximal depth
+        self.tail: list[tuple[str, int]] = []
+
+
+class LocationTrie:
+    """Prefix tree over normalized names with the best 'top_size' locations precomputed for every
+    prefix, so a suggestion is a walk down the tree. Nodes deeper than MAX_TRIE_DEPTH are not created
+    to save memory: the deepest nodes keep names below them, which are filtered by the rest of the prefix.
+    """
+
+    def __init__(
+        self,
+        names: list[tuple[str, int]],
+        rank: Callable[[int], tuple],
+        top_size: int = MAX_LOCATIONS,
+    ):
+        self.top_size = top_size
+        self._rank = rank
+        self._root = _TrieNode()
+        for name, i in names:
+            node = self._root
+            node.top.append(i)
+            for ch in name[:MAX_TRIE_DEPTH]:
+                child = node.children.get(ch)
+                if child is None:
+                    child = node.children[ch] = _TrieNode()
+                node = child
+                node.top.append(i)
+            if len(name) > MAX_TRIE_DEPTH:
+                node.tail.append((name, i))
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            node.top = self._best(node.top, top_size)
+            stack.extend(node.children.values())
+
+    def search(self, prefix: str, limit: int = MAX_LOCATIONS) -> list[int]:
+        """Returns ids of the best locations with a name starting with normalized 'prefix'"""
+        node = self._root
+        for ch in prefix[:MAX_TRIE_DEPTH]:
+            child = node.children.get(ch)
+            if child is None:
+                return []
+            node = child
+        if len(prefix) <= MAX_TRIE_DEPTH:
+            return node.top[:limit]
+        return self._best(
+            [i for name, i in node.tail if name.startswith(prefix)], limit
+        )
+
+    def _best(self, ids: list[int], limit: int) -> list[int]:
+        return sorted(set(ids), key=self._rank)[:limit]
+
+
+@dataclass(frozen=True, slots=True)
+class _IndexedLocation:
+    location: Location
+    is_city: bool
+    city_code: str
+    # Normalized name and its translations
+    names: tuple[str, ...]
+
+
+def _is_flightable_airport(item: dict) -> bool:
+    if not item.get("code") or not item.get("name"):
+        return False
+    return item.get("iata_type", "airport") == "airport" and item.get(
+        "flightable", True
+    )
+
+
+def _indexed_location(item: dict, is_city: bool) -> _IndexedLocation:
+    translations = (item.get("name_translations") or {}).values()
+    names = {normalize_term(item["name"])}
+    names.update(normalize_term(name) for name in translations if name)
+    return _IndexedLocation(
+        Location(
+            code=item["code"], name=item["name"], country_code=item.get("country_code")
+        ),
+        is_city=is_city,
+        city_code=item["code"] if is_city else item.get("city_code") or item["code"],
+        names=tuple(names),
+    )
+
+
+class LocationsIndex:
+    """Finds cities and airports by code, name prefix (names in other languages included) and,
+    if nothing starts with the term, by trigram similarity. Results look like ones of the
+    autocomplete API: cities are followed by their airports, only the first found country is kept.
+    """
+
+    def __init__(self, locations: list[_IndexedLocation]):
+        self._locations = locations
+        self._by_code: dict[str, list[int]] = {}
+        self._airports_by_city: dict[str, list[int]] = {}
+        names: set[tuple[str, int]] = set()
+        for i, indexed in enumerate(locations):
+            self._by_code.setdefault(indexed.location.code, []).append(i)
+            if not indexed.is_city:
+                self._airports_by_city.setdefault(indexed.city_code, []).append(i)
+            names.update((name, i) for name in indexed.names)
+        self._names = sorted(names)
+        self._trigram_index: dict[str, list[int]] = {}
+        for name_id, (name, _) in enumerate(self._names):
+            for trigram in _trigrams(name):
+                self._trigram_index.setdefault(trigram, []).append(name_id)
+        self._trie = LocationTrie(self._names, self._rank)
+
+    @classmethod
+    def from_data(cls, cities: list[dict], airports: list[dict]) -> "LocationsIndex":
+        """Builds index from cities.json and airports.json of Travelpayouts data API"""
+        locations = [
+            _indexed_location(city, is_city=True)
+            for city in cities
+            if city.get("code") and city.get("name")
+        ]
+        locations += [
+            _indexed_location(airport, is_city=False)
+            for airport in airports
+            if _is_flightable_airport(airport)
+        ]
+        return cls(locations)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def search(self, term: str, limit: int = MAX_LOCATIONS) -> list[Location]:
+        normalized = normalize_term(term)
+        if not normalized:
+            return []
+        found = self._find_by_code(normalized) + self._find_by_prefix(normalized)
+        if not found:
+            found = self._find_by_trigrams(normalized)
+        return self._expand_and_filter(found, limit)
+
+    def suggest(self, prefix: str, limit: int = MAX_LOCATIONS) -> list[Location]:
+        """Cities and airports with a name starting with 'prefix', for suggestions while typing"""
+        return [
+            self._locations[i].location
+            for i in self._trie.search(normalize_term(prefix), limit)
+        ]
+
+    def get_by_code(self, code: str, name: str | None = None) -> Location | None:
+        """City or airport with IATA 'code'. City and its airport may share a code,
+        the one called 'name' is preferred."""
+        ids = self._by_code.get(code.upper())
+        if not ids:
+            return None
+        best = min(
+            ids,
+            key=lambda i: (self._locations[i].location.name != name, self._rank(i)),
+        )
+        return self._locations[best].location
+
+    def _find_by_code(self, normalized: str) -> list[int]:
+        if len(normalized) != 3 or not normalized.isalpha():
+            return []
+        return self._by_code.get(normalized.upper(), [])
+
+    def _find_by_prefix(self, normalized: str) -> list[int]:
+        exact: list[int] = []
+        by_prefix: list[int] = []
+        start = bisect.bisect_left(self._names, (normalized, -1))
+        for name, i in self._names[start:]:
+            if not name.startswith(normalized):
+                break
+            (exact if name == normalized else by_prefix).append(i)
+        by_prefix.sort(key=self._rank)
+        return exact + by_prefix
+
+    def _find_by_trigrams(self, normalized: str) -> list[int]:
+        if len(normalized) < MIN_TRIGRAM_TERM_LENGTH:
+            return []
+        term_trigrams = _trigrams(normalized)
+        common: dict[int, int] = {}
+        for trigram in term_trigrams:
+            for name_id in self._trigram_index.get(trigram, ()):
+                common[name_id] = common.get(name_id, 0) + 1
+        similar = []
+        for name_id, n_common in common.items():
+            name, i = self._names[name_id]
+            similarity = n_common / len(term_trigrams | _trigrams(name))
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                similar.append((-similarity, self._rank(i), i))
+        similar.sort()
+        return [i for _, _, i in similar]
+
+    def _rank(self, i: int) -> tuple:
+        """Cities go before airports, cities with more airports (likely bigger ones) go first"""
+        indexed = self._locations[i]
+        n_airports = len(self._airports_by_city.get(indexed.city_code, ()))
+        return (
+            not indexed.is_city,
+            -n_airports if indexed.is_city else 0,
+            len(indexed.location.name),
+            indexed.location.name,
+        )
+
+    def _expand_and_filter(self, found: list[int], limit: int) -> list[Location]:
+        result: list[Location] = []
+        seen: set[int] = set()
+        country_code = None
+        for i in found:
+            ids = [i]
+            if self._locations[i].is_city:
+                ids += self._airports_by_city.get(self._locations[i].city_code, [])
+            for j in ids:
+                location = self._locations[j].location
+                if j in seen:
+                    continue
+                if country_code is None:
+                    country_code = location.country_code
+                if location.country_code != country_code:
+                    continue
+                seen.add(j)
+                result.append(location)
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+def load_locations_index(data_dir: str) -> LocationsIndex | None:
+    """Builds index from data files in 'data_dir', returns None if they were not downloaded yet"""
+    data = {}
+    for name in DATA_FILES:
+        path = os.path.join(data_dir, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data[name] = loads(f.read())
+    return LocationsIndex.from_data(data["cities"], data["airports"])
+
+
+class IndexedLocationsApi(AbstractLocationsApi):
+    """Looks for locations in the local index first and asks 'locations_api' only if nothing is found
+    or the index is not loaded yet"""
+
+    def __init__(self, locations_api: AbstractLocationsApi):
+        self.locations_api = locations_api
+        self.index: LocationsIndex | None = None
+
+    async def get_locations(self, airport_or_city: str) -> list[Location]:
+        if self.index is not None:
+            locations = self.index.search(airport_or_city)
+            if locations:
+                index_lookups.inc(result="hit")
+                return locations
+        index_lookups.inc(result="miss")
+        return await self.locations_api.get_locations(airport_or_city)
+
+    def suggest(self, prefix: str, limit: int = MAX_LOCATIONS) -> list[Location]:
+        if self.index is None:
+            return []
+        return self.index.suggest(prefix, limit)
+
+    def get_by_code(self, code: str, name: str | None = None) -> Location | None:
+        if self.index is None:
+            return None
+        return self.index.get_by_code(code, name)
+
+
+class LocationsIndexUpdater:
+    """Loads the index into 'indexed_api' on start and downloads fresh data files every
+    'refresh_interval' hours; data is not downloaded if the interval is 0"""
+
+    def __init__(
+        self,
+        indexed_api: IndexedLocationsApi,
+        http_session_maker: HttpSessionMaker,
+        data_dir: str,
+        locale: str,
+        refresh_interval: float,
+    ):
+        self.indexed_api = indexed_api
+        self.http_session_maker = http_session_maker
+        self.data_dir = os.path.join(data_dir, locale)
+        self.locale = locale
+        self.refresh_interval = refresh_interval * 3600
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        await self._load()
+        if not self.refresh_interval:
+            return
+        while True:
+            delay = self._time_until_refresh()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self._download()
+            except Exception as e:
+                logger.error(f"Failed to download locations data: {e!r}")
+                await asyncio.sleep(min(self.refresh_interval, 3600))
+                continue
+            await self._load()
+
+    async def _load(self):
+        try:
+            index = await asyncio.to_thread(load_locations_index, self.data_dir)
+        except Exception as e:
+            logger.exception(f"Failed to load locations index: {e}")
+            return
+        if index is None:
+            logger.info(f"No locations data in {self.data_dir}")
+            return
+        self.indexed_api.index = index
+        logger.info(f"Loaded locations index with {len(index)} locations")
+
+    def _time_until_refresh(self) -> float:
+        path = os.path.join(self.data_dir, f"{DATA_FILES[0]}.json")
+        if not os.path.exists(path):
+            return 0
+        return os.path.getmtime(path) + self.refresh_interval - time.time()
+
+    async def _download(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        session = self.http_session_maker()
+        for name in DATA_FILES:
+            url = DATA_URL_TEMPLATE.format(locale=self.locale, name=name)
+            with background_requests():
+                async with timeout(DOWNLOAD_TIMEOUT):
+                    data = await get_bytes(
+                        session, url, {}, self.http_session_maker.retry_policy
+                    )
+            path = os.path.join(self.data_dir, f"{name}.json")
+            # Parsing tens of megabytes would block the event loop
+            await asyncio.to_thread(_check_and_write, path, data, url)
+        logger.info(f"Downloaded locations data to {self.data_dir}")
+
+
+def _check_and_write(path: str, data: bytes, url: str):
+    # Check the data before it replaces the previous version
+    if not isinstance(loads(data), list):
+        raise ValueError(f"Unexpected content of {url}")
+    _write_atomically(path, data)
+
+
+def _write_atomically(path: str, data: bytes):
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
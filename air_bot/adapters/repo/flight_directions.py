@@ -1,13 +1,28 @@
 import datetime
 from dataclasses import asdict
 
-from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Select,
+    and_,
+    delete,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from air_bot.adapters.repo import orm
 from air_bot.domain import model
 from air_bot.domain.ports.repository import FlightDirectionRepo
 
+# Number of directions archived by a single INSERT ... SELECT / DELETE pair
+ARCHIVE_CHUNK_SIZE = 1000
+
 
 class SqlAlchemyFlightDirectionRepo(FlightDirectionRepo):
     def __init__(self, session: AsyncSession):
@@ -19,15 +34,22 @@ class SqlAlchemyFlightDirectionRepo(FlightDirectionRepo):
         direction: model.FlightDirection,
         price: float | None,
         last_update: datetime.datetime,
+        next_update_at: datetime.datetime | None = None,
     ) -> int:
         stmt = text(
             "INSERT INTO flight_directions (start_code, start_name, end_code, end_name, "
-            "with_transfer, departure_at, return_at, price, last_update, last_update_try) VALUES (:start_code, "
-            ":start_name, :end_code, :end_name, :with_transfer, :departure_at, :return_at, :price, :last_update, "
-            ":last_update)"
+            "with_transfer, departure_at, return_at, departure_end_date, return_end_date, price, last_update, "
+            "last_update_try, next_update_at) VALUES (:start_code, :start_name, :end_code, :end_name, "
+            ":with_transfer, :departure_at, :return_at, :departure_end_date, :return_end_date, :price, "
+            ":last_update, :last_update, :next_update_at)"
         )
         stmt = stmt.bindparams(
-            **asdict(direction), price=price, last_update=last_update
+            **asdict(direction),
+            departure_end_date=direction.departure_end_date(),
+            return_end_date=direction.return_end_date(),
+            price=price,
+            last_update=last_update,
+            next_update_at=next_update_at or last_update,
         )
         result = await self.session.execute(stmt)
         return result.lastrowid  # type: ignore[attr-defined]
@@ -55,110 +77,148 @@ class SqlAlchemyFlightDirectionRepo(FlightDirectionRepo):
         result = await self.session.execute(stmt)
         return [row[0] for row in result.all()]
 
-    async def get_directions_with_last_update_try_before(
-        self, last_update_try: datetime.datetime, limit: int
+    async def claim_directions_for_update(
+        self,
+        due_before: datetime.datetime,
+        limit: int,
+        owner: str,
+        lease_expires_at: datetime.datetime,
+        after: tuple[datetime.datetime, int] | None = None,
     ) -> list[model.FlightDirectionInfo]:
+        directions = orm.flight_direction_info_table
+        now = datetime.datetime.now()
+        # Rows locked by concurrent claims are skipped instead of waited for
         stmt = (
-            select(model.FlightDirectionInfo)
-            .where(orm.flight_direction_info_table.c.last_update_try < last_update_try)
-            .order_by(orm.flight_direction_info_table.c.last_update)
-            .limit(limit)
+            select_update_candidates(due_before, limit, after)
+            .where(
+                or_(
+                    directions.c.lease_expires_at.is_(None),
+                    directions.c.lease_expires_at < now,
+                )
+            )
+            .with_for_update(skip_locked=True)
         )
         result = await self.session.execute(stmt)
-        return [row[0] for row in result.all()]
+        claimed_directions = [row[0] for row in result.all()]
+        if not claimed_directions:
+            return []
+        claim_stmt = (
+            update(directions)
+            .where(directions.c.id.in_([d.id for d in claimed_directions]))
+            .values(lease_owner=owner, lease_expires_at=lease_expires_at)
+        )
+        await self.session.execute(claim_stmt)
+        return claimed_directions
 
     async def update_price(
-        self, direction_id: int, price: float | None, last_update: datetime.datetime
+        self,
+        direction_id: int,
+        price: float | None,
+        last_update: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
+        values = dict(
+            price=price,
+            last_update=last_update,
+            last_update_try=last_update,
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+        if schedule is not None:
+            values.update(asdict(schedule))
         stmt = (
             update(model.FlightDirectionInfo)
             .where(orm.flight_direction_info_table.c.id == direction_id)
-            .values(price=price, last_update=last_update, last_update_try=last_update)
+            .values(**values)
         )
         await self.session.execute(stmt)
 
     async def update_last_update_try(
-        self, direction_id: int, last_update_try: datetime.datetime
+        self,
+        direction_id: int,
+        last_update_try: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
+        values = dict(
+            last_update_try=last_update_try, lease_owner=None, lease_expires_at=None
+        )
+        if schedule is not None:
+            values.update(asdict(schedule))
         stmt = (
             update(model.FlightDirectionInfo)
             .where(orm.flight_direction_info_table.c.id == direction_id)
-            .values(last_update_try=last_update_try)
+            .values(**values)
         )
         await self.session.execute(stmt)
 
     async def delete_direction(self, direction_id: int):
-        stmt = select(model.FlightDirectionInfo)
-        stmt = stmt.where(orm.flight_direction_info_table.c.id == direction_id)
-        result = await self.session.execute(stmt)
-        row = result.first()
-        if row is None:
-            return
-
-        direction_info: model.FlightDirectionInfo = row[0]
-        now = datetime.datetime.now()
-        historic_direction = model.HistoricFlightDirection(
-            start_code=direction_info.start_code,
-            start_name=direction_info.start_name,
-            end_code=direction_info.end_code,
-            end_name=direction_info.end_name,
-            with_transfer=direction_info.with_transfer,
-            departure_at=direction_info.departure_at,
-            return_at=direction_info.return_at,
-            price=direction_info.price,
-            last_update=direction_info.last_update,
-            deleted_at=now,
-            deleted_by_user=True,
-        )
-        stmt = insert(model.HistoricFlightDirection).values(  # type: ignore[assignment]
-            **asdict(historic_direction)
-        )
-        await self.session.execute(stmt)
-
-        stmt = delete(model.FlightDirectionInfo)  # type: ignore[assignment]
-        stmt = stmt.where(orm.flight_direction_info_table.c.id == direction_id)
-        await self.session.execute(stmt)
+        await self._move_to_history([direction_id], deleted_by_user=True)
 
     async def delete_outdated_directions(self) -> int:
         # Subtract one day, so we are sure direction is outdated in every time zone
-        yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
-        year_month = datetime.datetime.strftime(yesterday, "%Y-%m")
-        year_month_day = datetime.datetime.strftime(yesterday, "%Y-%m-%d")
-        stmt = text(
-            "SELECT * FROM flight_directions "
-            "WHERE (LENGTH(departure_at) = 10 AND departure_at < :year_month_day) OR"
-            " (LENGTH(departure_at) = 7 AND departure_at < :year_month);"
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        stmt = select(orm.flight_direction_info_table.c.id).where(
+            orm.flight_direction_info_table.c.departure_end_date < yesterday
         )
-        stmt = stmt.bindparams(year_month_day=year_month_day, year_month=year_month)
         result = await self.session.execute(stmt)
-        outdated_directions = result.all()
-        if not outdated_directions:
-            return 0
-
-        now = datetime.datetime.now()
-        for row in outdated_directions:
-            historic_direction = model.HistoricFlightDirection(
-                start_code=row[1],
-                start_name=row[2],
-                end_code=row[3],
-                end_name=row[4],
-                with_transfer=row[5],
-                departure_at=row[6],
-                return_at=row[7],
-                price=row[8],
-                last_update=row[9],
-                deleted_at=now,
+        outdated_directions_ids = list(result.scalars())
+        for start in range(0, len(outdated_directions_ids), ARCHIVE_CHUNK_SIZE):
+            end = start + ARCHIVE_CHUNK_SIZE
+            await self._move_to_history(
+                outdated_directions_ids[start:end],
                 deleted_by_user=False,
             )
-            stmt = insert(model.HistoricFlightDirection).values(  # type: ignore[assignment]
-                **asdict(historic_direction)
-            )
-            await self.session.execute(stmt)
-
-        outdated_directions_ids = [row[0] for row in outdated_directions]
-        stmt = delete(model.FlightDirectionInfo)  # type: ignore[assignment]
-        stmt = stmt.where(  # type: ignore[attr-defined]
-            orm.flight_direction_info_table.c.id.in_(outdated_directions_ids)
+        return len(outdated_directions_ids)
+
+    async def _move_to_history(self, direction_ids: list[int], deleted_by_user: bool):
+        """Copies directions to historic table and deletes them with two statements,
+        without loading rows into Python"""
+        directions = orm.flight_direction_info_table
+        historic_directions = orm.historic_flight_direction_info_table
+        copied_columns = [
+            "start_code",
+            "start_name",
+            "end_code",
+            "end_name",
+            "with_transfer",
+            "departure_at",
+            "return_at",
+            "price",
+            "last_update",
+        ]
+        select_stmt = select(
+            *[directions.c[column] for column in copied_columns],
+            literal(datetime.datetime.now(), DateTime),
+            literal(deleted_by_user, Boolean),
+        ).where(directions.c.id.in_(direction_ids))
+        insert_stmt = insert(historic_directions).from_select(
+            [*copied_columns, "deleted_at", "deleted_by_user"], select_stmt
         )
-        await self.session.execute(stmt)
-        return len(outdated_directions)
+        await self.session.execute(insert_stmt)
+
+        delete_stmt = delete(directions).where(directions.c.id.in_(direction_ids))
+        await self.session.execute(delete_stmt)
+
+
+def select_update_candidates(
+    due_before: datetime.datetime,
+    limit: int,
+    after: tuple[datetime.datetime, int] | None = None,
+) -> Select:
+    """Keyset-paginated query of directions due for update, most overdue first.
+    Served by the (next_update_at, id) index without filesort"""
+    directions = orm.flight_direction_info_table
+    stmt = select(model.FlightDirectionInfo).where(
+        directions.c.next_update_at < due_before
+    )
+    if after is not None:
+        stmt = stmt.where(_after_key(directions.c.next_update_at, after))
+    return stmt.order_by(directions.c.next_update_at, directions.c.id).limit(limit)
+
+
+def _after_key(column, after: tuple[datetime.datetime, int]):
+    after_value, after_id = after
+    return or_(
+        column > after_value,
+        and_(column == after_value, orm.flight_direction_info_table.c.id > after_id),
+    )
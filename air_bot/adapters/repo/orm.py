@@ -4,9 +4,11 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     Float,
     ForeignKeyConstraint,
+    Index,
     Integer,
     MetaData,
     PrimaryKeyConstraint,
@@ -41,6 +43,17 @@ flight_direction_info_table = Table(
     Column("price", Float, nullable=True),
     Column("last_update", DateTime, nullable=False),
     Column("last_update_try", DateTime, nullable=False),
+    Column("next_update_at", DateTime, nullable=False),
+    Column("price_volatility", Float, nullable=False, server_default="0"),
+    Column("unchanged_price_updates", Integer, nullable=False, server_default="0"),
+    # departure_at/return_at as dates, end of month for month directions; kept in sync by repo
+    Column("departure_end_date", Date, nullable=False),
+    Column("return_end_date", Date, nullable=True),
+    # Updater which claimed direction for update and until when
+    Column("lease_owner", String(64), nullable=True),
+    Column("lease_expires_at", DateTime, nullable=True),
+    Index("flight_directions_departure_end_date_idx", "departure_end_date"),
+    Index("flight_directions_next_update_at_idx", "next_update_at", "id"),
     UniqueConstraint(
         "start_code",
         "end_code",
@@ -74,7 +87,13 @@ users_directions_table = Table(
 tickets_table = Table(
     "tickets",
     metadata,
-    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    # SQLite (used in benchmarks) autoincrements only INTEGER primary keys
+    Column(
+        "id",
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    ),
     Column("direction_id", Integer, nullable=False),
     Column("price", Float, nullable=False),
     Column("departure_at", DateTime, nullable=False),
@@ -107,6 +126,28 @@ historic_flight_direction_info_table = Table(
     Column("deleted_by_user", Boolean, nullable=False),
 )
 
+pending_notifications_table = Table(
+    "pending_notifications",
+    metadata,
+    Column(
+        "id",
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    ),
+    Column("user_id", BigInteger, nullable=False),
+    Column("direction_id", Integer, nullable=False),
+    # JSON list of tickets
+    Column("tickets", Text, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    ForeignKeyConstraint(
+        columns=["direction_id"],
+        refcolumns=["flight_directions.id"],
+        name="pending_notifications_fk__flight_direction",
+        ondelete="CASCADE",
+    ),
+)
+
 mapper_registry.map_imperatively(model.FlightDirectionInfo, flight_direction_info_table)
 mapper_registry.map_imperatively(model.User, user_table)
 mapper_registry.map_imperatively(UserDirectionDB, users_directions_table)
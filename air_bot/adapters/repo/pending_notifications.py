@@ -0,0 +1,89 @@
+import datetime
+import json
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from air_bot.adapters.repo import orm
+from air_bot.domain import model
+from air_bot.domain.ports.repository import PendingNotificationRepo
+
+
+class SqlAlchemyPendingNotificationRepo(PendingNotificationRepo):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, notification: model.PendingNotification):
+        stmt = insert(orm.pending_notifications_table).values(
+            user_id=notification.user_id,
+            direction_id=notification.direction_id,
+            tickets=tickets_to_json(notification.tickets),
+            created_at=notification.created_at,
+        )
+        await self.session.execute(stmt)
+
+    async def take(self, limit: int) -> list[model.PendingNotification]:
+        table = orm.pending_notifications_table
+        stmt = (
+            select(table)
+            .order_by(table.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        notifications = [
+            model.PendingNotification(
+                id=row.id,
+                user_id=row.user_id,
+                direction_id=row.direction_id,
+                tickets=tickets_from_json(row.tickets),
+                created_at=row.created_at,
+            )
+            for row in result
+        ]
+        if notifications:
+            delete_stmt = delete(table).where(
+                table.c.id.in_([n.id for n in notifications])
+            )
+            await self.session.execute(delete_stmt)
+        return notifications
+
+
+def tickets_to_json(tickets: list[model.Ticket]) -> str:
+    json_tickets = []
+    for ticket in tickets:
+        json_ticket = {
+            "price": ticket.price,
+            "departure_at": ticket.departure_at.isoformat(),
+            "duration_to": int(ticket.duration_to.total_seconds()) // 60,
+            "link": ticket.link,
+        }
+        if ticket.return_at:
+            json_ticket["return_at"] = ticket.return_at.isoformat()
+        if ticket.duration_back:
+            json_ticket["duration_back"] = (
+                int(ticket.duration_back.total_seconds()) // 60
+            )
+        json_tickets.append(json_ticket)
+    return json.dumps(json_tickets)
+
+
+def tickets_from_json(tickets_json: str) -> list[model.Ticket]:
+    tickets = []
+    for json_ticket in json.loads(tickets_json):
+        return_at = None
+        if "return_at" in json_ticket:
+            return_at = datetime.datetime.fromisoformat(json_ticket["return_at"])
+        duration_back = None
+        if "duration_back" in json_ticket:
+            duration_back = datetime.timedelta(minutes=json_ticket["duration_back"])
+        ticket = model.Ticket(
+            price=json_ticket["price"],
+            departure_at=datetime.datetime.fromisoformat(json_ticket["departure_at"]),
+            duration_to=datetime.timedelta(minutes=json_ticket["duration_to"]),
+            return_at=return_at,
+            duration_back=duration_back,
+            link=json_ticket["link"],
+        )
+        tickets.append(ticket)
+    return tickets
@@ -1,7 +1,7 @@
 import datetime
 from dataclasses import asdict, dataclass
 
-from sqlalchemy import delete, select, text
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from air_bot.adapters.repo import orm
@@ -44,17 +44,15 @@ class SqlAlchemyTicketRepo(TicketRepo):
         self.session = session
 
     async def add(self, tickets: list[model.Ticket], direction_id: int):
+        if not tickets:
+            return
+        rows = []
         for ticket in tickets:
-            ticket_db = TicketDB.from_ticket(ticket, direction_id)
-            stmt = text(
-                "INSERT INTO tickets (direction_id, price, departure_at, duration_to, return_at, "
-                "duration_back, link) VALUES (:direction_id, :price, :departure_at, :duration_to, "
-                ":return_at, :duration_back, :link)"
-            )
-            ticket_db_dict = asdict(ticket_db)
+            ticket_db_dict = asdict(TicketDB.from_ticket(ticket, direction_id))
             del ticket_db_dict["id"]
-            stmt = stmt.bindparams(**ticket_db_dict)
-            await self.session.execute(stmt)
+            rows.append(ticket_db_dict)
+        # List of parameters makes SQLAlchemy send all rows in one multi-row INSERT
+        await self.session.execute(insert(orm.tickets_table), rows)
 
     async def get_direction_tickets(
         self, direction_id: int, limit: int | None = None
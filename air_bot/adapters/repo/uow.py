@@ -7,6 +7,10 @@ from air_bot.adapters.repo.flight_directions import (
     FlightDirectionRepo,
     SqlAlchemyFlightDirectionRepo,
 )
+from air_bot.adapters.repo.pending_notifications import (
+    PendingNotificationRepo,
+    SqlAlchemyPendingNotificationRepo,
+)
 from air_bot.adapters.repo.session_maker import AbstractSessionMaker
 from air_bot.adapters.repo.tickets import SqlAlchemyTicketRepo, TicketRepo
 from air_bot.adapters.repo.users import SqlAlchemyUsersRepo, UserRepo
@@ -21,6 +25,7 @@ class AbstractUnitOfWork(abc.ABC):
     flight_directions: FlightDirectionRepo
     users_directions: UserDirectionRepo
     tickets: TicketRepo
+    pending_notifications: PendingNotificationRepo
 
     def __init__(self, session_factory: AbstractSessionMaker):
         self.session_factory = session_factory
@@ -56,6 +61,7 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         self.flight_directions = SqlAlchemyFlightDirectionRepo(self.session)
         self.users_directions = SqlAlchemyUserDirectionRepo(self.session)
         self.tickets = SqlAlchemyTicketRepo(self.session)
+        self.pending_notifications = SqlAlchemyPendingNotificationRepo(self.session)
         return await super().__aenter__()
 
     async def __aexit__(self, *args):
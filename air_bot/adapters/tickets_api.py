@@ -1,7 +1,9 @@
 import asyncio
-import json
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from enum import Enum
+from typing import Awaitable, Callable, TypeVar
 
 from aiohttp import ClientConnectionError, ClientSession
 from async_timeout import timeout
@@ -11,9 +13,16 @@ from air_bot.config import config
 from air_bot.domain.exceptions import (
     TicketsAPIConnectionError,
     TicketsAPIError,
+    TicketsAPIRateLimitedError,
+    TicketsAPIUnavailableError,
+    TicketsError,
     TicketsParsingError,
 )
 from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.http_session import NO_RETRIES, RateLimitExceeded, RetryPolicy, get_bytes
+from air_bot.json_decoder import DecodeError, loads, response_error
+from air_bot.metrics import registry
+from air_bot.ttl_cache import TTLCache
 
 
 class AbstractTicketsApi(ABC):
@@ -28,13 +37,25 @@ class AbstractTicketsApi(ABC):
     ) -> dict[str, Ticket]:
         raise NotImplementedError
 
+    def invalidate_cache(self, direction: FlightDirection | None = None):
+        """Drops cached responses for 'direction' or all cached responses if direction is None"""
+        pass
+
+    def is_available(self) -> bool:
+        """False if requests are known to fail right now, so there's no point in making them"""
+        return True
+
 
 class AviasalesTicketsApi(AbstractTicketsApi):
     def __init__(self, http_session_maker):
-        self.session = http_session_maker()
+        self.http_session_maker = http_session_maker
         self.token = config.aviasales_api_token
         self.currency = config.currency
 
+    @property
+    def session(self) -> ClientSession:
+        return self.http_session_maker()
+
     async def get_tickets(
         self, direction: FlightDirection, limit: int = 3
     ) -> list[Ticket]:
@@ -51,19 +72,22 @@ class AviasalesTicketsApi(AbstractTicketsApi):
                     is_direct,
                     limit,
                     self.currency,
+                    self.http_session_maker.retry_policy,
                 )
         except asyncio.TimeoutError:
             logger.error("Request for tickets timed out")
             raise TicketsAPIConnectionError()
+        except RateLimitExceeded as e:
+            logger.warning(e)
+            raise TicketsAPIRateLimitedError()
         except ClientConnectionError as e:
             logger.error(e)
             raise TicketsAPIConnectionError()
 
-        json_response = json.loads(response)
-        if "error" in response:
-            logger.error(
-                f'Failed to get tickets: error {json_response["error"]}, direction {direction}'
-            )
+        json_response = decode_response(response)
+        error = response_error(json_response)
+        if error:
+            logger.error(f"Failed to get tickets: error {error}, direction {direction}")
             raise TicketsAPIError()
         return parse_tickets(json_response)
 
@@ -83,22 +107,265 @@ class AviasalesTicketsApi(AbstractTicketsApi):
                     departure_at,
                     direction.return_at,
                     is_direct,
+                    retry_policy=self.http_session_maker.retry_policy,
                 )
         except asyncio.TimeoutError:
             logger.error("Request for cheapest tickets for month timed out")
             raise TicketsAPIConnectionError()
+        except RateLimitExceeded as e:
+            logger.warning(e)
+            raise TicketsAPIRateLimitedError()
         except ClientConnectionError as e:
             logger.error(e)
             raise TicketsAPIConnectionError()
-        json_response = json.loads(response)
-        if "error" in response:
-            logger.error(
-                f'Failed to get tickets: error {json_response["error"]}, direction {direction}'
-            )
+        json_response = decode_response(response)
+        error = response_error(json_response)
+        if error:
+            logger.error(f"Failed to get tickets: error {error}, direction {direction}")
             raise TicketsAPIError()
         return parse_tickets_by_date(json_response)
 
 
+class SingleFlightTicketsApi(AbstractTicketsApi):
+    """Makes concurrent identical requests for tickets share one request to the wrapped API"""
+
+    def __init__(self, tickets_api: AbstractTicketsApi):
+        self.tickets_api = tickets_api
+        self.currency = config.currency
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+
+    async def get_tickets(
+        self, direction: FlightDirection, limit: int = 3
+    ) -> list[Ticket]:
+        key = (
+            "tickets",
+            direction.start_code,
+            direction.end_code,
+            direction.departure_at,
+            direction.return_at,
+            not direction.with_transfer,
+            limit,
+            self.currency,
+        )
+        tickets = await self._single_flight(
+            key, lambda: self.tickets_api.get_tickets(direction, limit=limit)
+        )
+        return list(tickets)
+
+    async def get_cheapest_tickets_for_month(
+        self, direction: FlightDirection, departure_year: int, departure_month: int
+    ) -> dict[str, Ticket]:
+        key = (
+            "cheapest_tickets_for_month",
+            *_month_prices_key(direction, departure_year, departure_month),
+            self.currency,
+        )
+        tickets_by_date = await self._single_flight(
+            key,
+            lambda: self.tickets_api.get_cheapest_tickets_for_month(
+                direction, departure_year, departure_month
+            ),
+        )
+        return dict(tickets_by_date)
+
+    async def _single_flight(self, key: tuple, make_request):
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(make_request())
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            logger.debug(f"Joining in-flight request {key}")
+        # Shielded, so one of the callers being cancelled doesn't cancel request for the others
+        return await asyncio.shield(in_flight)
+
+    def invalidate_cache(self, direction: FlightDirection | None = None):
+        self.tickets_api.invalidate_cache(direction)
+
+    def is_available(self) -> bool:
+        return self.tickets_api.is_available()
+
+
+circuit_state = registry.gauge(
+    "tickets_api_circuit_state",
+    "Tickets API circuit breaker state: 0 closed, 1 open, 2 half-open",
+)
+circuit_rejections = registry.counter(
+    "tickets_api_circuit_rejections_total",
+    "Requests for tickets not made because the circuit breaker is open",
+)
+
+T = TypeVar("T")
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitBreakerTicketsApi(AbstractTicketsApi):
+    """Stops making requests for 'reset_timeout' seconds after 'failure_threshold' connection errors
+    in a row, failing fast with TicketsAPIUnavailableError instead. Then a single probe request is let
+    through: its success closes the circuit, its failure opens it again."""
+
+    def __init__(
+        self,
+        tickets_api: AbstractTicketsApi,
+        failure_threshold: int,
+        reset_timeout: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.tickets_api = tickets_api
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        circuit_state.set(self._state.value)
+
+    @property
+    def state(self) -> CircuitState:
+        open_for = self._timer() - self._opened_at
+        if self._state == CircuitState.OPEN and open_for >= self.reset_timeout:
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    def is_available(self) -> bool:
+        state = self.state
+        if state == CircuitState.HALF_OPEN:
+            return not self._probe_in_flight
+        return state == CircuitState.CLOSED
+
+    async def get_tickets(
+        self, direction: FlightDirection, limit: int = 3
+    ) -> list[Ticket]:
+        return await self._call(lambda: self.tickets_api.get_tickets(direction, limit))
+
+    async def get_cheapest_tickets_for_month(
+        self, direction: FlightDirection, departure_year: int, departure_month: int
+    ) -> dict[str, Ticket]:
+        return await self._call(
+            lambda: self.tickets_api.get_cheapest_tickets_for_month(
+                direction, departure_year, departure_month
+            )
+        )
+
+    def invalidate_cache(self, direction: FlightDirection | None = None):
+        self.tickets_api.invalidate_cache(direction)
+
+    async def _call(self, make_request: Callable[[], Awaitable[T]]) -> T:
+        if not self.is_available():
+            circuit_rejections.inc()
+            raise TicketsAPIUnavailableError()
+        is_probe = self._state == CircuitState.HALF_OPEN
+        if is_probe:
+            self._probe_in_flight = True
+        try:
+            result = await make_request()
+        except TicketsAPIRateLimitedError:
+            # Request was not sent, so it says nothing about the API
+            raise
+        except TicketsAPIConnectionError:
+            self._on_failure()
+            raise
+        except TicketsError:
+            # The API responded, so it is up
+            self._on_success()
+            raise
+        else:
+            self._on_success()
+            return result
+        finally:
+            if is_probe:
+                self._probe_in_flight = False
+
+    def _on_success(self):
+        self._failures = 0
+        if self._state != CircuitState.CLOSED:
+            self._set_state(CircuitState.CLOSED)
+
+    def _on_failure(self):
+        self._failures += 1
+        too_many_failures = self._failures >= self.failure_threshold
+        if self._state == CircuitState.HALF_OPEN or too_many_failures:
+            self._opened_at = self._timer()
+            if self._state != CircuitState.OPEN:
+                self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: CircuitState):
+        if state == CircuitState.OPEN:
+            logger.warning(
+                f"Tickets API circuit is open after {self._failures} failure(s), "
+                f"requests are paused for {self.reset_timeout} seconds"
+            )
+        else:
+            logger.info(
+                f"Tickets API circuit is {state.name.lower().replace('_', '-')}"
+            )
+        self._state = state
+        circuit_state.set(state.value)
+
+
+class CachingTicketsApi(AbstractTicketsApi):
+    """Keeps parsed cheapest tickets by month in memory, so low prices calendar doesn't request
+    the same month again and again"""
+
+    def __init__(self, tickets_api: AbstractTicketsApi, maxsize: int, ttl: float):
+        self.tickets_api = tickets_api
+        self.month_prices: TTLCache[tuple, dict[str, Ticket]] = TTLCache(maxsize, ttl)
+
+    async def get_tickets(
+        self, direction: FlightDirection, limit: int = 3
+    ) -> list[Ticket]:
+        return await self.tickets_api.get_tickets(direction, limit=limit)
+
+    async def get_cheapest_tickets_for_month(
+        self, direction: FlightDirection, departure_year: int, departure_month: int
+    ) -> dict[str, Ticket]:
+        key = _month_prices_key(direction, departure_year, departure_month)
+        tickets_by_date = self.month_prices.get(key)
+        if tickets_by_date is None:
+            tickets_by_date = await self.tickets_api.get_cheapest_tickets_for_month(
+                direction, departure_year, departure_month
+            )
+            self.month_prices.set(key, tickets_by_date)
+        return dict(tickets_by_date)
+
+    def is_month_cached(
+        self, direction: FlightDirection, departure_year: int, departure_month: int
+    ) -> bool:
+        key = _month_prices_key(direction, departure_year, departure_month)
+        return key in self.month_prices
+
+    def invalidate_cache(self, direction: FlightDirection | None = None):
+        if direction is None:
+            self.month_prices.clear()
+        else:
+            route = _month_prices_key(direction, 0, 0)[:-2]
+            self.month_prices.invalidate_if(lambda key: key[:-2] == route)
+        self.tickets_api.invalidate_cache(direction)
+
+    def is_available(self) -> bool:
+        return self.tickets_api.is_available()
+
+
+def _month_prices_key(
+    direction: FlightDirection, departure_year: int, departure_month: int
+) -> tuple:
+    # Exact departure date is not a part of the key: grouped prices are requested for the whole month
+    return (
+        direction.start_code,
+        direction.end_code,
+        direction.with_transfer,
+        direction.return_at,
+        departure_year,
+        departure_month,
+    )
+
+
 async def get_tickets_response(
     session: ClientSession,
     token: str,
@@ -109,7 +376,8 @@ async def get_tickets_response(
     is_direct: str,
     limit: int,
     currency: str,
-) -> str:
+    retry_policy: RetryPolicy = NO_RETRIES,
+) -> bytes:
     travel_payouts_url = "https://api.travelpayouts.com/aviasales/v3/prices_for_dates"
     params = {
         "origin": start_code,
@@ -123,8 +391,15 @@ async def get_tickets_response(
     }
     if return_date:
         params["return_at"] = return_date
-    async with session.get(travel_payouts_url, params=params) as response:
-        return await response.text()
+    return await get_bytes(session, travel_payouts_url, params, retry_policy)
+
+
+def decode_response(response: bytes):
+    try:
+        return loads(response)
+    except DecodeError:
+        logger.error(f"Aviasales responded with invalid JSON: {response[:200]!r}")
+        raise TicketsParsingError()
 
 
 def parse_tickets(json_response) -> list[Ticket]:
@@ -160,7 +435,7 @@ def parse_ticket(json_ticket) -> Ticket:
 
 def datetime_from_ticket(datetime_str: str) -> datetime:
     """Converts datetime from string in Aviasales API response to Python's datetime; ditches timezone"""
-    return datetime.strptime(datetime_str[:16], "%Y-%m-%dT%H:%M")
+    return datetime.fromisoformat(datetime_str[:16])
 
 
 async def get_grouped_prices(
@@ -173,7 +448,8 @@ async def get_grouped_prices(
     return_at: str | None,
     is_direct: str,
     group_by: str = "departure_at",
-):
+    retry_policy: RetryPolicy = NO_RETRIES,
+) -> bytes:
     travel_payouts_url = "https://api.travelpayouts.com/aviasales/v3/grouped_prices"
     params = {
         "token": token,
@@ -186,8 +462,7 @@ async def get_grouped_prices(
     }
     if return_at:
         params["return_at"] = return_at
-    async with session.get(travel_payouts_url, params=params) as response:
-        return await response.text()
+    return await get_bytes(session, travel_payouts_url, params, retry_policy)
 
 
 def parse_tickets_by_date(json_response) -> dict[str, Ticket]:
@@ -1,15 +1,31 @@
 import asyncio
+import os
 
-from apscheduler.schedulers.async_ import AsyncScheduler
 from loguru import logger
 
+from air_bot.adapters.locations_api import (
+    CachingLocationsApi,
+    SqliteLocationsStore,
+    TravelPayoutsLocationsApi,
+)
+from air_bot.adapters.locations_index import IndexedLocationsApi, LocationsIndexUpdater
 from air_bot.adapters.repo.session_maker import SessionMaker
+from air_bot.adapters.tickets_api import (
+    AviasalesTicketsApi,
+    CachingTicketsApi,
+    CircuitBreakerTicketsApi,
+    SingleFlightTicketsApi,
+)
+from air_bot.bot.calendar_prefetcher import CalendarPrefetcher
 from air_bot.bot.service import BotService
 from air_bot.config import config
 from air_bot.graceful_shutdown.service import ServiceWithGracefulShutdown
 from air_bot.http_session import HttpSessionMaker
+from air_bot.metrics import EventLoopLagMonitor, MetricsServer
 from air_bot.service.direction_updater import DirectionUpdater
-from air_bot.service.scheduler import ServiceScheduler
+from air_bot.service.notification_aggregator import NotificationAggregator
+from air_bot.service.notification_queue import NotificationQueueConsumer
+from air_bot.service.scheduler import run_scheduler
 from air_bot.settings import SettingsStorage
 
 
@@ -19,39 +35,113 @@ class App(ServiceWithGracefulShutdown):
         logger.info(f"Starting with config: {config}")
         self.session_maker = SessionMaker()
         self.http_session_maker = HttpSessionMaker()
+        self.event_loop_lag_monitor = EventLoopLagMonitor()
+        self.metrics_server = (
+            MetricsServer(config.metrics_port) if config.metrics_port else None
+        )
+        self.tickets_api = CachingTicketsApi(
+            SingleFlightTicketsApi(
+                CircuitBreakerTicketsApi(
+                    AviasalesTicketsApi(self.http_session_maker),
+                    failure_threshold=config.tickets_api_failure_threshold,
+                    reset_timeout=config.tickets_api_reset_timeout,
+                )
+            ),
+            maxsize=config.month_prices_cache_size,
+            ttl=(
+                config.month_prices_cache_ttl
+                if config.run_direction_updater
+                else min(
+                    config.month_prices_cache_ttl,
+                    config.month_prices_cache_ttl_with_worker,
+                )
+            ),
+        )
+        self.locations_store = None
+        if config.locations_cache_path:
+            os.makedirs(os.path.dirname(config.locations_cache_path), exist_ok=True)
+            self.locations_store = SqliteLocationsStore(
+                config.locations_cache_path, config.locations_cache_ttl_days * 86400
+            )
+        self.caching_locations_api = CachingLocationsApi(
+            TravelPayoutsLocationsApi(self.http_session_maker, config.locale),
+            config.locale,
+            maxsize=config.locations_cache_size,
+            ttl=config.locations_cache_ttl_days * 86400,
+            store=self.locations_store,
+        )
+        self.locations_api = IndexedLocationsApi(self.caching_locations_api)
+        self.locations_index_updater = LocationsIndexUpdater(
+            self.locations_api,
+            self.http_session_maker,
+            config.locations_data_dir,
+            config.locale,
+            config.locations_data_refresh_interval,
+        )
+        self.calendar_prefetcher = CalendarPrefetcher(
+            self.tickets_api, config.calendar_prefetch_requests_per_minute
+        )
         self.settings_changed_event = asyncio.Event()
         self.settings_storage = SettingsStorage(
             config.settings_file_path, self.settings_changed_event
         )
         self.direction_updater = DirectionUpdater(
-            self.settings_storage, self.session_maker, self.http_session_maker
+            self.settings_storage, self.session_maker, self.tickets_api
         )
         self.bot = BotService(
             config,
             self.http_session_maker,
+            self.tickets_api,
+            self.locations_api,
             self.session_maker,
             self.settings_storage,
             self.direction_updater,
+            self.calendar_prefetcher,
+        )
+        self.notification_aggregator = NotificationAggregator(
+            self.bot.notification_dispatcher, config.notification_digest_window
+        )
+        self.direction_updater.set_user_notifier(self.notification_aggregator)
+        # Notifications from a separate direction updater worker, if it is used
+        self.notification_queue_consumer = NotificationQueueConsumer(
+            self.session_maker,
+            self.notification_aggregator,
+            poll_interval=config.notification_queue_poll_interval,
+            batch_size=config.notification_queue_batch_size,
+            tickets_api=self.tickets_api,
         )
-        self.direction_updater.set_user_notifier(self.bot)
 
     async def start(self):
         await self.session_maker.start()
-        asyncio.create_task(self._start_scheduler())
+        self.event_loop_lag_monitor.start()
+        if self.metrics_server:
+            await self.metrics_server.start()
+        self.locations_index_updater.start()
+        self.notification_aggregator.start()
+        await self.caching_locations_api.warm_up()
+        if config.run_direction_updater:
+            scheduled_updater = self.direction_updater
+        else:
+            logger.info("Directions are updated by a separate worker")
+            scheduled_updater = None
+            self.notification_queue_consumer.start()
+        asyncio.create_task(
+            run_scheduler(
+                self.settings_storage, self.settings_changed_event, scheduled_updater
+            )
+        )
         asyncio.create_task(self.bot.start())
 
     async def stop(self):
+        await self.notification_queue_consumer.stop()
+        await self.notification_aggregator.stop()
+        await self.bot.stop()
+        await self.calendar_prefetcher.stop()
+        await self.locations_index_updater.stop()
+        if self.locations_store:
+            self.locations_store.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.event_loop_lag_monitor.stop()
         await self.http_session_maker.close()
         await self.session_maker.stop()
-
-    async def _start_scheduler(self):
-        async with AsyncScheduler() as scheduler:
-            service_scheduler = ServiceScheduler(
-                scheduler,
-                self.settings_storage,
-                self.settings_changed_event,
-                self.direction_updater,
-            )
-            await service_scheduler.start()
-            while True:
-                await asyncio.sleep(1)
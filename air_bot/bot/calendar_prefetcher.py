@@ -0,0 +1,91 @@
+import asyncio
+
+from loguru import logger
+
+from air_bot.adapters.tickets_api import CachingTicketsApi
+from air_bot.domain.exceptions import TicketsError
+from air_bot.domain.model import FlightDirection
+from air_bot.http_session import background_requests
+from air_bot.rate_limiter import TokenBucket
+
+
+class CalendarPrefetcher:
+    """Loads months adjacent to the one shown in low prices calendar into the cache in background.
+    Prefetch requests are limited by 'requests_per_minute', so they don't eat API quota needed
+    by other requests; when the limit is reached prefetch is just skipped."""
+
+    def __init__(self, tickets_api: CachingTicketsApi, requests_per_minute: float):
+        self.tickets_api = tickets_api
+        self._budget = TokenBucket(
+            rate=requests_per_minute / 60, capacity=max(1.0, requests_per_minute / 6)
+        )
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def prefetch_adjacent_months(
+        self,
+        user_id: int,
+        direction: FlightDirection,
+        year: int,
+        month: int,
+        prev_month_allowed: bool,
+        next_month_allowed: bool,
+    ):
+        """Starts prefetch of months around year-month shown to the user, cancelling prefetch
+        previously started for this user"""
+        months = []
+        if next_month_allowed:
+            months.append(next_month(year, month))
+        if prev_month_allowed:
+            months.append(prev_month(year, month))
+        self.cancel(user_id)
+        if not months:
+            return
+        with background_requests():
+            task = asyncio.create_task(self._prefetch(direction, months))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda _: self._forget(user_id, task))
+
+    def cancel(self, user_id: int):
+        task = self._tasks.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+
+    async def _prefetch(
+        self, direction: FlightDirection, months: list[tuple[int, int]]
+    ):
+        for year, month in months:
+            if self.tickets_api.is_month_cached(direction, year, month):
+                continue
+            if not self._budget.try_acquire():
+                logger.debug("Calendar prefetch budget is exhausted")
+                return
+            try:
+                await self.tickets_api.get_cheapest_tickets_for_month(
+                    direction, year, month
+                )
+            except TicketsError as e:
+                logger.warning(f"Failed to prefetch {year}-{month:02d}: {e!r}")
+                return
+
+    def _forget(self, user_id: int, task: asyncio.Task):
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+
+def next_month(year: int, month: int) -> tuple[int, int]:
+    if month < 12:
+        return year, month + 1
+    return year + 1, 1
+
+
+def prev_month(year: int, month: int) -> tuple[int, int]:
+    if month > 1:
+        return year, month - 1
+    return year - 1, 12
@@ -5,9 +5,9 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message
 from loguru import logger
 
-from air_bot.adapters.locations_api import TravelPayoutsLocationsApi
+from air_bot.adapters.locations_index import IndexedLocationsApi
 from air_bot.adapters.repo.uow import SqlAlchemyUnitOfWork
-from air_bot.adapters.tickets_api import AviasalesTicketsApi
+from air_bot.adapters.tickets_api import AbstractTicketsApi
 from air_bot.bot.i18n import i18n
 from air_bot.bot.keyboards.choose_location_kb import choose_location_keyboard
 from air_bot.bot.keyboards.choose_month_kb import choose_month_kb
@@ -17,15 +17,16 @@ from air_bot.bot.keyboards.low_prices_calendar_kb import (
 )
 from air_bot.bot.keyboards.user_home_kb import user_home_kb
 from air_bot.bot.keyboards.with_or_without_return_kb import with_or_without_return_kb
+from air_bot.bot.presentation.locations import parse_location
 from air_bot.bot.presentation.tickets import TicketView
 from air_bot.bot.utils.date import date_reader
 from air_bot.bot.utils.validation import validate_user_data_for_direction
-from air_bot.config import config
 from air_bot.domain.exceptions import (
     DuplicatedFlightDirection,
     TicketsAPIConnectionError,
+    TicketsAPIRateLimitedError,
 )
-from air_bot.domain.model import FlightDirection
+from air_bot.domain.model import FlightDirection, Location
 from air_bot.service.user import check_if_new_tracking_available, track
 from air_bot.settings import SettingsStorage
 
@@ -126,14 +127,26 @@ async def choose_airport_start(callback: CallbackQuery, state: FSMContext) -> No
     await state.set_state(NewDirection.choosing_airport_start)
 
 
+async def find_locations(
+    text: str, locations_api: IndexedLocationsApi
+) -> list[Location]:
+    """Location chosen from inline suggestions comes as 'Name (CODE)' and needs no search
+    if the code is known"""
+    parsed = parse_location(text)
+    if parsed is not None:
+        location = locations_api.get_by_code(parsed.code, parsed.name)
+        if location is not None:
+            return [location]
+    return await locations_api.get_locations(text)
+
+
 @router.message(NewDirection.choosing_airport_start, F.text)
 async def choose_specific_airport_start(
-    message: Message, state: FSMContext, http_session_maker
+    message: Message, state: FSMContext, locations_api: IndexedLocationsApi
 ) -> None:
-    locations_api = TravelPayoutsLocationsApi(http_session_maker, config.locale)
     try:
         text: str = message.text  # type: ignore[assignment]
-        locations = await locations_api.get_locations(text)
+        locations = await find_locations(text, locations_api)
     except Exception as e:
         logger.error(e)
         response = (
@@ -174,12 +187,11 @@ async def choose_airport_end(callback: CallbackQuery, state: FSMContext) -> None
 
 @router.message(NewDirection.choosing_airport_end, F.text)
 async def choose_specific_airport_end(
-    message: Message, state: FSMContext, http_session_maker
+    message: Message, state: FSMContext, locations_api: IndexedLocationsApi
 ) -> None:
-    locations_api = TravelPayoutsLocationsApi(http_session_maker, config.locale)
     try:
         text: str = message.text  # type: ignore[assignment]
-        locations = await locations_api.get_locations(text)
+        locations = await find_locations(text, locations_api)
     except Exception:
         response = (
             f"{i18n.translate('smth_went_wrong')} 😔 \n"
@@ -229,8 +241,9 @@ async def got_departure_date_as_text(
     message: Message,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ):
     departure_date = date_reader.read_date(message.text)  # type: ignore[arg-type]
     if not departure_date:
@@ -244,8 +257,9 @@ async def got_departure_date_as_text(
         message,
         state,
         session_maker,
-        http_session_maker,
+        tickets_api,
         ticket_view,
+        settings_storage,
     )
 
 
@@ -254,8 +268,9 @@ async def got_departure_date_from_button(
     callback: CallbackQuery,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ) -> None:
     departure_date: str = callback.data  # type: ignore[assignment]
     await got_departure_date(
@@ -264,8 +279,9 @@ async def got_departure_date_from_button(
         callback.message,  # type: ignore[arg-type]
         state,
         session_maker,
-        http_session_maker,
+        tickets_api,
         ticket_view,
+        settings_storage,
     )
     await callback.answer()
 
@@ -276,8 +292,9 @@ async def got_departure_date(
     message: Message,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ) -> None:
     await state.update_data(departure_at=departure_date)
     user_data = await state.get_data()
@@ -285,7 +302,13 @@ async def got_departure_date(
         await ask_for_return_date(message, state)
         return
     await add_direction_and_show_result(
-        user_id, state, message, session_maker, http_session_maker, ticket_view
+        user_id,
+        state,
+        message,
+        session_maker,
+        tickets_api,
+        ticket_view,
+        settings_storage,
     )
 
 
@@ -304,8 +327,9 @@ async def got_return_date_as_text(
     message: Message,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ):
     return_date = date_reader.read_date(message.text)  # type: ignore[arg-type]
     if not return_date:
@@ -319,8 +343,9 @@ async def got_return_date_as_text(
         state,
         message,
         session_maker,
-        http_session_maker,
+        tickets_api,
         ticket_view,
+        settings_storage,
     )
 
 
@@ -329,8 +354,9 @@ async def got_return_date_from_button(
     callback: CallbackQuery,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ):
     return_date: str = callback.data  # type: ignore[assignment]
     await state.update_data(return_at=return_date)
@@ -339,8 +365,9 @@ async def got_return_date_from_button(
         state,
         callback.message,  # type: ignore[arg-type]
         session_maker,
-        http_session_maker,
+        tickets_api,
         ticket_view,
+        settings_storage,
     )
     await callback.answer()
 
@@ -350,8 +377,9 @@ async def add_direction_and_show_result(
     state: FSMContext,
     message: Message,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     ticket_view: TicketView,
+    settings_storage: SettingsStorage,
 ):
     user_data = await state.get_data()
     if not validate_user_data_for_direction(user_data):
@@ -362,11 +390,16 @@ async def add_direction_and_show_result(
 
     del user_data["with_return"]
     direction = FlightDirection(**user_data)
-    tickets_api = AviasalesTicketsApi(http_session_maker)
     uow = SqlAlchemyUnitOfWork(session_maker)
     try:
-        tickets, direction_id = await track(user_id, direction, tickets_api, uow)
-    except TicketsAPIConnectionError:
+        tickets, direction_id = await track(
+            user_id,
+            direction,
+            tickets_api,
+            uow,
+            settings_storage.settings.direction_updater,
+        )
+    except (TicketsAPIConnectionError, TicketsAPIRateLimitedError):
         text = f'{i18n.translate("smth_went_wrong")} 😔 \n {i18n.translate("try_search_again")} 🔄'
         await message.answer(text, reply_markup=user_home_kb.keyboard)
     except DuplicatedFlightDirection as e:
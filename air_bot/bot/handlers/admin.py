@@ -2,6 +2,10 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from air_bot.bot.notification_dispatcher import NotificationDispatcher
+from air_bot.bot.presentation.utils import MAX_MESSAGE_LENGTH
+from air_bot.http_session import HttpSessionMaker
+from air_bot.metrics import registry
 from air_bot.service.direction_updater import DirectionUpdater
 
 router = Router()
@@ -14,3 +18,58 @@ async def remove_outdated_directions(
     """Manually starts process of removing directions with a past departure date"""
     n_directions = await direction_updater.remove_outdated()
     await message.answer(f"Removed {n_directions} outdated directions.")
+
+
+@router.message(Command(commands=["notification_stats"]))
+async def show_notification_stats(
+    message: Message, notification_dispatcher: NotificationDispatcher
+):
+    stats = notification_dispatcher.stats()
+    await message.answer(
+        f"Queue depth: {stats.queue_depth}\n"
+        f"Sent: {stats.sent}, failed: {stats.failed}\n"
+        f"Average time in queue: {stats.avg_queue_latency:.3f} s\n"
+        f"Average send time: {stats.avg_send_latency:.3f} s"
+    )
+
+
+@router.message(Command(commands=["api_stats"]))
+async def show_api_stats(message: Message, http_session_maker: HttpSessionMaker):
+    stats = http_session_maker.rate_limiter.stats()
+    if not stats:
+        await message.answer("No API requests yet.")
+        return
+    lines = []
+    for (endpoint, priority), endpoint_stats in sorted(
+        stats.items(), key=lambda item: (item[0][0], item[0][1].value)
+    ):
+        lines.append(
+            f"{endpoint} ({priority.name.lower()}): "
+            f"{endpoint_stats.requests} sent, {endpoint_stats.rejected} rejected, "
+            f"wait avg {endpoint_stats.avg_wait:.3f} s, max {endpoint_stats.max_wait:.3f} s"
+        )
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command(commands=["http_stats"]))
+async def show_http_stats(message: Message, http_session_maker: HttpSessionMaker):
+    stats = http_session_maker.connection_stats
+    await message.answer(
+        f"Connections: {stats.new_connections} new, {stats.reused_connections} reused\n"
+        f"Average connect time: {stats.avg_connect_time:.3f} s\n"
+        f"DNS: {stats.dns_resolutions} resolutions, {stats.dns_cache_hits} cache hits, "
+        f"average resolve time {stats.avg_dns_time:.3f} s"
+    )
+
+
+@router.message(Command(commands=["metrics"]))
+async def show_metrics(message: Message):
+    """Sends metrics in Prometheus text format, filtered by the command argument if it is passed"""
+    _, _, name_filter = (message.text or "").partition(" ")
+    lines = [
+        line
+        for line in registry.render().splitlines()
+        if not line.startswith("#") and name_filter.strip() in line
+    ]
+    text = "\n".join(lines) or "No metrics yet."
+    await message.answer(text[:MAX_MESSAGE_LENGTH])
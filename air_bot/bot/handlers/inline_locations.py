@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING
+
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from air_bot.adapters.locations_index import IndexedLocationsApi
+from air_bot.bot.presentation.locations import format_location
+
+if TYPE_CHECKING:
+    # Not exported by aiogram 3.14 pinned in poetry.lock, only needed for the annotation
+    from aiogram.types import InlineQueryResultUnion
+
+MAX_SUGGESTIONS = 10
+# Locations change rarely, so Telegram may cache suggestions for a long time
+SUGGESTIONS_CACHE_TIME = 3600
+
+router = Router()
+
+
+@router.inline_query()
+async def suggest_locations(
+    inline_query: InlineQuery, locations_api: IndexedLocationsApi
+):
+    """Suggests cities and airports while the user types '@bot_name <location>'. The chosen one is sent
+    to the chat as 'Name (CODE)', which add direction dialog accepts as an exact location.
+    """
+    locations = locations_api.suggest(inline_query.query, MAX_SUGGESTIONS)
+    results: list[InlineQueryResultUnion] = [
+        InlineQueryResultArticle(
+            id=f"{i}:{location.code}",
+            title=format_location(location),
+            description=location.country_code,
+            input_message_content=InputTextMessageContent(
+                message_text=format_location(location)
+            ),
+        )
+        for i, location in enumerate(locations)
+    ]
+    await inline_query.answer(results, cache_time=SUGGESTIONS_CACHE_TIME)
@@ -7,7 +7,8 @@ from aiogram.types import CallbackQuery, Message
 from loguru import logger
 
 from air_bot.adapters.repo.uow import SqlAlchemyUnitOfWork
-from air_bot.adapters.tickets_api import AviasalesTicketsApi
+from air_bot.adapters.tickets_api import AbstractTicketsApi
+from air_bot.bot.calendar_prefetcher import CalendarPrefetcher
 from air_bot.bot.i18n import i18n
 from air_bot.bot.keyboards.low_prices_calendar_kb import (
     low_prices_calendar_nav_keyboard,
@@ -24,8 +25,9 @@ async def show_low_prices_calendar(
     callback: CallbackQuery,
     state: FSMContext,
     session_maker,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     calendar_view: CalendarView,
+    calendar_prefetcher: CalendarPrefetcher,
 ) -> None:
     _, direction_id = callback.data.split("|")  # type: ignore[union-attr]
     direction_id = int(direction_id)
@@ -37,11 +39,10 @@ async def show_low_prices_calendar(
         await callback.answer(i18n.translate("button_is_outdated"))
         return
 
-    aviasales_api = AviasalesTicketsApi(http_session_maker)
     direction = direction_info.direction
     departure_date = direction.departure_date()
     try:
-        tickets_by_date = await aviasales_api.get_cheapest_tickets_for_month(
+        tickets_by_date = await tickets_api.get_cheapest_tickets_for_month(
             direction,
             departure_year=departure_date.year,
             departure_month=departure_date.month,
@@ -69,6 +70,14 @@ async def show_low_prices_calendar(
         show_prev_button,
         show_next_button,
     )
+    calendar_prefetcher.prefetch_adjacent_months(
+        callback.from_user.id,
+        direction,
+        departure_date.year,
+        departure_date.month,
+        show_prev_button,
+        show_next_button,
+    )
 
     await state.clear()
     low_prices_calendar_data = {
@@ -141,8 +150,9 @@ async def show_calendar(
 async def show_previous_month(
     callback: CallbackQuery,
     state: FSMContext,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     calendar_view: CalendarView,
+    calendar_prefetcher: CalendarPrefetcher,
 ) -> None:
     user_data = await state.get_data()
     if "low_prices_calendar_data" not in user_data:
@@ -150,7 +160,7 @@ async def show_previous_month(
         return
     calendar_data = decrease_month(user_data["low_prices_calendar_data"])
     calendar_messages = await edit_calendar(
-        http_session_maker, calendar_view, calendar_data, callback
+        tickets_api, calendar_prefetcher, calendar_view, calendar_data, callback
     )
     calendar_data["calendar_messages"] = calendar_messages
     await state.update_data(low_prices_calendar_data=calendar_data)
@@ -160,8 +170,9 @@ async def show_previous_month(
 async def show_next_month(
     callback: CallbackQuery,
     state: FSMContext,
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
     calendar_view: CalendarView,
+    calendar_prefetcher: CalendarPrefetcher,
 ) -> None:
     user_data = await state.get_data()
     if "low_prices_calendar_data" not in user_data:
@@ -169,23 +180,23 @@ async def show_next_month(
         return
     calendar_data = increase_month(user_data["low_prices_calendar_data"])
     calendar_messages = await edit_calendar(
-        http_session_maker, calendar_view, calendar_data, callback
+        tickets_api, calendar_prefetcher, calendar_view, calendar_data, callback
     )
     calendar_data["calendar_messages"] = calendar_messages
     await state.update_data(low_prices_calendar_data=calendar_data)
 
 
 async def edit_calendar(
-    http_session_maker,
+    tickets_api: AbstractTicketsApi,
+    calendar_prefetcher: CalendarPrefetcher,
     calendar_view: CalendarView,
     calendar_data,
     callback: CallbackQuery,
 ) -> list[Message]:
     """Updates calendar message(s) to ticket prices for departure year and month specified in calendar_data.
     Returns list or updated calendar messages."""
-    aviasales_api = AviasalesTicketsApi(http_session_maker)
     try:
-        tickets_by_date = await aviasales_api.get_cheapest_tickets_for_month(
+        tickets_by_date = await tickets_api.get_cheapest_tickets_for_month(
             calendar_data["direction"],
             departure_year=calendar_data["year"],
             departure_month=calendar_data["month"],
@@ -217,6 +228,14 @@ async def edit_calendar(
         show_prev_button,
         show_next_button,
     )
+    calendar_prefetcher.prefetch_adjacent_months(
+        callback.from_user.id,
+        calendar_data["direction"],
+        calendar_data["year"],
+        calendar_data["month"],
+        show_prev_button,
+        show_next_button,
+    )
     await callback.answer()
     return calendar_messages
 
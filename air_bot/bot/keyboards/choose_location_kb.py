@@ -1,5 +1,6 @@
 from aiogram import types
 
+from air_bot.bot.presentation.locations import format_location
 from air_bot.domain.model import Location
 
 
@@ -7,7 +8,7 @@ def choose_location_keyboard(locations: list[Location]) -> types.InlineKeyboardM
     kb = []
     texts = set()
     for location in locations:
-        text = f"{location.name} ({location.code})"
+        text = format_location(location)
         if text in texts:
             continue
         texts.add(text)
@@ -1,6 +1,7 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from air_bot.bot.i18n import i18n
+from air_bot.domain.model import PriceUpdate
 
 
 def show_low_prices_calendar_keyboard(direction_id: int) -> InlineKeyboardMarkup:
@@ -15,6 +16,22 @@ def show_low_prices_calendar_keyboard(direction_id: int) -> InlineKeyboardMarkup
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
 
+def show_low_prices_calendars_keyboard(
+    updates: list[PriceUpdate],
+) -> InlineKeyboardMarkup:
+    """Calendar button for every direction of a digest"""
+    kb = [
+        [
+            InlineKeyboardButton(
+                text=f"📅 {update.direction.start_name} - {update.direction.end_name}",
+                callback_data=f"show_low_prices_calendar|{update.direction_id}",
+            )
+        ]
+        for update in updates
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=kb)
+
+
 def low_prices_calendar_nav_keyboard(
     show_prev_button: bool, show_next_button: bool
 ) -> InlineKeyboardMarkup:
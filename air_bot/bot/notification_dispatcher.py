@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from loguru import logger
+
+from air_bot.domain.model import FlightDirection, PriceUpdate, Ticket
+from air_bot.domain.ports.user_notifier import UserNotifier
+from air_bot.rate_limiter import TokenBucket
+
+MAX_SEND_ATTEMPTS = 3
+MAX_CHAT_BUCKETS = 10000
+LATENCY_WINDOW = 1000
+
+
+@dataclass(frozen=True)
+class _Notification:
+    user_id: int
+    updates: list[PriceUpdate]
+    # Single update is sent as a usual notification, several updates - as a digest
+    is_digest: bool
+    enqueued_at: float
+
+
+@dataclass(frozen=True)
+class NotificationDispatcherStats:
+    queue_depth: int
+    sent: int
+    failed: int
+    avg_queue_latency: float
+    avg_send_latency: float
+
+
+def _single_message(updates: list[PriceUpdate]) -> list[list[PriceUpdate]]:
+    return [updates]
+
+
+class NotificationDispatcher(UserNotifier):
+    """Queues notifications and sends them with 'n_senders' concurrent senders, respecting Telegram limits
+    for all messages sent by the bot and for messages sent to a single chat.
+    'split_digest' returns updates shown in every message of a digest, so every message is queued
+    separately and takes its own rate limit slot."""
+
+    def __init__(
+        self,
+        user_notifier: UserNotifier,
+        n_senders: int,
+        messages_per_second: float,
+        messages_per_chat_per_second: float,
+        split_digest: Callable[
+            [list[PriceUpdate]], list[list[PriceUpdate]]
+        ] = _single_message,
+    ):
+        self.user_notifier = user_notifier
+        self.split_digest = split_digest
+        self.n_senders = n_senders
+        self.messages_per_chat_per_second = messages_per_chat_per_second
+        self._queue: asyncio.Queue[_Notification] = asyncio.Queue()
+        self._global_bucket = TokenBucket(
+            rate=messages_per_second, capacity=max(1.0, messages_per_second)
+        )
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+        self._senders: list[asyncio.Task] = []
+        self._sent = 0
+        self._failed = 0
+        self._queue_latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._send_latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def notify_user(
+        self,
+        user_id: int,
+        tickets: list[Ticket],
+        direction: FlightDirection,
+        direction_id: int,
+    ):
+        update = PriceUpdate(
+            direction_id=direction_id, direction=direction, tickets=tickets
+        )
+        await self.notify_user_about_updates(user_id, [update])
+
+    async def notify_user_about_updates(self, user_id: int, updates: list[PriceUpdate]):
+        is_digest = len(updates) > 1
+        messages = self.split_digest(updates) if is_digest else [updates]
+        for shown_updates in messages:
+            self._queue.put_nowait(
+                _Notification(
+                    user_id=user_id,
+                    updates=shown_updates,
+                    is_digest=is_digest,
+                    enqueued_at=time.monotonic(),
+                )
+            )
+
+    def start(self):
+        for _ in range(self.n_senders):
+            self._senders.append(asyncio.create_task(self._sender()))
+
+    async def stop(self):
+        for sender in self._senders:
+            sender.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        self._senders = []
+        if not self._queue.empty():
+            logger.warning(f"{self._queue.qsize()} notification(s) were not sent")
+
+    async def join(self):
+        """Waits until all queued notifications are processed"""
+        await self._queue.join()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> NotificationDispatcherStats:
+        return NotificationDispatcherStats(
+            queue_depth=self.queue_depth,
+            sent=self._sent,
+            failed=self._failed,
+            avg_queue_latency=_average(self._queue_latencies),
+            avg_send_latency=_average(self._send_latencies),
+        )
+
+    async def _sender(self):
+        while True:
+            notification = await self._queue.get()
+            try:
+                await self._send(notification)
+            except Exception as e:
+                self._failed += 1
+                logger.exception(
+                    f"Failed to send notification to user {notification.user_id}: {e}"
+                )
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, notification: _Notification):
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await self._wait_for_send_slot(notification.user_id)
+            started_at = time.monotonic()
+            try:
+                await self._notify(notification)
+            except TelegramRetryAfter as e:
+                logger.warning(
+                    f"Telegram asked to retry after {e.retry_after} seconds",
+                    user_id=notification.user_id,
+                    attempt=attempt,
+                )
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + e.retry_after
+                )
+                continue
+            except TelegramAPIError as e:
+                # TODO: remove user in case of TelegramForbiddenError (bot was blocked by user)
+                self._failed += 1
+                logger.warning(
+                    f"Failed to send notification: {e}", user_id=notification.user_id
+                )
+                return
+            self._sent += 1
+            self._send_latencies.append(time.monotonic() - started_at)
+            self._queue_latencies.append(started_at - notification.enqueued_at)
+            return
+        self._failed += 1
+        logger.error(
+            f"Failed to send notification in {MAX_SEND_ATTEMPTS} attempts",
+            user_id=notification.user_id,
+        )
+
+    async def _notify(self, notification: _Notification):
+        if not notification.is_digest:
+            update = notification.updates[0]
+            await self.user_notifier.notify_user(
+                notification.user_id,
+                update.tickets,
+                update.direction,
+                update.direction_id,
+            )
+        else:
+            await self.user_notifier.notify_user_about_updates(
+                notification.user_id, notification.updates
+            )
+
+    async def _wait_for_send_slot(self, user_id: int):
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await self._chat_bucket(user_id).acquire()
+        await self._global_bucket.acquire()
+
+    def _chat_bucket(self, user_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(user_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= MAX_CHAT_BUCKETS:
+                self._chat_buckets = {
+                    chat_id: chat_bucket
+                    for chat_id, chat_bucket in self._chat_buckets.items()
+                    if not chat_bucket.is_full()
+                }
+            bucket = TokenBucket(rate=self.messages_per_chat_per_second, capacity=1)
+            self._chat_buckets[user_id] = bucket
+        return bucket
+
+
+def _average(values: deque[float]) -> float:
+    if not values:
+        return 0.0
+    return sum(values) / len(values)
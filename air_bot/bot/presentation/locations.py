@@ -0,0 +1,18 @@
+"""Presentation for locations in keyboards, inline suggestions and messages"""
+import re
+
+from air_bot.domain.model import Location
+
+LOCATION_PATTERN = re.compile(r"^(?P<name>.+) \((?P<code>[A-Z]{3})\)$")
+
+
+def format_location(location: Location) -> str:
+    return f"{location.name} ({location.code})"
+
+
+def parse_location(text: str) -> Location | None:
+    """Reads location sent as 'Name (CODE)', which is what choosing an inline suggestion sends"""
+    match = LOCATION_PATTERN.match(text.strip())
+    if match is None:
+        return None
+    return Location(code=match["code"], name=match["name"], country_code=None)
@@ -1,9 +1,9 @@
 from datetime import datetime
 
 from air_bot.bot.i18n import i18n
-from air_bot.bot.presentation.utils import get_ticket_link
+from air_bot.bot.presentation.utils import MAX_MESSAGE_LENGTH, get_ticket_link
 from air_bot.domain.exceptions import InternalError
-from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.domain.model import FlightDirection, PriceUpdate, Ticket
 
 
 class TicketView:
@@ -35,6 +35,34 @@ class TicketView:
             text += "\n------------------------------------\n"
         return text
 
+    def print_digest(
+        self, updates: list[PriceUpdate]
+    ) -> list[tuple[str, list[PriceUpdate]]]:
+        """Cheapest ticket of every direction, split into messages fitting Telegram limit.
+        Returns text of every message with updates shown in it."""
+        header = f"<b>{i18n.translate('price_updates')}</b>\n\n"
+        separator = "\n------------------------------------\n"
+        messages: list[tuple[str, list[PriceUpdate]]] = []
+        text = header
+        shown: list[PriceUpdate] = []
+        for update in updates:
+            if not update.tickets:
+                continue
+            ticket_text = self.print_ticket(update.tickets[0], update.direction)
+            if shown and len(text) + len(ticket_text) > MAX_MESSAGE_LENGTH:
+                messages.append((text, shown))
+                text = header
+                shown = []
+            text += ticket_text + separator
+            shown.append(update)
+        if shown:
+            messages.append((text, shown))
+        return messages
+
+    def split_digest(self, updates: list[PriceUpdate]) -> list[list[PriceUpdate]]:
+        """Updates shown in every message of a digest"""
+        return [shown for _, shown in self.print_digest(updates)]
+
     def print_ticket(self, ticket: Ticket, direction: FlightDirection) -> str:
         if direction.return_at:
             return self._print_two_way_ticket(ticket, direction)
@@ -2,6 +2,8 @@ from air_bot.bot.i18n import i18n
 from air_bot.domain.model import Ticket
 from air_bot.config import config
 
+# Telegram message length limit
+MAX_MESSAGE_LENGTH = 4096
 
 NUMBER2MONTH_NAME = {
     1: i18n.translate("january"),
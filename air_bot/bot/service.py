@@ -1,22 +1,28 @@
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from air_bot.adapters.locations_index import IndexedLocationsApi
 from air_bot.adapters.repo.session_maker import SessionMaker
+from air_bot.adapters.tickets_api import AbstractTicketsApi
+from air_bot.bot.calendar_prefetcher import CalendarPrefetcher
 from air_bot.bot.handlers import (
     add_flight_direction,
     admin,
+    inline_locations,
     low_prices_calendar,
     start,
     user_profile,
 )
 from air_bot.bot.keyboards.low_prices_calendar_kb import (
     show_low_prices_calendar_keyboard,
+    show_low_prices_calendars_keyboard,
 )
 from air_bot.bot.middlewares.depends import Depends
+from air_bot.bot.notification_dispatcher import NotificationDispatcher
 from air_bot.bot.presentation.low_price_calendar import CalendarView
 from air_bot.bot.presentation.tickets import TicketView
 from air_bot.config import BotConfig
-from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.domain.model import FlightDirection, PriceUpdate, Ticket
 from air_bot.domain.ports.user_notifier import UserNotifier
 from air_bot.http_session import HttpSessionMaker
 from air_bot.service.direction_updater import DirectionUpdater
@@ -28,9 +34,12 @@ class BotService(UserNotifier):
         self,
         config: BotConfig,
         http_session_maker: HttpSessionMaker,
+        tickets_api: AbstractTicketsApi,
+        locations_api: IndexedLocationsApi,
         session_maker: SessionMaker,
         settings_storage: SettingsStorage,
         direction_updater: DirectionUpdater,
+        calendar_prefetcher: CalendarPrefetcher,
     ):
         self.dp = Dispatcher(storage=MemoryStorage())
         self.bot = Bot(token=config.bot_token.get_secret_value())
@@ -40,23 +49,39 @@ class BotService(UserNotifier):
         self.dp.include_router(user_profile.router)
         self.dp.include_router(add_flight_direction.router)
         self.dp.include_router(low_prices_calendar.router)
+        self.dp.include_router(inline_locations.router)
 
         self.ticket_view = TicketView(config.currency)
         self.low_price_calendar_view = CalendarView(config.currency)
+        self.notification_dispatcher = NotificationDispatcher(
+            self,
+            n_senders=config.notification_senders,
+            messages_per_second=config.telegram_messages_per_second,
+            messages_per_chat_per_second=config.telegram_messages_per_chat_per_second,
+            split_digest=self.ticket_view.split_digest,
+        )
         handler_dependencies = [
             ("session_maker", session_maker),
             ("http_session_maker", http_session_maker),
+            ("tickets_api", tickets_api),
+            ("locations_api", locations_api),
             ("settings_storage", settings_storage),
             ("ticket_view", self.ticket_view),
             ("calendar_view", self.low_price_calendar_view),
+            ("calendar_prefetcher", calendar_prefetcher),
             ("direction_updater", direction_updater),
+            ("notification_dispatcher", self.notification_dispatcher),
         ]
         for arg_name, arg_value in handler_dependencies:
             self.dp.update.middleware(Depends(arg_name, arg_value))
 
     async def start(self) -> None:
+        self.notification_dispatcher.start()
         await self.dp.start_polling(self.bot)
 
+    async def stop(self) -> None:
+        await self.notification_dispatcher.stop()
+
     async def notify_user(
         self,
         user_id: int,
@@ -71,3 +96,15 @@ class BotService(UserNotifier):
             disable_web_page_preview=True,
             reply_markup=show_low_prices_calendar_keyboard(direction_id),
         )
+
+    async def notify_user_about_updates(self, user_id: int, updates: list[PriceUpdate]):
+        """Sends a digest, usually a single message for all directions. The dispatcher queues
+        every message of a long digest separately, so it gets here already split."""
+        for text, shown_updates in self.ticket_view.print_digest(updates):
+            await self.bot.send_message(
+                user_id,
+                text=text,
+                parse_mode="html",
+                disable_web_page_preview=True,
+                reply_markup=show_low_prices_calendars_keyboard(shown_updates),
+            )
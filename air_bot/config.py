@@ -20,6 +20,50 @@ class BotConfig(BaseSettings):
     settings_file_path: str
     log_level: str
     log_level_sqlalchemy: str = "WARNING"
+    notification_senders: int = 4
+    telegram_messages_per_second: float = 30
+    telegram_messages_per_chat_per_second: float = 1
+    month_prices_cache_size: int = 1000
+    month_prices_cache_ttl: int = 600
+    # With a separate worker only prices of notified directions are dropped from the cache,
+    # other changed prices are shown after this TTL
+    month_prices_cache_ttl_with_worker: int = 120
+    calendar_prefetch_requests_per_minute: float = 30
+    # Set to false if directions are updated by a separate 'python -m air_bot.worker' process
+    run_direction_updater: bool = True
+    notification_queue_poll_interval: float = 1
+    notification_queue_batch_size: int = 100
+    # Price updates for a user are sent as one message at the end of an update cycle (0)
+    # or collected for this many seconds
+    notification_digest_window: float = 0
+    # Limits of every Travelpayouts endpoint shared by all requests of the process
+    api_requests_per_second: float = 10
+    api_burst: float = 20
+    # Part of the burst that background requests (direction updates, prefetch) can't take
+    api_background_reserve: float = 0.25
+    api_interactive_max_wait: float = 3
+    api_background_max_wait: float = 8
+    # Connection pool of the HTTP client, connections are kept alive to avoid TLS handshake on every request
+    http_connection_limit: int = 100
+    http_connection_limit_per_host: int = 20
+    http_keepalive_timeout: float = 60
+    http_dns_cache_ttl: int = 600
+    # Connection errors and 429/5xx responses are retried with exponential backoff
+    http_retry_attempts: int = 3
+    http_retry_base_delay: float = 0.5
+    http_retry_max_delay: float = 4
+    # Requests for tickets are paused for reset timeout seconds after this many connection errors in a row
+    tickets_api_failure_threshold: int = 5
+    tickets_api_reset_timeout: float = 30
+    # Cities and airports data for local location search, downloaded every refresh interval hours (0 - never)
+    locations_data_dir: str = "~/.air_bot/locations"
+    locations_data_refresh_interval: float = 24
+    # Locations found by the autocomplete API are cached in memory and in an SQLite file (not used if path is empty)
+    locations_cache_size: int = 10000
+    locations_cache_ttl_days: float = 30
+    locations_cache_path: str = "~/.air_bot/locations_cache.sqlite3"
+    # Port to serve metrics for Prometheus on, metrics are not served if it's 0
+    metrics_port: int = 0
 
     class Config:
         env_prefix = "AIR_BOT_"
@@ -38,3 +82,5 @@ class BotConfig(BaseSettings):
 load_dotenv()
 config = BotConfig()  # type: ignore[call-arg]
 config.settings_file_path = os.path.expanduser(config.settings_file_path)
+config.locations_data_dir = os.path.expanduser(config.locations_data_dir)
+config.locations_cache_path = os.path.expanduser(config.locations_cache_path)
@@ -21,6 +21,18 @@ class TicketsAPIConnectionError(TicketsError):
     pass
 
 
+class TicketsAPIUnavailableError(TicketsAPIConnectionError):
+    """Request was not made, because the API is considered down after recent failures"""
+
+    pass
+
+
+class TicketsAPIRateLimitedError(TicketsError):
+    """Request was not made, because this process has exceeded its own limit of requests to the API"""
+
+    pass
+
+
 class TicketsAPIError(TicketsError):
     """Request for some reason was invalid"""
 
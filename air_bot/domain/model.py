@@ -1,10 +1,11 @@
+import calendar
 import datetime
 from dataclasses import dataclass
 from functools import cached_property
 from typing import Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FlightDirection:
     start_code: str
     start_name: str
@@ -26,6 +27,23 @@ class FlightDirection:
             return datetime.datetime.strptime(self.return_at, "%Y-%m")
         return datetime.datetime.strptime(self.return_at, "%Y-%m-%d")
 
+    def departure_end_date(self) -> datetime.date:
+        """Last possible departure date: the date itself or the end of month for month directions"""
+        return end_date(self.departure_at)
+
+    def return_end_date(self) -> Optional[datetime.date]:
+        if not self.return_at:
+            return None
+        return end_date(self.return_at)
+
+
+def end_date(date_str: str) -> datetime.date:
+    """Converts 'YYYY-MM-DD' to date, 'YYYY-MM' to the last day of the month"""
+    if len(date_str) == 7:
+        year, month = map(int, date_str.split("-"))
+        return datetime.date(year, month, calendar.monthrange(year, month)[1])
+    return datetime.date.fromisoformat(date_str)
+
 
 @dataclass(kw_only=True)
 class FlightDirectionInfo:
@@ -40,6 +58,12 @@ class FlightDirectionInfo:
     price: float | None
     last_update: datetime.datetime
     last_update_try: datetime.datetime
+    # When direction should be updated next time
+    next_update_at: datetime.datetime | None = None
+    # Moving average of how often cheapest price changes on update, from 0 to 1
+    price_volatility: float = 0.0
+    # Number of updates in a row which didn't change cheapest price
+    unchanged_price_updates: int = 0
 
     @cached_property
     def direction(self):
@@ -54,12 +78,21 @@ class FlightDirectionInfo:
         )
 
 
+@dataclass(frozen=True)
+class UpdateSchedule:
+    """When direction is updated next time and statistics this decision is based on"""
+
+    next_update_at: datetime.datetime
+    price_volatility: float
+    unchanged_price_updates: int
+
+
 @dataclass
 class User:
     user_id: int
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Ticket:
     price: float
     departure_at: datetime.datetime
@@ -90,3 +123,23 @@ class HistoricFlightDirection:
     last_update: datetime.datetime
     deleted_at: datetime.datetime
     deleted_by_user: bool
+
+
+@dataclass(kw_only=True)
+class PendingNotification:
+    """Notification about new tickets waiting to be sent by the bot"""
+
+    id: int | None = None
+    user_id: int
+    direction_id: int
+    tickets: list[Ticket]
+    created_at: datetime.datetime
+
+
+@dataclass(frozen=True, kw_only=True)
+class PriceUpdate:
+    """New tickets of a tracked direction to notify a user about"""
+
+    direction_id: int
+    direction: FlightDirection
+    tickets: list[Ticket]
@@ -11,8 +11,10 @@ class FlightDirectionRepo(ABC):
         direction: model.FlightDirection,
         price: float | None,
         last_update: datetime.datetime,
+        next_update_at: datetime.datetime | None = None,
     ) -> int:
-        """Return id of inserted row"""
+        """Return id of inserted row. Direction is due for update at 'next_update_at',
+        at 'last_update' if it's not passed"""
         raise NotImplementedError
 
     @abstractmethod
@@ -36,20 +38,38 @@ class FlightDirectionRepo(ABC):
             return None
 
     @abstractmethod
-    async def get_directions_with_last_update_try_before(
-        self, last_update: datetime.datetime, limit: int
+    async def claim_directions_for_update(
+        self,
+        due_before: datetime.datetime,
+        limit: int,
+        owner: str,
+        lease_expires_at: datetime.datetime,
+        after: tuple[datetime.datetime, int] | None = None,
     ) -> list[model.FlightDirectionInfo]:
+        """Returns directions with next_update_at before 'due_before' ordered by (next_update_at, id),
+        'after' is (next_update_at, id) of the last direction of the previous page, if any.
+        Skips directions leased by other updaters and leases returned directions to 'owner'
+        until 'lease_expires_at'. Lease is released when price or last_update_try of direction is updated.
+        """
         raise NotImplementedError
 
     @abstractmethod
     async def update_price(
-        self, direction_id: int, price: float | None, last_update: datetime.datetime
+        self,
+        direction_id: int,
+        price: float | None,
+        last_update: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
+        """Update schedule is left unchanged if not passed"""
         raise NotImplementedError
 
     @abstractmethod
     async def update_last_update_try(
-        self, direction_id: int, last_update_try: datetime.datetime
+        self,
+        direction_id: int,
+        last_update_try: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
         raise NotImplementedError
 
@@ -107,3 +127,15 @@ class TicketRepo(ABC):
     @abstractmethod
     async def remove_for_direction(self, direction_id: int):
         raise NotImplementedError
+
+
+class PendingNotificationRepo(ABC):
+    @abstractmethod
+    async def add(self, notification: model.PendingNotification):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def take(self, limit: int) -> list[model.PendingNotification]:
+        """Removes and returns up to 'limit' oldest notifications, skipping ones taken
+        by concurrent transactions"""
+        raise NotImplementedError
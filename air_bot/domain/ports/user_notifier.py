@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.domain.model import FlightDirection, PriceUpdate, Ticket
 
 
 class UserNotifier(ABC):
@@ -13,3 +13,13 @@ class UserNotifier(ABC):
         direction_id: int,
     ):
         raise NotImplementedError
+
+    async def notify_user_about_updates(self, user_id: int, updates: list[PriceUpdate]):
+        """Notifies user about new prices of several directions at once"""
+        for update in updates:
+            await self.notify_user(
+                user_id, update.tickets, update.direction, update.direction_id
+            )
+
+    async def flush(self):
+        """Called when an update cycle is over, notifier may send notifications collected during it"""
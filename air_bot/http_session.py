@@ -1,17 +1,59 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Iterator
+
 import aiohttp
 from loguru import logger
+from yarl import URL
 
+from air_bot import metrics
 from air_bot.config import config
+from air_bot.rate_limiter import TokenBucket
 
 
 class HttpSessionMaker:
     def __init__(self):
         # aiohttp.ClientSession() wants to be called inside a coroutine
         self._session: aiohttp.ClientSession | None = None
+        self.rate_limiter = ApiRateLimiter(
+            requests_per_second=config.api_requests_per_second,
+            burst=config.api_burst,
+            background_reserve=config.api_background_reserve,
+            max_wait={
+                RequestPriority.INTERACTIVE: config.api_interactive_max_wait,
+                RequestPriority.BACKGROUND: config.api_background_max_wait,
+            },
+        )
+
+        self.connection_stats = ConnectionStats()
+        self.retry_policy = RetryPolicy(
+            attempts=config.http_retry_attempts,
+            base_delay=config.http_retry_base_delay,
+            max_delay=config.http_retry_max_delay,
+        )
 
     def __call__(self):
         if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession(trace_configs=[get_trace_config()])
+            connector = aiohttp.TCPConnector(
+                limit=config.http_connection_limit,
+                limit_per_host=config.http_connection_limit_per_host,
+                keepalive_timeout=config.http_keepalive_timeout,
+                ttl_dns_cache=config.http_dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                # Rate limit goes first, so waiting for it doesn't count as request latency
+                trace_configs=[
+                    get_rate_limit_trace_config(self.rate_limiter),
+                    get_trace_config(),
+                    get_connection_trace_config(self.connection_stats),
+                ],
+            )
         return self._session
 
     async def close(self):
@@ -19,18 +61,344 @@ class HttpSessionMaker:
             await self._session.close()
 
 
-def get_trace_config() -> aiohttp.TraceConfig:
+def _endpoint(url) -> str:  # type: ignore[no-untyped-def]
+    return f"{url.host}{url.path}"
+
+
+class RequestPriority(Enum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_request_priority: ContextVar[RequestPriority] = ContextVar(
+    "request_priority", default=RequestPriority.INTERACTIVE
+)
+
+
+def get_request_priority() -> RequestPriority:
+    return _request_priority.get()
+
+
+@contextmanager
+def background_requests() -> Iterator[None]:
+    """Marks HTTP requests made inside the block (and by tasks created inside it) as background ones"""
+    token = _request_priority.set(RequestPriority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Request was not sent, because the endpoint limit would not allow it in acceptable time.
+    It's not a connection error: the API may be fine, and retrying would only make the limit worse.
+    """
+
+    def __init__(self, endpoint: str, priority: RequestPriority):
+        super().__init__(f"Rate limit for {endpoint} exceeded ({priority.name})")
+        self.endpoint = endpoint
+        self.priority = priority
+
+
+@dataclass
+class RateLimiterStats:
+    requests: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.total_wait / self.requests
+
+
+class ApiRateLimiter:
+    """Token bucket per endpoint shared by all requests of the process. Background requests may only
+    take tokens while more than 'background_reserve' part of the burst is left, so the reserve is always
+    available to interactive requests. A request that would wait longer than 'max_wait' for its
+    priority is rejected with RateLimitExceeded."""
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: float,
+        background_reserve: float,
+        max_wait: dict[RequestPriority, float],
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 <= background_reserve < 1:
+            raise ValueError(f"Invalid background reserve: {background_reserve}")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait
+        self._timer = timer
+        self._buckets: dict[str, TokenBucket] = {}
+        self._stats: dict[tuple[str, RequestPriority], RateLimiterStats] = {}
+
+    async def acquire(self, endpoint: str, priority: RequestPriority):
+        bucket = self._bucket(endpoint)
+        stats = self._stats.setdefault((endpoint, priority), RateLimiterStats())
+        # Tokens that have to be left in the bucket, so the request is allowed to take one
+        reserve = 0.0
+        if priority == RequestPriority.BACKGROUND:
+            reserve = self.background_reserve * bucket.capacity
+        started_at = self._timer()
+        deadline = started_at + self.max_wait[priority]
+        while bucket.tokens < reserve + 1 or not bucket.try_acquire():
+            wait = bucket.time_until_available(reserve + 1)
+            if self._timer() + wait > deadline:
+                stats.rejected += 1
+                raise RateLimitExceeded(endpoint, priority)
+            await asyncio.sleep(wait)
+        waited = self._timer() - started_at
+        stats.requests += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+
+    def stats(self) -> dict[tuple[str, RequestPriority], RateLimiterStats]:
+        return dict(self._stats)
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            bucket = TokenBucket(
+                rate=self.requests_per_second, capacity=self.burst, timer=self._timer
+            )
+            self._buckets[endpoint] = bucket
+        return bucket
+
+
+def get_rate_limit_trace_config(rate_limiter: ApiRateLimiter) -> aiohttp.TraceConfig:
+    """Every request of the session waits for its endpoint limit before it is sent"""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        endpoint = _endpoint(params.url)
+        await rate_limiter.acquire(endpoint, get_request_priority())
+
+    trace_config.on_request_start.append(on_request_start)
+    return trace_config
+
+
+retries = metrics.registry.counter(
+    "http_client_retries_total", "Requests repeated after a transient failure"
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TransientResponseError(aiohttp.ClientConnectionError):
+    """API kept responding with 429 or 5xx after all attempts. Subclass of ClientConnectionError,
+    so adapters handle it as the API being unavailable."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} responded with status {status}")
+        self.status = status
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 1
+    base_delay: float = 0.5
+    max_delay: float = 5.0
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, so retries of concurrent requests don't come in waves"""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+
+NO_RETRIES = RetryPolicy()
+
+
+async def get_bytes(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: dict,
+    retry_policy: RetryPolicy = NO_RETRIES,
+) -> bytes:
+    """Makes GET request and returns response body. Connection errors and 429 or 5xx responses are
+    retried according to 'retry_policy', GET being idempotent makes it safe."""
+    endpoint = _endpoint(URL(url))
+    attempt = 1
+    while True:
+        try:
+            async with session.get(url, params=params) as response:
+                if response.status not in RETRY_STATUSES:
+                    return await response.read()
+                retry_after = _retry_after(response.headers)
+                out_of_attempts = attempt >= retry_policy.attempts
+                if out_of_attempts or retry_after > retry_policy.max_delay:
+                    raise TransientResponseError(url, response.status)
+                reason = str(response.status)
+                delay = max(retry_policy.delay(attempt), retry_after)
+        except TransientResponseError:
+            raise
+        except aiohttp.ClientConnectionError as e:
+            if attempt >= retry_policy.attempts:
+                raise
+            reason = type(e).__name__
+            delay = retry_policy.delay(attempt)
+        logger.warning(
+            f"Retrying request to {endpoint} in {delay:.2f} s, attempt {attempt}: {reason}"
+        )
+        retries.inc(endpoint=endpoint, reason=reason)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _retry_after(headers) -> float:  # type: ignore[no-untyped-def]
+    try:
+        return float(headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+@dataclass
+class ConnectionStats:
+    """Shows whether requests reuse keep-alive connections or pay for DNS, TCP and TLS every time"""
+
+    new_connections: int = 0
+    reused_connections: int = 0
+    dns_cache_hits: int = 0
+    dns_resolutions: int = 0
+    total_connect_time: float = 0.0
+    total_dns_time: float = 0.0
+
+    @property
+    def avg_connect_time(self) -> float:
+        if self.new_connections == 0:
+            return 0.0
+        return self.total_connect_time / self.new_connections
+
+    @property
+    def avg_dns_time(self) -> float:
+        if self.dns_resolutions == 0:
+            return 0.0
+        return self.total_dns_time / self.dns_resolutions
+
+
+def get_connection_trace_config(
+    stats: ConnectionStats, timer: Callable[[], float] = time.monotonic
+) -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_create_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        context.connection_started_at = timer()
+
+    async def on_connection_create_end(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        stats.new_connections += 1
+        stats.total_connect_time += timer() - context.connection_started_at
+
+    async def on_connection_reuseconn(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        stats.reused_connections += 1
+
+    async def on_dns_resolvehost_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        context.dns_started_at = timer()
+
+    async def on_dns_resolvehost_end(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        stats.dns_resolutions += 1
+        stats.total_dns_time += timer() - context.dns_started_at
+
+    async def on_dns_cache_hit(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        stats.dns_cache_hits += 1
+
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    return trace_config
+
+
+request_duration = metrics.registry.histogram(
+    "http_client_request_duration_seconds",
+    "Time from sending a request to receiving response headers, including DNS and connect",
+)
+dns_duration = metrics.registry.histogram(
+    "http_client_dns_duration_seconds", "Time spent resolving host names"
+)
+connect_duration = metrics.registry.histogram(
+    "http_client_connect_duration_seconds",
+    "Time spent creating new connections, including TLS handshake",
+)
+time_to_first_byte = metrics.registry.histogram(
+    "http_client_time_to_first_byte_seconds",
+    "Time from sending request headers to receiving response headers",
+)
+responses = metrics.registry.counter(
+    "http_client_responses_total", "Responses by status code"
+)
+request_errors = metrics.registry.counter(
+    "http_client_request_errors_total", "Requests failed without a response"
+)
+
+
+def get_trace_config(
+    timer: Callable[[], float] = time.monotonic
+) -> aiohttp.TraceConfig:
+    """Records latency of every request phase by endpoint: DNS, connect, time to first byte and total,
+    so it's visible whether slowness comes from the API, the network or the event loop
+    """
     aiohttp_logger = create_aiohttp_logger()
     trace_config = aiohttp.TraceConfig()
 
     async def on_request_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
-        aiohttp_logger.info(f"Starting request <{params}>")
+        context.endpoint = _endpoint(params.url)
+        context.started_at = timer()
+
+    async def on_dns_resolvehost_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        context.dns_started_at = timer()
+
+    async def on_dns_resolvehost_end(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        dns_duration.observe(
+            timer() - context.dns_started_at, endpoint=context.endpoint
+        )
+
+    async def on_connection_create_start(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        context.connect_started_at = timer()
+
+    async def on_connection_create_end(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        connect_duration.observe(
+            timer() - context.connect_started_at, endpoint=context.endpoint
+        )
+
+    async def on_request_headers_sent(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        context.headers_sent_at = timer()
 
     async def on_request_end(session, context, params) -> None:  # type: ignore[no-untyped-def]
-        aiohttp_logger.info(f"Request ended <{params}>")
+        now = timer()
+        elapsed = now - context.started_at
+        request_duration.observe(elapsed, endpoint=context.endpoint)
+        if hasattr(context, "headers_sent_at"):
+            time_to_first_byte.observe(
+                now - context.headers_sent_at, endpoint=context.endpoint
+            )
+        responses.inc(endpoint=context.endpoint, status=str(params.response.status))
+        aiohttp_logger.info(
+            f"{params.method} {params.url} {params.response.status} in {elapsed:.3f} s"
+        )
+
+    async def on_request_exception(session, context, params) -> None:  # type: ignore[no-untyped-def]
+        endpoint = getattr(context, "endpoint", None) or _endpoint(params.url)
+        request_errors.inc(endpoint=endpoint, error=type(params.exception).__name__)
+        aiohttp_logger.info(
+            f"{params.method} {params.url} failed: {params.exception!r}"
+        )
 
     trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_headers_sent.append(on_request_headers_sent)
     trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
     return trace_config
 
 
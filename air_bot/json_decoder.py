@@ -0,0 +1,30 @@
+"""JSON decoding of API responses with the fastest available backend: orjson or ujson if one of them
+is installed, standard json otherwise"""
+import json
+from typing import Any, Callable
+
+loads: Callable[[bytes], Any]
+try:
+    import orjson  # type: ignore[import-not-found]
+
+    loads = orjson.loads
+    BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson  # type: ignore[import-untyped]
+
+        loads = ujson.loads
+        BACKEND = "ujson"
+    except ImportError:
+        loads = json.loads
+        BACKEND = "json"
+
+# All backends raise a subclass of ValueError on invalid input
+DecodeError = ValueError
+
+
+def response_error(json_response: Any) -> Any | None:
+    """Returns value of 'error' field of Travelpayouts response if the response is an error"""
+    if isinstance(json_response, dict):
+        return json_response.get("error")
+    return None
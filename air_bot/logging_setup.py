@@ -0,0 +1,39 @@
+import inspect
+import logging
+
+from loguru import logger
+
+from air_bot.config import config
+
+
+class InterceptHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        # Get corresponding Loguru level if it exists.
+        level: str | int
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # Find caller from where originated the logged message.
+        frame, depth = inspect.currentframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+
+        logger.opt(depth=depth, exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+
+def setup_logging(log_name: str):
+    log_level = config.log_level.upper()
+    logger.add(
+        f"logs/{log_name}_{{time}}.log",
+        rotation="1 day",
+        retention="7 days",
+        compression="zip",
+        level=log_level,
+        filter=lambda record: record["extra"].get("name") is None,
+    )
+    logging.basicConfig(handlers=[InterceptHandler()], level=log_level, force=True)
@@ -0,0 +1,232 @@
+"""In-process metrics registry rendered in Prometheus text format"""
+import asyncio
+import bisect
+import time
+
+from aiohttp import web
+from loguru import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _make_labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = _make_labels(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_make_labels(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[Labels, float] = {}
+
+    def set(self, value: float, **labels: str):
+        self._values[_make_labels(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_make_labels(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    def __init__(self, n_buckets: int):
+        self.bucket_counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[Labels, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = _make_labels(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = _HistogramSeries(len(self.buckets))
+            self._series[key] = series
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series.bucket_counts[index] += 1
+        series.sum += value
+        series.count += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_make_labels(labels))
+        return series.count if series else 0
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series.bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", _format_value(float(bound))),)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(
+                f"{self.name}_bucket{_format_labels(inf_labels)} {series.count}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series.sum!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(
+        self, metric: Counter | Gauge | Histogram
+    ) -> Counter | Gauge | Histogram:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+registry = MetricsRegistry()
+
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop runs a callback scheduled to run at a fixed time",
+)
+
+
+class EventLoopLagMonitor:
+    """Sleeps for 'interval' seconds in a loop and records how much later than expected it wakes up.
+    Growing lag means the event loop is blocked by CPU-bound code or synchronous I/O."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            event_loop_lag.observe(
+                max(0.0, time.monotonic() - started_at - self.interval)
+            )
+
+
+class MetricsServer:
+    """Serves registry contents at /metrics for Prometheus"""
+
+    def __init__(self, port: int, metrics_registry: MetricsRegistry = registry):
+        self.port = port
+        self.metrics_registry = metrics_registry
+        self._runner: web.AppRunner | None = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, port=self.port).start()
+        logger.info(f"Metrics are served on port {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.metrics_registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
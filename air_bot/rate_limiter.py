@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Classic token bucket: allows bursts of up to 'capacity' operations and 'rate' operations per second
+    on average."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"Invalid token bucket parameters: {rate=}, {capacity=}")
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._tokens = capacity
+        self._updated_at = timer()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def is_full(self) -> bool:
+        return self.tokens >= self.capacity
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1) -> float:
+        """Returns number of seconds until 'tokens' tokens will be available"""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0
+        return (tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.time_until_available(tokens))
+
+    def _refill(self):
+        now = self._timer()
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
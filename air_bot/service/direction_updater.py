@@ -1,5 +1,11 @@
 import asyncio
+import os
+import socket
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from enum import Enum
+from typing import AsyncIterator, Callable
 
 from aiogram.exceptions import TelegramAPIError
 from async_timeout import timeout
@@ -7,17 +13,43 @@ from loguru import logger
 
 from air_bot.adapters.repo.session_maker import SessionMaker
 from air_bot.adapters.repo.uow import AbstractUnitOfWork, SqlAlchemyUnitOfWork
-from air_bot.adapters.tickets_api import AbstractTicketsApi, AviasalesTicketsApi
+from air_bot.adapters.tickets_api import AbstractTicketsApi
 from air_bot.domain.exceptions import (
     TicketsAPIConnectionError,
     TicketsAPIError,
+    TicketsAPIRateLimitedError,
     TicketsParsingError,
 )
 from air_bot.domain.model import FlightDirectionInfo, Ticket
 from air_bot.domain.ports.user_notifier import UserNotifier
-from air_bot.settings import Settings, SettingsStorage, UsersSettings
+from air_bot.http_session import background_requests
+from air_bot.rate_limiter import TokenBucket
+from air_bot.service.update_priority import schedule_next_update, schedule_retry
+from air_bot.settings import Interval, Settings, SettingsStorage, UsersSettings
 
 UPDATE_TIMEOUT_SEC = 10
+CANDIDATES_PAGE_SIZE = 100
+
+
+class DirectionUpdateResult(Enum):
+    CHANGED = 0
+    UNCHANGED = 1
+    FAILED = 2
+
+
+@dataclass
+class UpdateCycleStats:
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+    def add(self, result: DirectionUpdateResult):
+        if result == DirectionUpdateResult.CHANGED:
+            self.changed += 1
+        elif result == DirectionUpdateResult.UNCHANGED:
+            self.unchanged += 1
+        else:
+            self.failed += 1
 
 
 class DirectionUpdater:
@@ -25,23 +57,28 @@ class DirectionUpdater:
         self,
         settings_storage: SettingsStorage,
         session_maker: SessionMaker,
-        http_session_maker,
+        tickets_api: AbstractTicketsApi,
     ):
         self.settings_storage = settings_storage
         self.user_notifier: UserNotifier | None = None
         self.session_maker = session_maker
-        self.http_session_maker = http_session_maker
+        self.tickets_api = tickets_api
+        self._api_budget: TokenBucket | None = None
 
     def set_user_notifier(self, bot: UserNotifier):
         self.user_notifier = bot
 
     async def update(self):
         try:
-            uow = SqlAlchemyUnitOfWork(self.session_maker)
-            aviasales_api = AviasalesTicketsApi(self.http_session_maker)
-            await update(
-                uow, aviasales_api, self.user_notifier, self.settings_storage.settings
-            )
+            settings = self.settings_storage.settings
+            with background_requests():
+                await update(
+                    self._make_uow,
+                    self.tickets_api,
+                    self.user_notifier,
+                    settings,
+                    api_budget=self._get_api_budget(settings),
+                )
         except Exception as e:
             logger.error(e)
 
@@ -55,36 +92,159 @@ class DirectionUpdater:
         logger.info(f"Number of removed outdated directions: {n_directions}")
         return n_directions
 
+    def _make_uow(self) -> AbstractUnitOfWork:
+        return SqlAlchemyUnitOfWork(self.session_maker)
+
+    def _get_api_budget(self, settings: Settings) -> TokenBucket | None:
+        """Budget allows to spend requests saved up during one update interval at once"""
+        requests_per_hour = settings.direction_updater.api_requests_per_hour
+        if requests_per_hour == 0:
+            self._api_budget = None
+            return None
+        rate = requests_per_hour / 3600
+        interval = settings.scheduler.directions_update_interval
+        if settings.scheduler.directions_update_interval_units == Interval.MINUTES:
+            interval *= 60
+        capacity = max(1.0, rate * interval)
+        budget = self._api_budget
+        if budget is None or (budget.rate, budget.capacity) != (rate, capacity):
+            self._api_budget = TokenBucket(rate, capacity)
+        return self._api_budget
+
 
 async def update(
-    uow: AbstractUnitOfWork,
+    uow_factory: Callable[[], AbstractUnitOfWork],
     aviasales_api: AbstractTicketsApi,
     user_notifier: UserNotifier | None,
     settings: Settings,
-):
+    owner: str | None = None,
+    api_budget: TokenBucket | None = None,
+) -> UpdateCycleStats:
+    """Updates directions due for update, most overdue first. Directions are processed concurrently by
+    settings.direction_updater.n_workers workers, each of them working with its own unit of work.
+    Directions are claimed by 'owner' (this process by default), so several updaters can run at once.
+    Every update takes a token from 'api_budget' if it is passed. The cycle is aborted as soon as
+    the tickets API becomes unavailable.
+    """
     logger.info("Checking if some directions need update")
-    update_threshold = datetime.now() - timedelta(
-        minutes=settings.direction_updater.needs_update_after
-    )
-    async with uow:
-        directions = (
-            await uow.flight_directions.get_directions_with_last_update_try_before(
-                update_threshold,
-                settings.direction_updater.max_directions_for_single_update,
+    max_directions = settings.direction_updater.max_directions_for_single_update
+    if api_budget is not None:
+        max_directions = min(max_directions, int(api_budget.tokens))
+        if max_directions == 0:
+            logger.warning("API budget for direction updates is exhausted")
+    stats = UpdateCycleStats()
+    n_workers = settings.direction_updater.n_workers
+    queue: asyncio.Queue[FlightDirectionInfo] = asyncio.Queue(maxsize=2 * n_workers)
+    workers = [
+        asyncio.create_task(
+            _update_worker(
+                queue, uow_factory(), aviasales_api, user_notifier, settings, stats
             )
         )
-        await uow.commit()
-    logger.info(f"{len(directions)} direction(s) need update")
-    for direction in directions:
+        for _ in range(n_workers)
+    ]
+    try:
+        if not aviasales_api.is_available():
+            logger.warning("Tickets API is unavailable, directions are not updated")
+            return stats
+        async for direction in iter_update_candidates(
+            uow_factory,
+            datetime.now(),
+            max_directions,
+            owner or lease_owner(),
+            timedelta(seconds=settings.direction_updater.lease_duration),
+        ):
+            if not aviasales_api.is_available():
+                # Wait for queued updates: a probe request may make the API available again
+                await queue.join()
+                if not aviasales_api.is_available():
+                    # Claimed directions which were not queued are updated after their leases expire
+                    logger.warning(
+                        "Tickets API became unavailable, update cycle is aborted"
+                    )
+                    break
+            if api_budget is not None:
+                api_budget.try_acquire()
+            await queue.put(direction)
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if user_notifier is not None:
+            await user_notifier.flush()
+    logger.info(
+        f"Update cycle finished: {stats.changed} direction(s) changed, "
+        f"{stats.unchanged} unchanged, {stats.failed} failed"
+    )
+    return stats
+
+
+async def iter_update_candidates(
+    uow_factory: Callable[[], AbstractUnitOfWork],
+    due_before: datetime,
+    max_directions: int,
+    owner: str,
+    lease_duration: timedelta,
+) -> AsyncIterator[FlightDirectionInfo]:
+    """Streams directions which should be updated before 'due_before', most overdue first. Directions
+    are claimed by 'owner' for 'lease_duration' by pages of CANDIDATES_PAGE_SIZE using keyset
+    pagination, each page in its own unit of work."""
+    after = None
+    n_directions = 0
+    while n_directions < max_directions:
+        page_size = min(CANDIDATES_PAGE_SIZE, max_directions - n_directions)
+        uow = uow_factory()
+        async with uow:
+            page = await uow.flight_directions.claim_directions_for_update(
+                due_before,
+                page_size,
+                owner,
+                datetime.now() + lease_duration,
+                after,
+            )
+            await uow.commit()
+        if not page:
+            return
+        # Take the key before directions are handed to workers, which update next_update_at
+        assert page[-1].next_update_at is not None and page[-1].id is not None
+        after = (page[-1].next_update_at, page[-1].id)
+        n_directions += len(page)
+        for direction in page:
+            yield direction
+        if len(page) < page_size:
+            return
+
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _update_worker(
+    queue: asyncio.Queue[FlightDirectionInfo],
+    uow: AbstractUnitOfWork,
+    aviasales_api: AbstractTicketsApi,
+    user_notifier: UserNotifier | None,
+    settings: Settings,
+    stats: UpdateCycleStats,
+):
+    while True:
+        direction = await queue.get()
+        result = DirectionUpdateResult.FAILED
         try:
             async with timeout(UPDATE_TIMEOUT_SEC):
-                await _update_direction(
+                result = await _update_direction(
                     uow, aviasales_api, user_notifier, settings, direction
                 )
         except asyncio.TimeoutError:
             logger.warning(
                 f"Update for direction {direction.id} took longer than {UPDATE_TIMEOUT_SEC} seconds"
             )
+        except Exception as e:
+            logger.exception(f"Failed to update direction {direction.id}: {e}")
+        finally:
+            stats.add(result)
+            queue.task_done()
 
 
 async def _update_direction(
@@ -93,7 +253,7 @@ async def _update_direction(
     user_notifier: UserNotifier | None,
     settings: Settings,
     direction_info: FlightDirectionInfo,
-):
+) -> DirectionUpdateResult:
     logger.info(f"Updating info about direction {direction_info.id}")
     assert direction_info.id is not None
     update_timestamp = datetime.now()
@@ -103,15 +263,23 @@ async def _update_direction(
         logger.warning(
             f"Failed to update info about direction {direction_info.id} due to connection errors"
         )
-        return
+        return DirectionUpdateResult.FAILED
+    except TicketsAPIRateLimitedError:
+        logger.warning(
+            f"Failed to update info about direction {direction_info.id}: API rate limit exceeded"
+        )
+        return DirectionUpdateResult.FAILED
     except (TicketsAPIError, TicketsParsingError) as e:
         logger.error(f"Failed to update info about direction {direction_info.id}: {e}")
+        schedule = schedule_retry(
+            direction_info, update_timestamp, settings.direction_updater
+        )
         async with uow:
             await uow.flight_directions.update_last_update_try(
-                direction_info.id, update_timestamp
+                direction_info.id, update_timestamp, schedule
             )
             await uow.commit()
-        return
+        return DirectionUpdateResult.FAILED
 
     if tickets:
         logger.info(f"Received tickets for direction {direction_info.id}")
@@ -121,21 +289,56 @@ async def _update_direction(
         logger.info(f"Received no tickets for direction {direction_info.id}")
     last_price = direction_info.price
     direction_info.price = cheapest_price
+    if cheapest_price != last_price:
+        aviasales_api.invalidate_cache(direction_info.direction)
 
     async with uow:
+        n_subscribers = len(await uow.users_directions.get_users(direction_info.id))
+        schedule = schedule_next_update(
+            direction_info,
+            cheapest_price != last_price,
+            n_subscribers,
+            update_timestamp,
+            settings.direction_updater,
+        )
+        stored_tickets = await uow.tickets.get_direction_tickets(direction_info.id)
+        if cheapest_price == last_price and _same_tickets(stored_tickets, tickets):
+            # Nothing to rewrite, just remember that direction was checked
+            await uow.flight_directions.update_last_update_try(
+                direction_info.id, update_timestamp, schedule
+            )
+            await uow.commit()
+            logger.info(f"Tickets for direction {direction_info.id} did not change")
+            return DirectionUpdateResult.UNCHANGED
         await uow.tickets.remove_for_direction(direction_info.id)
         await uow.tickets.add(tickets, direction_info.id)
         await uow.flight_directions.update_price(
-            direction_info.id, cheapest_price, update_timestamp
+            direction_info.id,
+            cheapest_price,
+            update_timestamp,
+            schedule,
         )
         await uow.commit()
 
     if user_notifier is None:
         logger.warning("Can't notify users after update - bot was not set yet")
-        return
+        return DirectionUpdateResult.CHANGED
     await _notify_users(
         uow, user_notifier, settings.users, direction_info, last_price, tickets
     )
+    return DirectionUpdateResult.CHANGED
+
+
+def _same_tickets(stored_tickets: list[Ticket], tickets: list[Ticket]) -> bool:
+    def ticket_key(ticket: Ticket):
+        return (
+            ticket.link,
+            ticket.departure_at,
+            ticket.return_at,
+            round(ticket.price, 2),
+        )
+
+    return Counter(map(ticket_key, stored_tickets)) == Counter(map(ticket_key, tickets))
 
 
 async def _notify_users(
@@ -158,7 +361,6 @@ async def _notify_users(
         user_ids=user_ids,
     )
     for user_id in user_ids:
-        # TODO make this parallel!
         logger.info(
             "Sending price update notification to user",
             user_id=user_id,
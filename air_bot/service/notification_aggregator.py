@@ -0,0 +1,86 @@
+"""Collects price updates during an update cycle to send one message per user instead of one per direction"""
+import asyncio
+
+from loguru import logger
+
+from air_bot.domain.model import FlightDirection, PriceUpdate, Ticket
+from air_bot.domain.ports.user_notifier import UserNotifier
+from air_bot.metrics import registry
+
+aggregated_updates = registry.counter(
+    "notification_aggregator_updates_total",
+    "Price updates collected by the notification aggregator",
+)
+sent_notifications = registry.counter(
+    "notification_aggregator_notifications_total",
+    "Notifications passed on by the notification aggregator by kind: single update or digest",
+)
+
+
+class NotificationAggregator(UserNotifier):
+    """Collects price updates for every user and passes them to 'user_notifier' as a single notification.
+    Collected updates are sent on flush() at the end of an update cycle. With 'window' > 0 they are sent
+    every 'window' seconds instead, regardless of update cycles, which also merges notifications
+    from several direction updater workers."""
+
+    def __init__(self, user_notifier: UserNotifier, window: float = 0):
+        self.user_notifier = user_notifier
+        self.window = window
+        # Only the latest update of a direction is kept
+        self._updates: dict[int, dict[int, PriceUpdate]] = {}
+        self._task: asyncio.Task | None = None
+
+    async def notify_user(
+        self,
+        user_id: int,
+        tickets: list[Ticket],
+        direction: FlightDirection,
+        direction_id: int,
+    ):
+        aggregated_updates.inc()
+        self._updates.setdefault(user_id, {})[direction_id] = PriceUpdate(
+            direction_id=direction_id, direction=direction, tickets=tickets
+        )
+
+    async def flush(self):
+        if self.window == 0:
+            await self.send_collected()
+
+    @property
+    def n_pending_users(self) -> int:
+        return len(self._updates)
+
+    async def send_collected(self):
+        updates, self._updates = self._updates, {}
+        for user_id, user_updates in updates.items():
+            try:
+                if len(user_updates) == 1:
+                    update = next(iter(user_updates.values()))
+                    await self.user_notifier.notify_user(
+                        user_id, update.tickets, update.direction, update.direction_id
+                    )
+                    sent_notifications.inc(kind="single")
+                else:
+                    await self.user_notifier.notify_user_about_updates(
+                        user_id, list(user_updates.values())
+                    )
+                    sent_notifications.inc(kind="digest")
+            except Exception as e:
+                logger.exception(f"Failed to notify user {user_id}: {e}")
+        await self.user_notifier.flush()
+
+    def start(self):
+        if self.window > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.send_collected()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            await self.send_collected()
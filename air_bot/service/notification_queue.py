@@ -0,0 +1,120 @@
+"""Notifications handed from the direction updater worker to the bot process through the database"""
+import asyncio
+import datetime
+
+from loguru import logger
+
+from air_bot.adapters.repo.session_maker import SessionMaker
+from air_bot.adapters.repo.uow import AbstractUnitOfWork, SqlAlchemyUnitOfWork
+from air_bot.adapters.tickets_api import AbstractTicketsApi
+from air_bot.domain.model import FlightDirection, PendingNotification, Ticket
+from air_bot.domain.ports.user_notifier import UserNotifier
+
+
+class DbUserNotifier(UserNotifier):
+    """Stores notifications in the database, the bot process sends them"""
+
+    def __init__(self, session_maker: SessionMaker):
+        self.session_maker = session_maker
+
+    async def notify_user(
+        self,
+        user_id: int,
+        tickets: list[Ticket],
+        direction: FlightDirection,
+        direction_id: int,
+    ):
+        uow = SqlAlchemyUnitOfWork(self.session_maker)
+        async with uow:
+            await uow.pending_notifications.add(
+                PendingNotification(
+                    user_id=user_id,
+                    direction_id=direction_id,
+                    tickets=tickets,
+                    created_at=datetime.datetime.now(),
+                )
+            )
+            await uow.commit()
+
+
+class NotificationQueueConsumer:
+    """Polls notifications stored by DbUserNotifier and passes them to 'user_notifier'.
+    Cached prices of notified directions are dropped from 'tickets_api' of the bot process.
+    """
+
+    def __init__(
+        self,
+        session_maker: SessionMaker,
+        user_notifier: UserNotifier,
+        poll_interval: float,
+        batch_size: int,
+        tickets_api: AbstractTicketsApi | None = None,
+    ):
+        self.session_maker = session_maker
+        self.user_notifier = user_notifier
+        self.tickets_api = tickets_api
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _consume(self):
+        while True:
+            n_notifications = 0
+            try:
+                n_notifications = await consume_notifications(
+                    SqlAlchemyUnitOfWork(self.session_maker),
+                    self.user_notifier,
+                    self.batch_size,
+                    self.tickets_api,
+                )
+            except Exception as e:
+                logger.exception(f"Failed to consume notifications: {e}")
+            if n_notifications < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+async def consume_notifications(
+    uow: AbstractUnitOfWork,
+    user_notifier: UserNotifier,
+    batch_size: int,
+    tickets_api: AbstractTicketsApi | None = None,
+) -> int:
+    """Takes up to 'batch_size' pending notifications and passes them to 'user_notifier', a batch is
+    flushed as an update cycle.
+    Notifications are removed before they are passed, so each of them is sent at most once.
+    Returns number of taken notifications."""
+    async with uow:
+        notifications = await uow.pending_notifications.take(batch_size)
+        direction_ids = list({n.direction_id for n in notifications})
+        directions_info = await uow.flight_directions.get_directions_info(direction_ids)
+        await uow.commit()
+    directions = {d.id: d.direction for d in directions_info}
+    if tickets_api is not None:
+        # Price of a notified direction has changed in the worker, calendar must not show the old one
+        for direction in directions.values():
+            tickets_api.invalidate_cache(direction)
+    for notification in notifications:
+        direction = directions.get(notification.direction_id)
+        if direction is None:
+            # Direction was deleted after notification was stored
+            continue
+        await user_notifier.notify_user(
+            notification.user_id,
+            notification.tickets,
+            direction,
+            notification.direction_id,
+        )
+    if notifications:
+        await user_notifier.flush()
+        logger.info(f"{len(notifications)} notification(s) taken from the queue")
+    return len(notifications)
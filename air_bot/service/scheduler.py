@@ -16,8 +16,9 @@ class ServiceScheduler:
         scheduler: AsyncScheduler,
         setting_storage: SettingsStorage,
         settings_changed: asyncio.Event,
-        direction_updater: DirectionUpdater,
+        direction_updater: DirectionUpdater | None,
     ):
+        """If 'direction_updater' is None only settings reload is scheduled"""
         logging.basicConfig()
         logging.getLogger("apscheduler").setLevel(logging.WARN)
         self.scheduler = scheduler
@@ -29,10 +30,12 @@ class ServiceScheduler:
 
     async def start(self):
         await self.scheduler.start_in_background()
-        await self._schedule_direction_updater()
         await self.scheduler.add_schedule(
             self.setting_storage.reload, IntervalTrigger(seconds=5)
         )
+        if self.direction_updater is None:
+            return
+        await self._schedule_direction_updater()
         await self.scheduler.add_schedule(
             self.direction_updater.remove_outdated, CronTrigger(hour=0, minute=1)
         )
@@ -58,6 +61,7 @@ class ServiceScheduler:
         self.update_cycle_task = asyncio.create_task(self.update_cycle(interval))
 
     async def update_cycle(self, interval: int):
+        assert self.direction_updater is not None
         while True:
             try:
                 await self.direction_updater.update()
@@ -71,3 +75,17 @@ class ServiceScheduler:
             await self.settings_changed.wait()
             await self._schedule_direction_updater()
             self.settings_changed.clear()
+
+
+async def run_scheduler(
+    setting_storage: SettingsStorage,
+    settings_changed: asyncio.Event,
+    direction_updater: DirectionUpdater | None,
+):
+    async with AsyncScheduler() as scheduler:
+        service_scheduler = ServiceScheduler(
+            scheduler, setting_storage, settings_changed, direction_updater
+        )
+        await service_scheduler.start()
+        while True:
+            await asyncio.sleep(1)
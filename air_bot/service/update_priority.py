@@ -0,0 +1,87 @@
+"""Decides how often a direction is updated"""
+import datetime
+import math
+
+from air_bot.domain.model import FlightDirectionInfo, UpdateSchedule
+from air_bot.settings import DirectionUpdaterSettings
+
+# Weight of the latest update in price volatility moving average
+VOLATILITY_SMOOTHING = 0.3
+# Interval grows by this factor after every update which didn't change cheapest price
+STABLE_BACKOFF_FACTOR = 1.5
+MAX_BACKOFF_STEPS = 20
+
+
+def direction_priority(
+    n_subscribers: int, days_to_departure: int, price_volatility: float
+) -> float:
+    """Higher priority means more frequent updates. A direction with a single subscriber, departure
+    in the far future and stable price has priority of about 1."""
+    subscribers_factor = max(1.0, math.log2(1 + n_subscribers))
+    proximity_factor = 1 + 2 / (1 + max(0, days_to_departure) / 14)
+    volatility_factor = 1 + price_volatility
+    return subscribers_factor * proximity_factor * volatility_factor
+
+
+def update_interval(
+    base_interval: datetime.timedelta,
+    priority: float,
+    unchanged_price_updates: int,
+    min_interval: datetime.timedelta,
+    max_interval: datetime.timedelta,
+) -> datetime.timedelta:
+    """Interval shrinks with priority and backs off while cheapest price doesn't change"""
+    backoff = STABLE_BACKOFF_FACTOR ** min(unchanged_price_updates, MAX_BACKOFF_STEPS)
+    interval = base_interval / priority * backoff
+    return min(max(interval, min_interval), max_interval)
+
+
+def updated_volatility(price_volatility: float, price_changed: bool) -> float:
+    return (
+        1 - VOLATILITY_SMOOTHING
+    ) * price_volatility + VOLATILITY_SMOOTHING * price_changed
+
+
+def schedule_next_update(
+    direction_info: FlightDirectionInfo,
+    price_changed: bool,
+    n_subscribers: int,
+    now: datetime.datetime,
+    settings: DirectionUpdaterSettings,
+) -> UpdateSchedule:
+    price_volatility = updated_volatility(
+        direction_info.price_volatility, price_changed
+    )
+    if price_changed:
+        unchanged_price_updates = 0
+    else:
+        unchanged_price_updates = direction_info.unchanged_price_updates + 1
+    days_to_departure = (
+        direction_info.direction.departure_date().date() - now.date()
+    ).days
+    priority = direction_priority(n_subscribers, days_to_departure, price_volatility)
+    interval = update_interval(
+        datetime.timedelta(minutes=settings.needs_update_after),
+        priority,
+        unchanged_price_updates,
+        datetime.timedelta(minutes=settings.min_update_interval),
+        datetime.timedelta(minutes=settings.max_update_interval),
+    )
+    return UpdateSchedule(
+        next_update_at=now + interval,
+        price_volatility=price_volatility,
+        unchanged_price_updates=unchanged_price_updates,
+    )
+
+
+def schedule_retry(
+    direction_info: FlightDirectionInfo,
+    now: datetime.datetime,
+    settings: DirectionUpdaterSettings,
+) -> UpdateSchedule:
+    """Schedule after a failed update, statistics are kept as is"""
+    return UpdateSchedule(
+        next_update_at=now + datetime.timedelta(minutes=settings.needs_update_after),
+        price_volatility=direction_info.price_volatility,
+        unchanged_price_updates=direction_info.unchanged_price_updates,
+    )
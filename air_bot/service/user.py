@@ -10,7 +10,7 @@ from air_bot.domain.exceptions import (
     StartAndEndOfDirectionAreTheSameError,
 )
 from air_bot.domain.model import FlightDirection, FlightDirectionInfo, Ticket
-from air_bot.settings import SettingsStorage
+from air_bot.settings import DirectionUpdaterSettings, SettingsStorage
 
 N_CHEAPEST_TICKETS_FOR_NEW_DIRECTION = 3
 
@@ -32,10 +32,13 @@ async def track(
     direction: FlightDirection,
     tickets_api: AbstractTicketsApi,
     uow: AbstractUnitOfWork,
+    update_settings: DirectionUpdaterSettings,
 ) -> Tuple[list[Ticket], int]:
     """Adds new direction to directions tracked by user with user_id. Returns list of cheapest tickets for this
     direction and direction id (existing or new one if it is the first user tracking this direction).
-    If DB already contains tickets for this direction - returns tickets from DB."""
+    If DB already contains tickets for this direction - returns tickets from DB.
+    New direction is updated after update_settings.needs_update_after minutes, its tickets are fresh.
+    """
     if direction.start_code == direction.end_code:
         raise StartAndEndOfDirectionAreTheSameError(user_id, direction)
     tickets = []
@@ -66,9 +69,13 @@ async def track(
 
     if direction_id is None:
         cheapest_price = tickets[0].price if tickets else None
+        now = datetime.datetime.now()
+        next_update_at = now + datetime.timedelta(
+            minutes=update_settings.needs_update_after
+        )
         async with uow:
             direction_id = await uow.flight_directions.add_direction_info(
-                direction, cheapest_price, datetime.datetime.now()
+                direction, cheapest_price, now, next_update_at
             )
             await uow.users_directions.add(user_id, direction_id)
             await uow.tickets.add(tickets, direction_id)
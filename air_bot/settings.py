@@ -22,6 +22,14 @@ class SchedulerSetting:
 class DirectionUpdaterSettings:
     needs_update_after: int
     max_directions_for_single_update: int
+    n_workers: int = 1
+    # For how many seconds claimed directions can't be claimed by other updaters
+    lease_duration: int = 300
+    # Max number of direction updates per hour, 0 means no limit
+    api_requests_per_hour: int = 0
+    # Bounds of per-direction update interval in minutes, see service/update_priority.py
+    min_update_interval: int = 10
+    max_update_interval: int = 720
 
 
 @dataclass(frozen=True)
@@ -98,11 +106,33 @@ def _parse_scheduler_settings(config) -> SchedulerSetting:
 
 
 def _parse_direction_updater_settings(config):
+    n_workers = int(config.get("n_workers", 1))
+    if n_workers < 1:
+        raise RuntimeError(f"n_workers must be positive, got {n_workers}")
+    lease_duration = int(config.get("lease_duration", 300))
+    if lease_duration < 1:
+        raise RuntimeError(f"lease_duration must be positive, got {lease_duration}")
+    api_requests_per_hour = int(config.get("api_requests_per_hour", 0))
+    if api_requests_per_hour < 0:
+        raise RuntimeError(
+            f"api_requests_per_hour must not be negative, got {api_requests_per_hour}"
+        )
+    min_update_interval = int(config.get("min_update_interval", 10))
+    max_update_interval = int(config.get("max_update_interval", 720))
+    if not 1 <= min_update_interval <= max_update_interval:
+        raise RuntimeError(
+            f"Invalid update interval bounds: {min_update_interval=}, {max_update_interval=}"
+        )
     return DirectionUpdaterSettings(
         needs_update_after=int(config["needs_update_after"]),
         max_directions_for_single_update=int(
             config["max_directions_for_single_update"]
         ),
+        n_workers=n_workers,
+        lease_duration=lease_duration,
+        api_requests_per_hour=api_requests_per_hour,
+        min_update_interval=min_update_interval,
+        max_update_interval=max_update_interval,
     )
 
 
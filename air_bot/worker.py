@@ -0,0 +1,79 @@
+"""Runs only the direction updater, without the Telegram bot: python -m air_bot.worker
+Notifications are stored in the database and sent by the bot process,
+which should be started with AIR_BOT_RUN_DIRECTION_UPDATER=false."""
+import asyncio
+
+from loguru import logger
+
+from air_bot.adapters.repo.session_maker import SessionMaker
+from air_bot.adapters.tickets_api import (
+    AviasalesTicketsApi,
+    CircuitBreakerTicketsApi,
+    SingleFlightTicketsApi,
+)
+from air_bot.config import config
+from air_bot.graceful_shutdown.service import ServiceWithGracefulShutdown
+from air_bot.http_session import HttpSessionMaker
+from air_bot.logging_setup import setup_logging
+from air_bot.metrics import EventLoopLagMonitor, MetricsServer
+from air_bot.service.direction_updater import DirectionUpdater
+from air_bot.service.notification_queue import DbUserNotifier
+from air_bot.service.scheduler import run_scheduler
+from air_bot.settings import SettingsStorage
+
+
+class Worker(ServiceWithGracefulShutdown):
+    def __init__(self):
+        super().__init__()
+        logger.info(f"Starting worker with config: {config}")
+        self.session_maker = SessionMaker()
+        self.http_session_maker = HttpSessionMaker()
+        self.event_loop_lag_monitor = EventLoopLagMonitor()
+        self.metrics_server = (
+            MetricsServer(config.metrics_port) if config.metrics_port else None
+        )
+        self.tickets_api = SingleFlightTicketsApi(
+            CircuitBreakerTicketsApi(
+                AviasalesTicketsApi(self.http_session_maker),
+                failure_threshold=config.tickets_api_failure_threshold,
+                reset_timeout=config.tickets_api_reset_timeout,
+            )
+        )
+        self.settings_changed_event = asyncio.Event()
+        self.settings_storage = SettingsStorage(
+            config.settings_file_path, self.settings_changed_event
+        )
+        self.direction_updater = DirectionUpdater(
+            self.settings_storage, self.session_maker, self.tickets_api
+        )
+        self.direction_updater.set_user_notifier(DbUserNotifier(self.session_maker))
+
+    async def start(self):
+        await self.session_maker.start()
+        self.event_loop_lag_monitor.start()
+        if self.metrics_server:
+            await self.metrics_server.start()
+        asyncio.create_task(
+            run_scheduler(
+                self.settings_storage,
+                self.settings_changed_event,
+                self.direction_updater,
+            )
+        )
+
+    async def stop(self):
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.event_loop_lag_monitor.stop()
+        await self.http_session_maker.close()
+        await self.session_maker.stop()
+
+
+def main():
+    setup_logging("air_bot_worker")
+    worker = Worker()
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Add (last_update_try, id) index
+
+Revision ID: 2ed37be0934d
+Revises: 53241360c46c
+Create Date: 2026-10-18 10:48:05.217436
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2ed37be0934d"
+down_revision = "53241360c46c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "flight_directions_last_update_try_idx",
+        "flight_directions",
+        ["last_update_try", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("flight_directions_last_update_try_idx", "flight_directions")
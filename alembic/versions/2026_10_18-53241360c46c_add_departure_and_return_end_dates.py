@@ -0,0 +1,57 @@
+"""Add departure_end_date and return_end_date columns
+
+Revision ID: 53241360c46c
+Revises: be7ee81e006c
+Create Date: 2026-10-18 10:21:43.512064
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "53241360c46c"
+down_revision = "be7ee81e006c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "flight_directions", sa.Column("departure_end_date", sa.Date(), nullable=True)
+    )
+    op.add_column(
+        "flight_directions", sa.Column("return_end_date", sa.Date(), nullable=True)
+    )
+    conn = op.get_bind()
+    conn.execute(
+        sa.text(
+            "UPDATE flight_directions SET departure_end_date = IF(LENGTH(departure_at) = 7, "
+            "LAST_DAY(STR_TO_DATE(CONCAT(departure_at, '-01'), '%Y-%m-%d')), "
+            "STR_TO_DATE(departure_at, '%Y-%m-%d'))"
+        )
+    )
+    conn.execute(
+        sa.text(
+            "UPDATE flight_directions SET return_end_date = IF(LENGTH(return_at) = 7, "
+            "LAST_DAY(STR_TO_DATE(CONCAT(return_at, '-01'), '%Y-%m-%d')), "
+            "STR_TO_DATE(return_at, '%Y-%m-%d')) WHERE return_at IS NOT NULL"
+        )
+    )
+    op.alter_column(
+        "flight_directions",
+        "departure_end_date",
+        existing_type=sa.Date(),
+        nullable=False,
+    )
+    op.create_index(
+        "flight_directions_departure_end_date_idx",
+        "flight_directions",
+        ["departure_end_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("flight_directions_departure_end_date_idx", "flight_directions")
+    op.drop_column("flight_directions", "return_end_date")
+    op.drop_column("flight_directions", "departure_end_date")
@@ -0,0 +1,38 @@
+"""Add pending_notifications table
+
+Revision ID: 9817fc5beab8
+Revises: cc3195917eef
+Create Date: 2026-10-18 11:41:19.630275
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9817fc5beab8"
+down_revision = "cc3195917eef"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pending_notifications",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("direction_id", sa.Integer(), nullable=False),
+        sa.Column("tickets", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["direction_id"],
+            ["flight_directions.id"],
+            name="pending_notifications_fk__flight_direction",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pending_notifications")
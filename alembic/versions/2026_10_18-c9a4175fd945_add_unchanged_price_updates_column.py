@@ -0,0 +1,29 @@
+"""Add unchanged_price_updates column
+
+Revision ID: c9a4175fd945
+Revises: cab430c22ae2
+Create Date: 2026-10-18 12:58:33.407912
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c9a4175fd945"
+down_revision = "cab430c22ae2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "flight_directions",
+        sa.Column(
+            "unchanged_price_updates", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("flight_directions", "unchanged_price_updates")
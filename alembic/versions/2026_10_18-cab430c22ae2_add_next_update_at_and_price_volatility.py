@@ -0,0 +1,65 @@
+"""Add next_update_at and price_volatility columns
+
+Revision ID: cab430c22ae2
+Revises: 9817fc5beab8
+Create Date: 2026-10-18 12:20:51.118302
+
+"""
+import sqlalchemy as sa
+
+from air_bot.config import config
+from air_bot.settings import read_config
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "cab430c22ae2"
+down_revision = "9817fc5beab8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "flight_directions", sa.Column("next_update_at", sa.DateTime(), nullable=True)
+    )
+    op.add_column(
+        "flight_directions",
+        sa.Column("price_volatility", sa.Float(), nullable=False, server_default="0"),
+    )
+    conn = op.get_bind()
+    # Existing directions become due when they would have been updated before,
+    # not all at once right after the deploy
+    needs_update_after = read_config(
+        config.settings_file_path
+    ).direction_updater.needs_update_after
+    conn.execute(
+        sa.text(
+            "UPDATE flight_directions SET next_update_at="
+            "DATE_ADD(last_update_try, INTERVAL :needs_update_after MINUTE)"
+        ),
+        {"needs_update_after": needs_update_after},
+    )
+    op.alter_column(
+        "flight_directions",
+        "next_update_at",
+        existing_type=sa.DateTime(),
+        nullable=False,
+    )
+    op.create_index(
+        "flight_directions_next_update_at_idx",
+        "flight_directions",
+        ["next_update_at", "id"],
+    )
+    # Update candidates are selected by next_update_at, the index only slowed down writes
+    op.drop_index("flight_directions_last_update_try_idx", "flight_directions")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "flight_directions_last_update_try_idx",
+        "flight_directions",
+        ["last_update_try", "id"],
+    )
+    op.drop_index("flight_directions_next_update_at_idx", "flight_directions")
+    op.drop_column("flight_directions", "price_volatility")
+    op.drop_column("flight_directions", "next_update_at")
@@ -0,0 +1,30 @@
+"""Add lease_owner and lease_expires_at columns
+
+Revision ID: cc3195917eef
+Revises: 2ed37be0934d
+Create Date: 2026-10-18 11:12:37.904518
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "cc3195917eef"
+down_revision = "2ed37be0934d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "flight_directions", sa.Column("lease_owner", sa.String(64), nullable=True)
+    )
+    op.add_column(
+        "flight_directions", sa.Column("lease_expires_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("flight_directions", "lease_expires_at")
+    op.drop_column("flight_directions", "lease_owner")
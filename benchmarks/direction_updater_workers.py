@@ -0,0 +1,98 @@
+"""Measures duration of a single direction updater cycle depending on the number of workers.
+
+Run from the project root: python -m benchmarks.direction_updater_workers
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from air_bot.adapters.tickets_api import AbstractTicketsApi
+from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.service.direction_updater import update
+from air_bot.settings import (
+    DirectionUpdaterSettings,
+    Interval,
+    SchedulerSetting,
+    Settings,
+    UsersSettings,
+)
+from tests.unit.fakes import FakeUnitOfWork
+
+N_DIRECTIONS = 200
+WORKERS = [1, 2, 4, 8, 16, 32]
+MIN_LATENCY_SEC = 0.05
+MAX_LATENCY_SEC = 0.3
+
+
+class SlowTicketsApi(AbstractTicketsApi):
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    async def get_tickets(self, direction: FlightDirection, limit: int) -> list[Ticket]:
+        await asyncio.sleep(self.random.uniform(MIN_LATENCY_SEC, MAX_LATENCY_SEC))
+        return [
+            Ticket(
+                price=self.random.randint(1000, 10000),
+                departure_at=datetime.now(),
+                duration_to=timedelta(hours=2),
+                link="link",
+            )
+        ]
+
+    async def get_cheapest_tickets_for_month(
+        self, direction: FlightDirection, departure_year: int, departure_month: int
+    ) -> dict[str, Ticket]:
+        raise NotImplementedError
+
+
+async def make_uow() -> FakeUnitOfWork:
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(days=1)
+    for i in range(N_DIRECTIONS):
+        direction = FlightDirection(
+            start_code="MOW",
+            start_name="Moscow",
+            end_code=f"{i:03d}",
+            end_name=f"Destination {i}",
+            with_transfer=False,
+            departure_at="2030-01",
+        )
+        await uow.flight_directions.add_direction_info(direction, 10000, last_update)
+    return uow
+
+
+def make_settings(n_workers: int) -> Settings:
+    return Settings(
+        scheduler=SchedulerSetting(1, Interval.MINUTES),
+        direction_updater=DirectionUpdaterSettings(
+            needs_update_after=60,
+            max_directions_for_single_update=N_DIRECTIONS,
+            n_workers=n_workers,
+        ),
+        users=UsersSettings(
+            max_directions_per_user=10, price_reduction_threshold_percents=10
+        ),
+    )
+
+
+async def main():
+    logger.remove()
+    print(
+        f"{N_DIRECTIONS} directions, API latency {MIN_LATENCY_SEC}-{MAX_LATENCY_SEC}s"
+    )
+    print(f"{'workers':>8} {'cycle, s':>10} {'directions/s':>14}")
+    for n_workers in WORKERS:
+        uow = await make_uow()
+        started_at = time.perf_counter()
+        await update(
+            lambda: uow, SlowTicketsApi(seed=42), None, make_settings(n_workers)
+        )
+        elapsed = time.perf_counter() - started_at
+        print(f"{n_workers:>8} {elapsed:>10.2f} {N_DIRECTIONS / elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
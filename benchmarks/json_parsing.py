@@ -0,0 +1,107 @@
+"""Compares decoding of Travelpayouts responses as it was done before (text, json.loads and substring
+check for errors) with the current one (bytes, air_bot.json_decoder backend and check of the parsed
+'error' field), both followed by parsing of tickets.
+
+Payloads are generated to look like prices_for_dates and grouped_prices responses, pass paths to
+recorded responses to use them instead:
+python -m benchmarks.json_parsing [prices_for_dates.json grouped_prices.json]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from air_bot.adapters.tickets_api import (
+    decode_response,
+    parse_tickets,
+    parse_tickets_by_date,
+)
+from air_bot.json_decoder import BACKEND, response_error
+
+N_ITERATIONS = 2000
+
+
+def make_ticket(departure_at: datetime, price: int) -> dict:
+    return {
+        "origin": "MOW",
+        "destination": "LED",
+        "origin_airport": "SVO",
+        "destination_airport": "LED",
+        "price": price,
+        "airline": "SU",
+        "flight_number": "6",
+        "departure_at": departure_at.strftime("%Y-%m-%dT%H:%M:%S+03:00"),
+        "return_at": (departure_at + timedelta(days=7)).strftime(
+            "%Y-%m-%dT%H:%M:%S+03:00"
+        ),
+        "transfers": 0,
+        "return_transfers": 0,
+        "duration": 190,
+        "duration_to": 95,
+        "duration_back": 95,
+        "link": f"/search/MOW{departure_at:%d%m}LED1?t=SU{price}&search_date=01102023",
+    }
+
+
+def make_prices_for_dates(n_tickets: int = 30) -> bytes:
+    start = datetime(2023, 10, 1, 6, 55)
+    data = [make_ticket(start + timedelta(hours=i), 1500 + i) for i in range(n_tickets)]
+    return json.dumps({"success": True, "data": data, "currency": "rub"}).encode()
+
+
+def make_grouped_prices(n_days: int = 31) -> bytes:
+    start = datetime(2023, 10, 1, 6, 55)
+    data = {
+        f"{start + timedelta(days=i):%Y-%m-%d}": make_ticket(
+            start + timedelta(days=i), 1500 + i
+        )
+        for i in range(n_days)
+    }
+    return json.dumps({"success": True, "data": data, "currency": "rub"}).encode()
+
+
+def decode_as_before(response: bytes):
+    text = response.decode()
+    json_response = json.loads(text)
+    if "error" in text:
+        raise ValueError(json_response.get("error"))
+    return json_response
+
+
+def decode_current(response: bytes):
+    json_response = decode_response(response)
+    if response_error(json_response):
+        raise ValueError(json_response["error"])
+    return json_response
+
+
+def measure(decode, parse, response: bytes) -> float:
+    started_at = time.perf_counter()
+    for _ in range(N_ITERATIONS):
+        parse(decode(response))
+    return N_ITERATIONS / (time.perf_counter() - started_at)
+
+
+def main(prices_for_dates: bytes, grouped_prices: bytes):
+    print(f"JSON backend: {BACKEND}, {N_ITERATIONS} iterations")
+    for name, response, parse in (
+        ("prices_for_dates", prices_for_dates, parse_tickets),
+        ("grouped_prices", grouped_prices, parse_tickets_by_date),
+    ):
+        before = measure(decode_as_before, parse, response)
+        current = measure(decode_current, parse, response)
+        decode_only_before = measure(decode_as_before, lambda _: None, response)
+        decode_only_current = measure(decode_current, lambda _: None, response)
+        print(
+            f"{name} ({len(response)} bytes): "
+            f"decode {decode_only_before:.0f} -> {decode_only_current:.0f} responses/s, "
+            f"decode and parse {before:.0f} -> {current:.0f} responses/s"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        with open(sys.argv[1], "rb") as f1, open(sys.argv[2], "rb") as f2:
+            main(f1.read(), f2.read())
+    else:
+        main(make_prices_for_dates(), make_grouped_prices())
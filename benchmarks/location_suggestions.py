@@ -0,0 +1,107 @@
+"""Compares suggestions while typing served by the trie of LocationsIndex.suggest with prefix search
+of LocationsIndex.search and a naive scan over all names.
+
+Queries are prefixes of location names drawn with Zipf-like popularity, as users mostly type big
+cities. Locations are generated, pass paths to Travelpayouts data files to use them instead:
+python -m benchmarks.location_suggestions [cities.json airports.json]
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from air_bot.adapters.locations_api import normalize_term
+from air_bot.adapters.locations_index import MAX_LOCATIONS, LocationsIndex
+
+N_CITIES = 10_000
+N_QUERIES = 20_000
+SYLLABLES = [
+    "ка",
+    "ма",
+    "но",
+    "ро",
+    "ск",
+    "ва",
+    "ли",
+    "пе",
+    "тер",
+    "бург",
+    "град",
+    "ин",
+    "ов",
+    "ск",
+]
+
+
+def make_data(seed: int = 1) -> tuple[list[dict], list[dict]]:
+    rnd = random.Random(seed)
+    cities = []
+    airports = []
+    for i in range(N_CITIES):
+        name = "".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 5))).capitalize()
+        code = f"C{i:05d}"
+        cities.append({"code": code, "name": name, "country_code": "RU"})
+        for j in range(rnd.choice((0, 1, 1, 2))):
+            airports.append(
+                {
+                    "code": f"A{i:05d}{j}",
+                    "name": f"{name} {j + 1}",
+                    "city_code": code,
+                    "country_code": "RU",
+                    "iata_type": "airport",
+                    "flightable": True,
+                }
+            )
+    return cities, airports
+
+
+def make_queries(names: list[str], seed: int = 1) -> list[str]:
+    """Popular names are typed more often, each query is a prefix the user has typed so far"""
+    rnd = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(names) + 1)]
+    queries = []
+    for name in rnd.choices(names, weights, k=N_QUERIES):
+        queries.append(name[: rnd.randint(1, len(name))])
+    return queries
+
+
+def naive_suggest(names: list[str], prefix: str) -> list[str]:
+    normalized = normalize_term(prefix)
+    found = [name for name in names if normalize_term(name).startswith(normalized)]
+    return sorted(found, key=len)[:MAX_LOCATIONS]
+
+
+def lookups_per_second(suggest, queries: list[str]) -> float:
+    started_at = time.perf_counter()
+    for query in queries:
+        suggest(query)
+    return len(queries) / (time.perf_counter() - started_at)
+
+
+def main(cities: list[dict], airports: list[dict]):
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    index = LocationsIndex.from_data(cities, airports)
+    build_time = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    names = [city["name"] for city in cities if city.get("name")]
+    queries = make_queries(names)
+    print(
+        f"{len(index)} locations, built in {build_time:.2f} s, "
+        f"peak memory {peak / 2**20:.0f} MiB, {len(queries)} queries"
+    )
+    print(f"trie:        {lookups_per_second(index.suggest, queries):.0f} lookups/s")
+    print(f"search:      {lookups_per_second(index.search, queries):.0f} lookups/s")
+    naive_queries = queries[: len(queries) // 100]
+    naive = lookups_per_second(lambda q: naive_suggest(names, q), naive_queries)
+    print(f"naive scan:  {naive:.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        with open(sys.argv[1], "rb") as f1, open(sys.argv[2], "rb") as f2:
+            main(json.load(f1), json.load(f2))
+    else:
+        main(*make_data())
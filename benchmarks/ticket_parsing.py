@@ -0,0 +1,110 @@
+"""Measures tickets parsed per second with strptime based parsing used before and the current
+fromisoformat based one, and memory taken by a Ticket with and without __slots__:
+python -m benchmarks.ticket_parsing
+"""
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from air_bot.adapters.tickets_api import parse_tickets_by_date
+from air_bot.domain.model import Ticket
+from benchmarks.json_parsing import make_grouped_prices
+
+N_ITERATIONS = 2000
+N_TICKETS_FOR_MEMORY = 100_000
+
+
+@dataclass(frozen=True, kw_only=True)
+class DictTicket:
+    """Ticket as it was defined before: without __slots__"""
+
+    price: float
+    departure_at: datetime
+    duration_to: timedelta
+    return_at: datetime | None = None
+    duration_back: timedelta | None = None
+    link: str
+
+
+def datetime_from_ticket_strptime(datetime_str: str) -> datetime:
+    return datetime.strptime(datetime_str[:16], "%Y-%m-%dT%H:%M")
+
+
+def parse_ticket_as_before(json_ticket) -> DictTicket:
+    price = float(json_ticket["price"])
+    departure_at = datetime_from_ticket_strptime(json_ticket["departure_at"])
+    duration_to = timedelta(minutes=json_ticket["duration_to"])
+    if "return_at" in json_ticket:
+        return_at = datetime_from_ticket_strptime(json_ticket["return_at"])
+        duration_back = timedelta(minutes=json_ticket["duration_back"])
+    else:
+        return_at = None
+        duration_back = None
+    return DictTicket(
+        price=price,
+        departure_at=departure_at,
+        return_at=return_at,
+        duration_to=duration_to,
+        duration_back=duration_back,
+        link=json_ticket["link"],
+    )
+
+
+def parse_tickets_by_date_as_before(json_response) -> dict[str, DictTicket]:
+    return {
+        date: parse_ticket_as_before(json_ticket)
+        for date, json_ticket in json_response["data"].items()
+    }
+
+
+def tickets_per_second(parse, json_response) -> float:
+    n_tickets = len(json_response["data"])
+    started_at = time.perf_counter()
+    for _ in range(N_ITERATIONS):
+        parse(json_response)
+    return N_ITERATIONS * n_tickets / (time.perf_counter() - started_at)
+
+
+def bytes_per_ticket(ticket_class) -> float:
+    """Memory taken by the ticket object itself, field values are shared between tickets"""
+    departure_at = datetime(2023, 10, 1, 6, 55)
+    duration = timedelta(minutes=95)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tickets = [
+        ticket_class(
+            price=1500.0,
+            departure_at=departure_at,
+            duration_to=duration,
+            return_at=departure_at,
+            duration_back=duration,
+            link="/search",
+        )
+        for _ in range(N_TICKETS_FOR_MEMORY)
+    ]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Size of the list holding tickets is not a part of the ticket
+    allocated -= N_TICKETS_FOR_MEMORY * 8
+    del tickets
+    return allocated / N_TICKETS_FOR_MEMORY
+
+
+def main():
+    json_response = json.loads(make_grouped_prices())
+    before = tickets_per_second(parse_tickets_by_date_as_before, json_response)
+    current = tickets_per_second(parse_tickets_by_date, json_response)
+    print(
+        f"Tickets parsed per second: strptime {before:.0f}, fromisoformat {current:.0f}"
+    )
+    print(
+        f"Bytes per ticket: without slots {bytes_per_ticket(DictTicket):.0f}, "
+        f"with slots {bytes_per_ticket(Ticket):.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,7 @@ async def mysql_db_engine():
             async with session.begin():
                 await session.execute(text("DELETE FROM historic_flight_directions"))
                 await session.execute(text("DELETE FROM tickets"))
+                await session.execute(text("DELETE FROM pending_notifications"))
                 await session.execute(text("DELETE FROM flight_directions"))
                 await session.execute(text("DELETE FROM users"))
                 await session.execute(text("DELETE FROM users_directions"))
@@ -1,11 +1,17 @@
 from dataclasses import asdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from air_bot.adapters.repo.flight_directions import SqlAlchemyFlightDirectionRepo
-from air_bot.domain.model import FlightDirection
+from air_bot.adapters.repo import orm
+from air_bot.adapters.repo.flight_directions import (
+    SqlAlchemyFlightDirectionRepo,
+    select_update_candidates,
+)
+from air_bot.domain.model import FlightDirection, HistoricFlightDirection
 
 
 @pytest.mark.asyncio
@@ -99,51 +105,6 @@ async def test_get_non_existing_direction_by_id(
         assert direction is None
 
 
-@pytest.mark.asyncio
-async def test_get_most_outdated_directions(
-    mysql_session_factory: async_sessionmaker, moscow2spb_one_way_direction
-):
-    direction = moscow2spb_one_way_direction
-    earliest_direction_last_update = datetime.now()
-    time_step = 5
-    last_updates = [
-        earliest_direction_last_update + timedelta(minutes=m)
-        for m in range(0, 30, time_step)
-    ]
-    async with mysql_session_factory() as session:
-        repo = SqlAlchemyFlightDirectionRepo(session)
-        for last_update in last_updates:
-            await repo.add_direction_info(direction, 100, last_update)
-        await session.commit()
-
-    # Time stamp between 1 and 2 place
-    last_update = last_updates[-1] - timedelta(minutes=time_step // 2)
-    async with mysql_session_factory() as session:
-        repo = SqlAlchemyFlightDirectionRepo(session)
-        directions = await repo.get_directions_with_last_update_try_before(
-            last_update, limit=100
-        )
-    assert len(directions) == len(last_updates) - 1
-    selected_update_times = [d.last_update for d in directions]
-    assert selected_update_times == sorted(selected_update_times)
-    assert all(selected_lu < last_update for selected_lu in selected_update_times)
-
-    async with mysql_session_factory() as session:
-        repo = SqlAlchemyFlightDirectionRepo(session)
-        directions = await repo.get_directions_with_last_update_try_before(
-            last_update, limit=1
-        )
-    assert len(directions) == 1
-
-    last_update = earliest_direction_last_update - timedelta(seconds=1)
-    async with mysql_session_factory() as session:
-        repo = SqlAlchemyFlightDirectionRepo(session)
-        directions = await repo.get_directions_with_last_update_try_before(
-            last_update, limit=100
-        )
-    assert directions == []
-
-
 @pytest.mark.asyncio
 @pytest.mark.parametrize("new_price", [200.5, None])
 async def test_update_price(
@@ -195,23 +156,130 @@ async def test_delete_direction(
 
 
 @pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "outdated_departure_at",
+    [
+        datetime.strftime(datetime.now() - timedelta(days=2), "%Y-%m-%d"),
+        datetime.strftime(datetime.now().replace(day=1) - timedelta(days=2), "%Y-%m"),
+    ],
+)
 async def test_delete_outdated_directions(
-    mysql_session_factory: async_sessionmaker, moscow2antalya_roundtrip_direction
+    mysql_session_factory: async_sessionmaker,
+    moscow2antalya_roundtrip_direction,
+    outdated_departure_at,
 ):
     direction_dict = asdict(moscow2antalya_roundtrip_direction)
-    day_before_yesterday = datetime.now() - timedelta(days=2)
-    direction_dict["departure_at"] = datetime.strftime(day_before_yesterday, "%Y-%m-%d")
+    direction_dict["departure_at"] = outdated_departure_at
     direction = FlightDirection(**direction_dict)
+    actual_direction_dict = asdict(moscow2antalya_roundtrip_direction)
+    actual_direction_dict["departure_at"] = datetime.strftime(datetime.now(), "%Y-%m")
+    actual_direction = FlightDirection(**actual_direction_dict)
     async with mysql_session_factory() as session:
         repo = SqlAlchemyFlightDirectionRepo(session)
         await repo.add_direction_info(direction, 100, datetime.now())
+        await repo.add_direction_info(actual_direction, 100, datetime.now())
         await session.commit()
 
     async with mysql_session_factory() as session:
         repo = SqlAlchemyFlightDirectionRepo(session)
-        await repo.delete_outdated_directions()
+        assert await repo.delete_outdated_directions() == 1
         await session.commit()
 
     async with mysql_session_factory() as session:
         repo = SqlAlchemyFlightDirectionRepo(session)
         assert await repo.get_direction_id(direction) is None
+        assert await repo.get_direction_id(actual_direction) is not None
+        result = await session.execute(
+            select(HistoricFlightDirection).filter_by(
+                departure_at=direction.departure_at
+            )
+        )
+        historic_directions = [row[0] for row in result.all()]
+        assert len(historic_directions) == 1
+        assert historic_directions[0].price == 100
+        assert not historic_directions[0].deleted_by_user
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_keyset", [False, True])
+async def test_update_candidates_query_uses_index(
+    mysql_session_factory: async_sessionmaker, with_keyset: bool
+):
+    now = datetime.now().replace(microsecond=0)
+    rows = [
+        {
+            "start_code": f"{i % 1000:03d}",
+            "start_name": "Moscow",
+            "end_code": f"{i // 1000:03d}",
+            "end_name": "Saint-Petersburg",
+            "with_transfer": False,
+            "departure_at": "2100-01",
+            "return_at": None,
+            "departure_end_date": date(2100, 1, 31),
+            "return_end_date": None,
+            "price": 100,
+            "last_update": now,
+            "last_update_try": now - timedelta(minutes=i),
+            "next_update_at": now - timedelta(minutes=i),
+        }
+        for i in range(5000)
+    ]
+    async with mysql_session_factory() as session:
+        await session.execute(insert(orm.flight_direction_info_table), rows)
+        await session.execute(text("ANALYZE TABLE flight_directions"))
+        await session.commit()
+
+    after = (now - timedelta(minutes=4000), 1) if with_keyset else None
+    stmt = select_update_candidates(now - timedelta(minutes=1000), 100, after)
+    query = stmt.compile(
+        dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    async with mysql_session_factory() as session:
+        result = await session.execute(text(f"EXPLAIN {query}"))
+        plan = result.mappings().one()
+    assert plan["key"] == "flight_directions_next_update_at_idx"
+    assert "filesort" not in (plan["Extra"] or "")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_do_not_overlap(
+    mysql_session_factory: async_sessionmaker, moscow2spb_one_way_direction
+):
+    last_update = datetime.now().replace(microsecond=0) - timedelta(hours=2)
+    async with mysql_session_factory() as session:
+        repo = SqlAlchemyFlightDirectionRepo(session)
+        for i in range(4):
+            direction_dict = asdict(moscow2spb_one_way_direction)
+            direction_dict["end_code"] = f"E{i:02d}"
+            await repo.add_direction_info(
+                FlightDirection(**direction_dict), 100, last_update
+            )
+        await session.commit()
+
+    now = datetime.now()
+    lease_expires_at = now + timedelta(minutes=5)
+    async with mysql_session_factory() as first_session:
+        # First claim is not committed yet, so its rows are still locked
+        first_repo = SqlAlchemyFlightDirectionRepo(first_session)
+        first_claim = await first_repo.claim_directions_for_update(
+            now, 2, "updater-1", lease_expires_at
+        )
+        async with mysql_session_factory() as second_session:
+            second_repo = SqlAlchemyFlightDirectionRepo(second_session)
+            second_claim = await second_repo.claim_directions_for_update(
+                now, 10, "updater-2", lease_expires_at
+            )
+            await second_session.commit()
+        await first_session.commit()
+    assert len(first_claim) == 2
+    assert len(second_claim) == 2
+    assert {d.id for d in first_claim}.isdisjoint({d.id for d in second_claim})
+
+    # Leased directions are not claimed again until the lease expires
+    async with mysql_session_factory() as session:
+        repo = SqlAlchemyFlightDirectionRepo(session)
+        claimed = await repo.claim_directions_for_update(
+            now, 10, "updater-3", lease_expires_at
+        )
+        assert claimed == []
+        await session.commit()
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from air_bot.adapters.repo.pending_notifications import (
+    SqlAlchemyPendingNotificationRepo,
+)
+from air_bot.domain.model import PendingNotification, Ticket
+
+
+@pytest.mark.asyncio
+async def test_take_notifications_in_order_of_addition(
+    mysql_session_factory,
+    moscow2antalya_roundtrip_direction_id,
+    tomorrow_at_12am,
+    next_week,
+    two_hours,
+):
+    tickets = [
+        Ticket(
+            price=100,
+            departure_at=tomorrow_at_12am,
+            duration_to=two_hours,
+            link="link",
+            return_at=next_week,
+            duration_back=two_hours,
+        )
+    ]
+    created_at = datetime.now().replace(microsecond=0)
+    async with mysql_session_factory() as session:
+        repo = SqlAlchemyPendingNotificationRepo(session)
+        for user_id in [1, 2, 3]:
+            await repo.add(
+                PendingNotification(
+                    user_id=user_id,
+                    direction_id=moscow2antalya_roundtrip_direction_id,
+                    tickets=tickets,
+                    created_at=created_at,
+                )
+            )
+        await session.commit()
+
+    async with mysql_session_factory() as session:
+        repo = SqlAlchemyPendingNotificationRepo(session)
+        taken = await repo.take(2)
+        await session.commit()
+    assert [n.user_id for n in taken] == [1, 2]
+    assert all(n.tickets == tickets for n in taken)
+    assert all(n.created_at == created_at for n in taken)
+
+    async with mysql_session_factory() as session:
+        repo = SqlAlchemyPendingNotificationRepo(session)
+        assert [n.user_id for n in await repo.take(10)] == [3]
+        assert await repo.take(10) == []
+        await session.commit()
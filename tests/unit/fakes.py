@@ -24,12 +24,15 @@ class FakeFlightDirectionRepo(repository.FlightDirectionRepo):
     def __init__(self):
         self._next_id = 0
         self.directions: list[model.FlightDirectionInfo] = []
+        # direction id -> (lease owner, lease expiration time)
+        self.leases: dict[int, tuple[str, datetime.datetime]] = {}
 
     async def add_direction_info(
         self,
         direction: model.FlightDirection,
         price: float | None,
         last_update: datetime.datetime,
+        next_update_at: datetime.datetime | None = None,
     ) -> int:
         self.directions.append(
             model.FlightDirectionInfo(
@@ -37,7 +40,8 @@ class FakeFlightDirectionRepo(repository.FlightDirectionRepo):
                 **asdict(direction),
                 price=price,
                 last_update=last_update,
-                last_update_try=last_update
+                last_update_try=last_update,
+                next_update_at=next_update_at or last_update,
             )
         )
         row_id = self._next_id
@@ -59,30 +63,75 @@ class FakeFlightDirectionRepo(repository.FlightDirectionRepo):
                 result.append(direction_info)
         return result
 
-    # TODO: make cutoff by last_update_try
-    async def get_directions_with_last_update_try_before(
-        self, last_update_try: datetime.datetime, limit: int
+    async def claim_directions_for_update(
+        self,
+        due_before: datetime.datetime,
+        limit: int,
+        owner: str,
+        lease_expires_at: datetime.datetime,
+        after: tuple[datetime.datetime, int] | None = None,
     ) -> list[model.FlightDirectionInfo]:
-        sorted_directions = sorted(
-            self.directions, key=lambda direction: direction.last_update_try
+        now = datetime.datetime.now()
+
+        def is_claimable(direction: model.FlightDirectionInfo) -> bool:
+            assert direction.next_update_at is not None and direction.id is not None
+            if direction.next_update_at >= due_before:
+                return False
+            if after is not None and (direction.next_update_at, direction.id) <= after:
+                return False
+            lease = self.leases.get(direction.id)
+            return lease is None or lease[1] < now
+
+        due_directions = sorted(
+            filter(is_claimable, self.directions),
+            key=lambda direction: (direction.next_update_at, direction.id),
         )
-        return sorted_directions[: min(limit, len(sorted_directions))]
+        claimed_directions = due_directions[:limit]
+        for direction in claimed_directions:
+            assert direction.id is not None
+            self.leases[direction.id] = (owner, lease_expires_at)
+        return claimed_directions
 
     async def update_price(
-        self, direction_id: int, price: float | None, last_update: datetime.datetime
+        self,
+        direction_id: int,
+        price: float | None,
+        last_update: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
         for i in range(len(self.directions)):
             if self.directions[i].id == direction_id:
                 self.directions[i].price = price
                 self.directions[i].last_update = last_update
-                self.directions[i].last_update_try = last_update
+                self._update_last_update_try(self.directions[i], last_update, schedule)
 
     async def update_last_update_try(
-        self, direction_id: int, last_update_try: datetime.datetime
+        self,
+        direction_id: int,
+        last_update_try: datetime.datetime,
+        schedule: model.UpdateSchedule | None = None,
     ):
         for i in range(len(self.directions)):
             if self.directions[i].id == direction_id:
-                self.directions[i].last_update_try = last_update_try
+                self._update_last_update_try(
+                    self.directions[i],
+                    last_update_try,
+                    schedule,
+                )
+
+    def _update_last_update_try(
+        self,
+        direction: model.FlightDirectionInfo,
+        last_update_try: datetime.datetime,
+        schedule: model.UpdateSchedule | None,
+    ):
+        direction.last_update_try = last_update_try
+        if schedule is not None:
+            direction.next_update_at = schedule.next_update_at
+            direction.price_volatility = schedule.price_volatility
+            direction.unchanged_price_updates = schedule.unchanged_price_updates
+        assert direction.id is not None
+        self.leases.pop(direction.id, None)
 
     async def delete_direction(self, direction_id: int):
         self.directions = [
@@ -141,6 +190,22 @@ class FakeTicketRepo(repository.TicketRepo):
         self.ticket_rows = [row for row in self.ticket_rows if row[1] != direction_id]
 
 
+class FakePendingNotificationRepo(repository.PendingNotificationRepo):
+    def __init__(self):
+        self._next_id = 0
+        self.notifications: list[model.PendingNotification] = []
+
+    async def add(self, notification: model.PendingNotification):
+        notification.id = self._next_id
+        self._next_id += 1
+        self.notifications.append(notification)
+
+    async def take(self, limit: int) -> list[model.PendingNotification]:
+        taken = self.notifications[:limit]
+        self.notifications = self.notifications[limit:]
+        return taken
+
+
 class FakeUnitOfWork(AbstractUnitOfWork):
     def __init__(self):
         super().__init__(None)
@@ -148,9 +213,18 @@ class FakeUnitOfWork(AbstractUnitOfWork):
         self.flight_directions = FakeFlightDirectionRepo()
         self.users_directions = FakeUserFlightDirectionRepo()
         self.tickets = FakeTicketRepo()
+        self.pending_notifications = FakePendingNotificationRepo()
 
     async def _commit(self):
         pass
 
     async def _rollback(self):
         pass
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
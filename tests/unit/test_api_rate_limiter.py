@@ -0,0 +1,62 @@
+import pytest
+
+from air_bot.http_session import (
+    ApiRateLimiter,
+    RateLimitExceeded,
+    RequestPriority,
+    background_requests,
+    get_request_priority,
+)
+from tests.unit.fakes import FakeTimer
+
+ENDPOINT = "api.travelpayouts.com/aviasales/v3/prices_for_dates"
+
+
+def make_rate_limiter(timer=None, requests_per_second=1.0) -> ApiRateLimiter:
+    kwargs = {} if timer is None else {"timer": timer}
+    return ApiRateLimiter(
+        requests_per_second=requests_per_second,
+        burst=4,
+        background_reserve=0.5,
+        max_wait={RequestPriority.INTERACTIVE: 0.5, RequestPriority.BACKGROUND: 0.5},
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_background_requests_leave_reserve_for_interactive():
+    rate_limiter = make_rate_limiter(FakeTimer())
+    for _ in range(2):
+        await rate_limiter.acquire(ENDPOINT, RequestPriority.BACKGROUND)
+    with pytest.raises(RateLimitExceeded):
+        await rate_limiter.acquire(ENDPOINT, RequestPriority.BACKGROUND)
+    for _ in range(2):
+        await rate_limiter.acquire(ENDPOINT, RequestPriority.INTERACTIVE)
+    with pytest.raises(RateLimitExceeded):
+        await rate_limiter.acquire(ENDPOINT, RequestPriority.INTERACTIVE)
+    # Other endpoints have their own buckets
+    await rate_limiter.acquire("other/endpoint", RequestPriority.BACKGROUND)
+
+    stats = rate_limiter.stats()
+    assert stats[(ENDPOINT, RequestPriority.BACKGROUND)].requests == 2
+    assert stats[(ENDPOINT, RequestPriority.BACKGROUND)].rejected == 1
+    assert stats[(ENDPOINT, RequestPriority.INTERACTIVE)].requests == 2
+    assert stats[(ENDPOINT, RequestPriority.INTERACTIVE)].rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_request_waits_for_token():
+    rate_limiter = make_rate_limiter(requests_per_second=100)
+    for _ in range(5):
+        await rate_limiter.acquire(ENDPOINT, RequestPriority.INTERACTIVE)
+    stats = rate_limiter.stats()[(ENDPOINT, RequestPriority.INTERACTIVE)]
+    assert stats.requests == 5
+    assert stats.rejected == 0
+    assert 0 < stats.max_wait < 0.5
+
+
+def test_background_requests_context():
+    assert get_request_priority() == RequestPriority.INTERACTIVE
+    with background_requests():
+        assert get_request_priority() == RequestPriority.BACKGROUND
+    assert get_request_priority() == RequestPriority.INTERACTIVE
@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.adapters.tickets_api import CachingTicketsApi
+from air_bot.bot.calendar_prefetcher import CalendarPrefetcher
+
+
+def make_caching_api():
+    api = Mock(get_cheapest_tickets_for_month=AsyncMock(return_value={}))
+    return api, CachingTicketsApi(api, maxsize=10, ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_prefetch_adjacent_months(moscow2spb_one_way_direction):
+    api, caching_api = make_caching_api()
+    prefetcher = CalendarPrefetcher(caching_api, requests_per_minute=60)
+    prefetcher.prefetch_adjacent_months(
+        1, moscow2spb_one_way_direction, 2023, 12, True, True
+    )
+    await asyncio.sleep(0)
+    await prefetcher.stop()
+    assert caching_api.is_month_cached(moscow2spb_one_way_direction, 2024, 1)
+    assert caching_api.is_month_cached(moscow2spb_one_way_direction, 2023, 11)
+
+    # Cached months are not requested again
+    prefetcher.prefetch_adjacent_months(
+        1, moscow2spb_one_way_direction, 2023, 12, True, True
+    )
+    await asyncio.sleep(0)
+    assert api.get_cheapest_tickets_for_month.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_prefetch_respects_allowed_months_and_budget(
+    moscow2spb_one_way_direction,
+):
+    api, caching_api = make_caching_api()
+    prefetcher = CalendarPrefetcher(caching_api, requests_per_minute=6)
+    prefetcher.prefetch_adjacent_months(
+        1, moscow2spb_one_way_direction, 2023, 5, False, True
+    )
+    prefetcher.prefetch_adjacent_months(
+        2, moscow2spb_one_way_direction, 2023, 8, True, True
+    )
+    await asyncio.sleep(0)
+    await prefetcher.stop()
+    # Budget allows only one request
+    api.get_cheapest_tickets_for_month.assert_awaited_once_with(
+        moscow2spb_one_way_direction, 2023, 6
+    )
+
+
+@pytest.mark.asyncio
+async def test_new_prefetch_cancels_previous_one(moscow2spb_one_way_direction):
+    api, caching_api = make_caching_api()
+
+    async def slow_request(*args):
+        await asyncio.sleep(10)
+
+    api.get_cheapest_tickets_for_month = slow_request
+    prefetcher = CalendarPrefetcher(caching_api, requests_per_minute=60)
+    prefetcher.prefetch_adjacent_months(
+        1, moscow2spb_one_way_direction, 2023, 5, False, True
+    )
+    first_task = prefetcher._tasks[1]
+    prefetcher.prefetch_adjacent_months(
+        1, moscow2spb_one_way_direction, 2023, 6, False, True
+    )
+    await asyncio.sleep(0)
+    assert first_task.cancelled()
+    await prefetcher.stop()
@@ -1,11 +1,22 @@
+import asyncio
 import random
+import time
+from dataclasses import asdict
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 
-from air_bot.domain.model import Ticket
-from air_bot.service.direction_updater import update
+from air_bot.adapters.tickets_api import CircuitBreakerTicketsApi
+from air_bot.domain.exceptions import TicketsAPIConnectionError
+from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.rate_limiter import TokenBucket
+from air_bot.service import direction_updater
+from air_bot.service.direction_updater import (
+    UpdateCycleStats,
+    iter_update_candidates,
+    update,
+)
 from air_bot.settings import (
     DirectionUpdaterSettings,
     Interval,
@@ -13,7 +24,7 @@ from air_bot.settings import (
     Settings,
     UsersSettings,
 )
-from tests.unit.fakes import FakeUnitOfWork
+from tests.unit.fakes import FakeTimer, FakeUnitOfWork
 
 
 def get_tickets(prices, roundtrip=False) -> list[Ticket]:
@@ -42,6 +53,7 @@ def get_tickets(prices, roundtrip=False) -> list[Ticket]:
 class FakeUserNotifier:
     def __init__(self):
         self.notify_user = AsyncMock()
+        self.flush = AsyncMock()
 
 
 # TODO: check last_update and last_update_try are updated
@@ -64,7 +76,7 @@ async def test_notify_subscribed_users_if_new_price_below_threshold(
     aviasales_api = Mock(get_tickets=AsyncMock(return_value=tickets))
     bot = FakeUserNotifier()
     settings = make_settings()
-    await update(uow, aviasales_api, bot, settings)
+    await update(lambda: uow, aviasales_api, bot, settings)
     assert bot.notify_user.call_count == 2
     notify_call_args = [
         bot.notify_user.call_args_list[i].args
@@ -72,6 +84,7 @@ async def test_notify_subscribed_users_if_new_price_below_threshold(
     ]
     assert (1, tickets, moscow2spb_one_way_direction, direction_id) in notify_call_args
     assert (2, tickets, moscow2spb_one_way_direction, direction_id) in notify_call_args
+    bot.flush.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -92,7 +105,7 @@ async def test_notify_subscribed_users_if_first_ticket_appears(
     aviasales_api = Mock(get_tickets=AsyncMock(return_value=tickets))
     bot = FakeUserNotifier()
     settings = make_settings()
-    await update(uow, aviasales_api, bot, settings)
+    await update(lambda: uow, aviasales_api, bot, settings)
     assert bot.notify_user.call_count == 1
     assert bot.notify_user.call_args_list[0][0] == (
         1,
@@ -102,10 +115,220 @@ async def test_notify_subscribed_users_if_first_ticket_appears(
     )
 
 
-def make_settings() -> Settings:
+@pytest.mark.asyncio
+async def test_directions_are_updated_concurrently(moscow2spb_one_way_direction):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    n_directions = 4
+    for i in range(n_directions):
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = f"E{i:02d}"
+        await uow.flight_directions.add_direction_info(
+            FlightDirection(**direction_dict), 100, last_update
+        )
+    latency = 0.2
+
+    async def get_tickets_with_latency(direction, limit):
+        await asyncio.sleep(latency)
+        return get_tickets([100])
+
+    aviasales_api = Mock(get_tickets=get_tickets_with_latency)
+    settings = make_settings(max_directions_for_single_update=n_directions, n_workers=4)
+    started_at = time.monotonic()
+    await update(lambda: uow, aviasales_api, FakeUserNotifier(), settings)
+    assert time.monotonic() - started_at < 2 * latency
+    assert all(
+        d.last_update_try > last_update for d in uow.flight_directions.directions
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_tickets_are_not_rewritten(moscow2spb_one_way_direction):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    await uow.flight_directions.add_direction_info(
+        moscow2spb_one_way_direction, None, last_update
+    )
+    tickets = get_tickets([89, 100, 120])
+    aviasales_api = Mock(get_tickets=AsyncMock(return_value=tickets))
+    settings = make_settings(needs_update_after=0, min_update_interval=0)
+    stats = await update(lambda: uow, aviasales_api, FakeUserNotifier(), settings)
+    assert stats == UpdateCycleStats(changed=1)
+    direction_info = uow.flight_directions.directions[0]
+    first_update = direction_info.last_update
+
+    aviasales_api.get_tickets.return_value = [tickets[0], tickets[2], tickets[1]]
+    bot = FakeUserNotifier()
+    stats = await update(lambda: uow, aviasales_api, bot, settings)
+    assert stats == UpdateCycleStats(unchanged=1)
+    direction_info = uow.flight_directions.directions[0]
+    assert direction_info.last_update == first_update
+    assert direction_info.last_update_try > first_update
+    assert bot.notify_user.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_update_candidates_are_streamed_by_pages(
+    moscow2spb_one_way_direction, monkeypatch
+):
+    monkeypatch.setattr(direction_updater, "CANDIDATES_PAGE_SIZE", 2)
+    uow = FakeUnitOfWork()
+    now = datetime.now()
+    # Two directions share last_update_try, so pages are split by id
+    last_update_tries = [now - timedelta(minutes=m) for m in [10, 30, 30, 50, 70]]
+    for i, last_update_try in enumerate(last_update_tries):
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = f"E{i:02d}"
+        await uow.flight_directions.add_direction_info(
+            FlightDirection(**direction_dict), 100, last_update_try
+        )
+
+    lease = timedelta(minutes=5)
+    candidates = [
+        d.id
+        async for d in iter_update_candidates(lambda: uow, now, 4, "updater-1", lease)
+    ]
+    assert candidates == [4, 3, 1, 2]
+
+    # Directions leased by the first updater are skipped
+    candidates = [
+        d.id
+        async for d in iter_update_candidates(lambda: uow, now, 10, "updater-2", lease)
+    ]
+    assert candidates == [0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updaters_do_not_update_same_directions(
+    moscow2spb_one_way_direction,
+):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    n_directions = 6
+    for i in range(n_directions):
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = f"E{i:02d}"
+        await uow.flight_directions.add_direction_info(
+            FlightDirection(**direction_dict), 100, last_update
+        )
+    updated_directions = []
+
+    async def get_tickets_with_latency(direction, limit):
+        updated_directions.append(direction)
+        await asyncio.sleep(0.01)
+        return get_tickets([100])
+
+    aviasales_api = Mock(get_tickets=get_tickets_with_latency)
+    settings = make_settings(max_directions_for_single_update=n_directions)
+    await asyncio.gather(
+        update(lambda: uow, aviasales_api, None, settings, owner="updater-1"),
+        update(lambda: uow, aviasales_api, None, settings, owner="updater-2"),
+    )
+    assert len(updated_directions) == n_directions
+    assert len(set(updated_directions)) == n_directions
+
+
+@pytest.mark.asyncio
+async def test_popular_directions_are_scheduled_earlier(moscow2spb_one_way_direction):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    departure_at = (datetime.now() + timedelta(days=300)).strftime("%Y-%m-%d")
+    direction_ids = []
+    for end_code in ["AAA", "BBB"]:
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = end_code
+        direction_dict["departure_at"] = departure_at
+        direction_ids.append(
+            await uow.flight_directions.add_direction_info(
+                FlightDirection(**direction_dict), 100, last_update
+            )
+        )
+    await uow.users_directions.add(user_id=1, direction_id=direction_ids[0])
+    for user_id in range(100):
+        await uow.users_directions.add(user_id=user_id, direction_id=direction_ids[1])
+    aviasales_api = Mock(get_tickets=AsyncMock(return_value=get_tickets([100])))
+    await update(lambda: uow, aviasales_api, FakeUserNotifier(), make_settings())
+    unpopular, popular = uow.flight_directions.directions
+    assert popular.next_update_at < unpopular.next_update_at
+    assert unpopular.next_update_at - unpopular.last_update_try > timedelta(minutes=50)
+
+
+@pytest.mark.asyncio
+async def test_updates_are_limited_by_api_budget(moscow2spb_one_way_direction):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    for i in range(5):
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = f"E{i:02d}"
+        await uow.flight_directions.add_direction_info(
+            FlightDirection(**direction_dict), 100, last_update
+        )
+    aviasales_api = Mock(get_tickets=AsyncMock(return_value=get_tickets([100])))
+    settings = make_settings(max_directions_for_single_update=5)
+    timer = FakeTimer()
+    api_budget = TokenBucket(rate=1 / 60, capacity=3, timer=timer)
+    stats = await update(
+        lambda: uow, aviasales_api, None, settings, api_budget=api_budget
+    )
+    assert stats.changed + stats.unchanged == 3
+    assert aviasales_api.get_tickets.await_count == 3
+
+    stats = await update(
+        lambda: uow, aviasales_api, None, settings, api_budget=api_budget
+    )
+    assert aviasales_api.get_tickets.await_count == 3
+    timer.now += 60
+    stats = await update(
+        lambda: uow, aviasales_api, None, settings, api_budget=api_budget
+    )
+    assert aviasales_api.get_tickets.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_update_cycle_is_aborted_when_api_is_down(moscow2spb_one_way_direction):
+    uow = FakeUnitOfWork()
+    last_update = datetime.now() - timedelta(minutes=61)
+    for i in range(10):
+        direction_dict = asdict(moscow2spb_one_way_direction)
+        direction_dict["end_code"] = f"E{i:02d}"
+        await uow.flight_directions.add_direction_info(
+            FlightDirection(**direction_dict), 100, last_update
+        )
+    api = Mock(get_tickets=AsyncMock(side_effect=TicketsAPIConnectionError()))
+    timer = FakeTimer()
+    aviasales_api = CircuitBreakerTicketsApi(
+        api, failure_threshold=2, reset_timeout=60, timer=timer
+    )
+    settings = make_settings(max_directions_for_single_update=10)
+    stats = await update(lambda: uow, aviasales_api, None, settings)
+    assert api.get_tickets.await_count == 2
+    assert stats.changed + stats.unchanged == 0
+
+    # Circuit is still open
+    await update(lambda: uow, aviasales_api, None, settings, owner="other")
+    assert api.get_tickets.await_count == 2
+
+    # A probe request succeeds and the cycle goes on after leases of the aborted cycle expire
+    timer.now += 60
+    uow.flight_directions.leases.clear()
+    api.get_tickets.side_effect = None
+    api.get_tickets.return_value = get_tickets([100])
+    stats = await update(lambda: uow, aviasales_api, None, settings)
+    assert stats.changed + stats.unchanged == 10
+
+
+def make_settings(
+    max_directions_for_single_update: int = 2,
+    n_workers: int = 1,
+    needs_update_after: int = 60,
+    min_update_interval: int = 1,
+) -> Settings:
     scheduler = SchedulerSetting(5, Interval.MINUTES)
     direction_updater = DirectionUpdaterSettings(
-        needs_update_after=60, max_directions_for_single_update=2
+        needs_update_after=needs_update_after,
+        min_update_interval=min_update_interval,
+        max_directions_for_single_update=max_directions_for_single_update,
+        n_workers=n_workers,
     )
     users = UsersSettings(
         max_directions_per_user=10, price_reduction_threshold_percents=10
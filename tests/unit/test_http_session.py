@@ -0,0 +1,123 @@
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from air_bot.http_session import (
+    ConnectionStats,
+    RetryPolicy,
+    TransientResponseError,
+    get_bytes,
+    get_connection_trace_config,
+    get_trace_config,
+    request_duration,
+    responses,
+    retries,
+)
+
+
+async def ok(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+class FlakyHandler:
+    """Responds with 'statuses' one by one and then with 200"""
+
+    def __init__(self, statuses: list[int]):
+        self.statuses = statuses
+        self.n_calls = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.n_calls += 1
+        if self.n_calls <= len(self.statuses):
+            return web.Response(status=self.statuses[self.n_calls - 1])
+        return web.Response(text="ok")
+
+
+@pytest.fixture
+def flaky_handlers() -> dict[str, FlakyHandler]:
+    return {
+        "unavailable": FlakyHandler([503, 502]),
+        "bad_request": FlakyHandler([400]),
+    }
+
+
+@pytest_asyncio.fixture
+async def server_url(flaky_handlers):
+    app = web.Application()
+    app.router.add_get("/", ok)
+    for path, handler in flaky_handlers.items():
+        app.router.add_get(f"/{path}", handler.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "localhost", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    yield f"http://localhost:{port}/"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_connection_stats_count_reused_connections(server_url):
+    stats = ConnectionStats()
+    connector = aiohttp.TCPConnector(ttl_dns_cache=60)
+    async with aiohttp.ClientSession(
+        connector=connector, trace_configs=[get_connection_trace_config(stats)]
+    ) as session:
+        for _ in range(3):
+            async with session.get(server_url) as response:
+                assert await response.text() == "ok"
+    assert stats.new_connections == 1
+    assert stats.reused_connections == 2
+    assert stats.dns_resolutions == 1
+    assert stats.avg_connect_time > 0
+
+
+@pytest.mark.asyncio
+async def test_trace_config_records_request_metrics(server_url):
+    endpoint = "localhost/"
+    async with aiohttp.ClientSession(trace_configs=[get_trace_config()]) as session:
+        async with session.get(server_url) as response:
+            await response.text()
+    assert responses.value(endpoint=endpoint, status="200") == 1
+    assert request_duration.count(endpoint=endpoint) == 1
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(server_url, flaky_handlers):
+    endpoint = "localhost/unavailable"
+    retries_before = {
+        reason: retries.value(endpoint=endpoint, reason=reason)
+        for reason in ("503", "502")
+    }
+    retry_policy = RetryPolicy(attempts=3, base_delay=0)
+    async with aiohttp.ClientSession() as session:
+        body = await get_bytes(session, server_url + "unavailable", {}, retry_policy)
+    assert body == b"ok"
+    assert flaky_handlers["unavailable"].n_calls == 3
+    for reason in ("503", "502"):
+        n_retries = retries.value(endpoint=endpoint, reason=reason)
+        assert n_retries - retries_before[reason] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_are_limited(server_url, flaky_handlers):
+    retry_policy = RetryPolicy(attempts=2, base_delay=0)
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(TransientResponseError):
+            await get_bytes(session, server_url + "unavailable", {}, retry_policy)
+    assert flaky_handlers["unavailable"].n_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(server_url, flaky_handlers):
+    retry_policy = RetryPolicy(attempts=3, base_delay=0)
+    async with aiohttp.ClientSession() as session:
+        await get_bytes(session, server_url + "bad_request", {}, retry_policy)
+    assert flaky_handlers["bad_request"].n_calls == 1
+
+
+def test_backoff_is_exponential_and_capped():
+    retry_policy = RetryPolicy(attempts=10, base_delay=1, max_delay=5)
+    for attempt, max_delay in ((1, 1), (2, 2), (3, 4), (4, 5), (9, 5)):
+        assert 0 <= retry_policy.delay(attempt) <= max_delay
@@ -0,0 +1,57 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.adapters.locations_api import CachingLocationsApi, SqliteLocationsStore
+from air_bot.domain.model import Location
+from tests.unit.fakes import FakeTimer
+
+MOSCOW = [
+    Location(code="MOW", name="Москва", country_code="RU"),
+    Location(code="SVO", name="Шереметьево", country_code="RU"),
+]
+
+
+def make_remote_api():
+    return Mock(get_locations=AsyncMock(return_value=MOSCOW))
+
+
+@pytest.mark.asyncio
+async def test_differently_typed_terms_share_cache_entry():
+    remote_api = make_remote_api()
+    locations_api = CachingLocationsApi(remote_api, "ru", maxsize=10, ttl=60)
+    for term in ("Москва", " москва ", "МОСКВА"):
+        assert await locations_api.get_locations(term) == MOSCOW
+    remote_api.get_locations.assert_awaited_once_with("Москва")
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "locations.sqlite3")
+    remote_api = make_remote_api()
+    store = SqliteLocationsStore(path, ttl=60)
+    locations_api = CachingLocationsApi(remote_api, "ru", 10, 60, store)
+    await locations_api.get_locations("Москва")
+    store.close()
+
+    store = SqliteLocationsStore(path, ttl=60)
+    locations_api = CachingLocationsApi(remote_api, "ru", 10, 60, store)
+    await locations_api.warm_up()
+    assert "москва" in locations_api.locations
+    assert await locations_api.get_locations("москва") == MOSCOW
+    # Other locale is cached separately
+    await CachingLocationsApi(remote_api, "en", 10, 60, store).get_locations("Москва")
+    assert remote_api.get_locations.await_count == 2
+    store.close()
+
+
+def test_expired_locations_are_not_returned(tmp_path):
+    timer = FakeTimer()
+    store = SqliteLocationsStore(str(tmp_path / "locations.sqlite3"), 60, timer)
+    store.set("ru", "москва", MOSCOW)
+    assert store.get("ru", "москва") == MOSCOW
+    timer.now += 60
+    assert store.get("ru", "москва") is None
+    assert store.recent("ru", 10) == []
+    assert store.delete_expired() == 1
+    store.close()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.adapters import locations_index
+from air_bot.adapters.locations_api import normalize_term
+from air_bot.adapters.locations_index import (
+    IndexedLocationsApi,
+    LocationsIndex,
+    LocationsIndexUpdater,
+)
+from air_bot.bot.handlers.add_flight_direction import find_locations
+from air_bot.bot.presentation.locations import format_location, parse_location
+from air_bot.domain.model import Location
+
+CITIES: list[dict] = [
+    {
+        "code": "MOW",
+        "name": "Москва",
+        "country_code": "RU",
+        "name_translations": {"en": "Moscow"},
+    },
+    {
+        "code": "LED",
+        "name": "Санкт-Петербург",
+        "country_code": "RU",
+        "name_translations": {"en": "St. Petersburg"},
+    },
+    {"code": "OSM", "name": "Мосул", "country_code": "IQ"},
+]
+AIRPORTS: list[dict] = [
+    {
+        "code": "SVO",
+        "name": "Шереметьево",
+        "city_code": "MOW",
+        "country_code": "RU",
+        "iata_type": "airport",
+        "flightable": True,
+    },
+    {
+        "code": "DME",
+        "name": "Домодедово",
+        "city_code": "MOW",
+        "country_code": "RU",
+        "iata_type": "airport",
+        "flightable": True,
+    },
+    {
+        "code": "QLM",
+        "name": "Москва Ленинградский вокзал",
+        "city_code": "MOW",
+        "country_code": "RU",
+        "iata_type": "railway",
+        "flightable": False,
+    },
+    {
+        "code": "LED",
+        "name": "Пулково",
+        "city_code": "LED",
+        "country_code": "RU",
+        "iata_type": "airport",
+        "flightable": True,
+    },
+]
+
+MOSCOW = Location(code="MOW", name="Москва", country_code="RU")
+SHEREMETYEVO = Location(code="SVO", name="Шереметьево", country_code="RU")
+DOMODEDOVO = Location(code="DME", name="Домодедово", country_code="RU")
+
+
+@pytest.fixture
+def index() -> LocationsIndex:
+    return LocationsIndex.from_data(CITIES, AIRPORTS)
+
+
+def test_normalize_term():
+    assert normalize_term("  Орёл   Южный ") == "орел южный"
+    assert normalize_term("Санкт-Петербург") == "санкт петербург"
+
+
+@pytest.mark.parametrize("term", ["Москва", "москва ", "Моск", "moscow", "MOW"])
+def test_city_is_found_with_its_airports(index, term):
+    assert index.search(term) == [MOSCOW, SHEREMETYEVO, DOMODEDOVO]
+
+
+def test_airport_is_found_by_code(index):
+    assert index.search("svo") == [SHEREMETYEVO]
+
+
+def test_only_first_country_is_kept(index):
+    assert index.search("Мос") == [MOSCOW, SHEREMETYEVO, DOMODEDOVO]
+
+
+def test_misspelled_name_is_found_by_trigrams(index):
+    assert index.search("Шереметево") == [SHEREMETYEVO]
+
+
+def test_nothing_is_found(index):
+    assert index.search("Лондон") == []
+
+
+@pytest.mark.asyncio
+async def test_remote_api_is_used_on_miss(index):
+    london = Location(code="LON", name="Лондон", country_code="GB")
+    remote_api = Mock(get_locations=AsyncMock(return_value=[london]))
+    locations_api = IndexedLocationsApi(remote_api)
+    assert await locations_api.get_locations("Москва") == [london]
+
+    locations_api.index = index
+    assert await locations_api.get_locations("Москва") == [
+        MOSCOW,
+        SHEREMETYEVO,
+        DOMODEDOVO,
+    ]
+    assert await locations_api.get_locations("Лондон") == [london]
+    assert remote_api.get_locations.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_index_is_loaded_from_data_files(tmp_path):
+    (tmp_path / "ru").mkdir()
+    (tmp_path / "ru" / "cities.json").write_text(json.dumps(CITIES))
+    (tmp_path / "ru" / "airports.json").write_text(json.dumps(AIRPORTS))
+    locations_api = IndexedLocationsApi(Mock())
+    updater = LocationsIndexUpdater(
+        locations_api, Mock(), str(tmp_path), "ru", refresh_interval=0
+    )
+    updater.start()
+    await asyncio.wait_for(updater._task, 5)  # type: ignore[arg-type]
+    assert locations_api.index is not None
+    assert locations_api.index.search("MOW")[0] == MOSCOW
+
+
+@pytest.mark.asyncio
+async def test_invalid_download_does_not_replace_data(tmp_path, monkeypatch):
+    (tmp_path / "ru").mkdir()
+    (tmp_path / "ru" / "cities.json").write_text(json.dumps(CITIES))
+    monkeypatch.setattr(
+        locations_index, "get_bytes", AsyncMock(return_value=b'{"error": "oops"}')
+    )
+    updater = LocationsIndexUpdater(
+        IndexedLocationsApi(Mock()), Mock(), str(tmp_path), "ru", refresh_interval=1
+    )
+    with pytest.raises(ValueError):
+        await updater._download()
+    assert json.loads((tmp_path / "ru" / "cities.json").read_text()) == CITIES
+
+
+@pytest.mark.parametrize("prefix", ["М", "мо", "Моск"])
+def test_suggestions_are_ranked(index, prefix):
+    assert index.suggest(prefix)[0] == MOSCOW
+
+
+def test_suggestions_of_prefix_longer_than_trie(index):
+    assert index.suggest("Шереметьев") == [SHEREMETYEVO]
+    assert index.suggest("Шереметьево 2") == []
+
+
+def test_suggestions_are_limited(index):
+    assert index.suggest("", limit=2) == [
+        MOSCOW,
+        Location(code="LED", name="Санкт-Петербург", country_code="RU"),
+    ]
+    assert index.suggest("д", limit=5) == [DOMODEDOVO]
+
+
+def test_no_suggestions_without_index():
+    assert IndexedLocationsApi(Mock()).suggest("Мос") == []
+
+
+def test_location_is_parsed_from_suggestion():
+    location = parse_location(format_location(SHEREMETYEVO))
+    assert location == Location(code="SVO", name="Шереметьево", country_code=None)
+    assert parse_location("Москва") is None
+    assert parse_location("Москва (mow)") is None
+
+
+def test_location_is_got_by_code(index):
+    assert index.get_by_code("svo") == SHEREMETYEVO
+    # City and its airport share the code
+    assert index.get_by_code("LED").name == "Санкт-Петербург"
+    assert index.get_by_code("LED", "Пулково").name == "Пулково"
+    assert index.get_by_code("ZZZ") is None
+
+
+@pytest.mark.asyncio
+async def test_only_known_code_is_accepted_from_suggestion(index):
+    remote_api = Mock(get_locations=AsyncMock(return_value=[]))
+    locations_api = IndexedLocationsApi(remote_api)
+    # Without index the text is searched as usual
+    assert await find_locations("Шереметьево (SVO)", locations_api) == []
+
+    locations_api.index = index
+    assert await find_locations("Шереметьево (SVO)", locations_api) == [SHEREMETYEVO]
+    assert await find_locations("Whatever (ZZZ)", locations_api) == []
+    assert remote_api.get_locations.await_count == 2
@@ -0,0 +1,32 @@
+from air_bot.metrics import MetricsRegistry
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    responses = registry.counter("responses_total", "Responses")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    responses.inc(endpoint="a", status="200")
+    responses.inc(endpoint="a", status="200")
+    latency.observe(0.05, endpoint="a")
+    latency.observe(0.5, endpoint="a")
+    latency.observe(5, endpoint="a")
+
+    assert registry.render().splitlines() == [
+        "# HELP responses_total Responses",
+        "# TYPE responses_total counter",
+        'responses_total{endpoint="a",status="200"} 2.0',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{endpoint="a",le="0.1"} 1',
+        'latency_seconds_bucket{endpoint="a",le="1.0"} 2',
+        'latency_seconds_bucket{endpoint="a",le="+Inf"} 3',
+        'latency_seconds_sum{endpoint="a"} 5.55',
+        'latency_seconds_count{endpoint="a"} 3',
+    ]
+
+
+def test_metric_is_registered_once():
+    registry = MetricsRegistry()
+    assert registry.counter("requests_total", "Requests") is registry.counter(
+        "requests_total", "Requests"
+    )
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.bot.notification_dispatcher import NotificationDispatcher
+from air_bot.bot.presentation.tickets import TicketView
+from air_bot.domain.model import PriceUpdate, Ticket
+from air_bot.service.notification_aggregator import NotificationAggregator
+
+
+def make_ticket(price: float) -> Ticket:
+    return Ticket(
+        price=price,
+        departure_at=datetime(2023, 10, 1, 6, 55),
+        duration_to=timedelta(minutes=95),
+        link="/search/MOW0110LED1",
+    )
+
+
+def make_notifier() -> Mock:
+    return Mock(
+        notify_user=AsyncMock(),
+        notify_user_about_updates=AsyncMock(),
+        flush=AsyncMock(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_updates_are_sent_as_digest_on_flush(
+    moscow2spb_one_way_direction, moscow2antalya_roundtrip_direction
+):
+    notifier = make_notifier()
+    aggregator = NotificationAggregator(notifier)
+    tickets = [make_ticket(1000)]
+    await aggregator.notify_user(1, tickets, moscow2spb_one_way_direction, 1)
+    await aggregator.notify_user(1, tickets, moscow2antalya_roundtrip_direction, 2)
+    await aggregator.notify_user(2, tickets, moscow2spb_one_way_direction, 1)
+    notifier.notify_user.assert_not_awaited()
+
+    await aggregator.flush()
+    notifier.notify_user_about_updates.assert_awaited_once_with(
+        1,
+        [
+            PriceUpdate(
+                direction_id=1, direction=moscow2spb_one_way_direction, tickets=tickets
+            ),
+            PriceUpdate(
+                direction_id=2,
+                direction=moscow2antalya_roundtrip_direction,
+                tickets=tickets,
+            ),
+        ],
+    )
+    # User with a single update gets the usual notification
+    notifier.notify_user.assert_awaited_once_with(
+        2, tickets, moscow2spb_one_way_direction, 1
+    )
+    notifier.flush.assert_awaited_once()
+    assert aggregator.n_pending_users == 0
+
+
+@pytest.mark.asyncio
+async def test_latest_update_of_direction_is_kept(moscow2spb_one_way_direction):
+    notifier = make_notifier()
+    aggregator = NotificationAggregator(notifier)
+    await aggregator.notify_user(
+        1, [make_ticket(2000)], moscow2spb_one_way_direction, 1
+    )
+    await aggregator.notify_user(
+        1, [make_ticket(1000)], moscow2spb_one_way_direction, 1
+    )
+    await aggregator.flush()
+    notifier.notify_user.assert_awaited_once_with(
+        1, [make_ticket(1000)], moscow2spb_one_way_direction, 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_updates_are_collected_for_window(moscow2spb_one_way_direction):
+    notifier = make_notifier()
+    aggregator = NotificationAggregator(notifier, window=0.05)
+    aggregator.start()
+    await aggregator.notify_user(
+        1, [make_ticket(1000)], moscow2spb_one_way_direction, 1
+    )
+    # End of update cycle doesn't send updates collected for a window
+    await aggregator.flush()
+    assert aggregator.n_pending_users == 1
+    await asyncio.sleep(0.1)
+    assert aggregator.n_pending_users == 0
+    notifier.notify_user.assert_awaited_once()
+    await aggregator.stop()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_digest(
+    moscow2spb_one_way_direction, moscow2antalya_roundtrip_direction
+):
+    notifier = make_notifier()
+    dispatcher = NotificationDispatcher(
+        notifier,
+        n_senders=1,
+        messages_per_second=1000,
+        messages_per_chat_per_second=1000,
+    )
+    aggregator = NotificationAggregator(dispatcher)
+    dispatcher.start()
+    for direction_id in range(10):
+        await aggregator.notify_user(
+            1, [make_ticket(1000)], moscow2spb_one_way_direction, direction_id
+        )
+    await aggregator.flush()
+    await dispatcher.join()
+    await dispatcher.stop()
+    notifier.notify_user.assert_not_awaited()
+    assert notifier.notify_user_about_updates.await_count == 1
+    assert dispatcher.stats().sent == 1
+
+
+def test_digest_is_split_into_messages(moscow2spb_one_way_direction):
+    updates = [
+        PriceUpdate(
+            direction_id=i,
+            direction=moscow2spb_one_way_direction,
+            tickets=[make_ticket(1000 + i)],
+        )
+        for i in range(50)
+    ]
+    messages = TicketView("rub").print_digest(updates)
+    assert len(messages) > 1
+    assert all(len(text) <= 4096 for text, _ in messages)
+    assert [update for _, shown in messages for update in shown] == updates
@@ -0,0 +1,135 @@
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from air_bot.bot.notification_dispatcher import NotificationDispatcher
+from air_bot.domain.model import PriceUpdate
+from air_bot.rate_limiter import TokenBucket
+from tests.unit.fakes import FakeTimer
+
+
+def test_token_bucket_refills_with_time():
+    timer = FakeTimer()
+    bucket = TokenBucket(rate=2, capacity=2, timer=timer)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() == pytest.approx(0.5)
+    timer.now = 0.5
+    assert bucket.try_acquire()
+    timer.now = 100
+    assert bucket.is_full()
+
+
+@pytest.mark.asyncio
+async def test_all_notifications_are_sent(moscow2spb_one_way_direction):
+    notifier = Mock(notify_user=AsyncMock())
+    dispatcher = NotificationDispatcher(
+        notifier,
+        n_senders=3,
+        messages_per_second=1000,
+        messages_per_chat_per_second=1000,
+    )
+    dispatcher.start()
+    for user_id in range(10):
+        await dispatcher.notify_user(user_id, [], moscow2spb_one_way_direction, 1)
+    await dispatcher.join()
+    await dispatcher.stop()
+    assert notifier.notify_user.call_count == 10
+    stats = dispatcher.stats()
+    assert stats.sent == 10
+    assert stats.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_messages_to_same_chat_are_rate_limited(moscow2spb_one_way_direction):
+    notifier = Mock(notify_user=AsyncMock())
+    dispatcher = NotificationDispatcher(
+        notifier, n_senders=3, messages_per_second=1000, messages_per_chat_per_second=10
+    )
+    dispatcher.start()
+    started_at = time.monotonic()
+    for _ in range(3):
+        await dispatcher.notify_user(1, [], moscow2spb_one_way_direction, 1)
+    await dispatcher.join()
+    await dispatcher.stop()
+    # First message goes immediately, two others wait for 0.1 seconds each
+    assert time.monotonic() - started_at >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_retry_after_telegram_flood_control(moscow2spb_one_way_direction):
+    notifier = Mock(
+        notify_user=AsyncMock(
+            side_effect=[
+                TelegramRetryAfter(method=Mock(), message="Flood", retry_after=0),
+                None,
+            ]
+        )
+    )
+    dispatcher = NotificationDispatcher(
+        notifier,
+        n_senders=1,
+        messages_per_second=1000,
+        messages_per_chat_per_second=1000,
+    )
+    dispatcher.start()
+    await dispatcher.notify_user(1, [], moscow2spb_one_way_direction, 1)
+    await dispatcher.join()
+    await dispatcher.stop()
+    assert notifier.notify_user.call_count == 2
+    assert dispatcher.stats().sent == 1
+
+
+@pytest.mark.asyncio
+async def test_blocked_bot_does_not_stop_dispatcher(moscow2spb_one_way_direction):
+    notifier = Mock(
+        notify_user=AsyncMock(
+            side_effect=[TelegramForbiddenError(method=Mock(), message="Blocked"), None]
+        )
+    )
+    dispatcher = NotificationDispatcher(
+        notifier,
+        n_senders=1,
+        messages_per_second=1000,
+        messages_per_chat_per_second=1000,
+    )
+    dispatcher.start()
+    await dispatcher.notify_user(1, [], moscow2spb_one_way_direction, 1)
+    await dispatcher.notify_user(2, [], moscow2spb_one_way_direction, 1)
+    await dispatcher.join()
+    await dispatcher.stop()
+    stats = dispatcher.stats()
+    assert (stats.sent, stats.failed) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_every_message_of_digest_is_rate_limited(moscow2spb_one_way_direction):
+    notifier = Mock(notify_user=AsyncMock(), notify_user_about_updates=AsyncMock())
+    dispatcher = NotificationDispatcher(
+        notifier,
+        n_senders=3,
+        messages_per_second=1000,
+        messages_per_chat_per_second=10,
+        split_digest=lambda updates: [updates[:2], updates[2:4], updates[4:]],
+    )
+    updates = [
+        PriceUpdate(
+            direction_id=direction_id,
+            direction=moscow2spb_one_way_direction,
+            tickets=[],
+        )
+        for direction_id in range(5)
+    ]
+    dispatcher.start()
+    started_at = time.monotonic()
+    await dispatcher.notify_user_about_updates(1, updates)
+    await dispatcher.join()
+    await dispatcher.stop()
+    # Every message of the digest takes its own per-chat slot
+    assert time.monotonic() - started_at >= 0.19
+    notifier.notify_user.assert_not_awaited()
+    assert notifier.notify_user_about_updates.await_count == 3
+    assert dispatcher.stats().sent == 3
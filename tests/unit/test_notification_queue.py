@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.domain.model import PendingNotification
+from air_bot.service.notification_queue import consume_notifications
+from tests.unit.fakes import FakeUnitOfWork
+from tests.unit.test_direction_updater import get_tickets
+
+
+@pytest.mark.asyncio
+async def test_consume_notifications(
+    moscow2spb_one_way_direction, moscow2antalya_roundtrip_direction
+):
+    uow = FakeUnitOfWork()
+    now = datetime.now()
+    direction_ids = [
+        await uow.flight_directions.add_direction_info(direction, 100, now)
+        for direction in [
+            moscow2spb_one_way_direction,
+            moscow2antalya_roundtrip_direction,
+        ]
+    ]
+    tickets = get_tickets([89, 100])
+    for user_id, direction_id in [(1, direction_ids[0]), (2, direction_ids[1])]:
+        await uow.pending_notifications.add(
+            PendingNotification(
+                user_id=user_id,
+                direction_id=direction_id,
+                tickets=tickets,
+                created_at=now,
+            )
+        )
+    user_notifier = AsyncMock()
+
+    assert await consume_notifications(uow, user_notifier, batch_size=1) == 1
+    user_notifier.notify_user.assert_awaited_once_with(
+        1, tickets, moscow2spb_one_way_direction, direction_ids[0]
+    )
+    assert await consume_notifications(uow, user_notifier, batch_size=10) == 1
+    user_notifier.notify_user.assert_awaited_with(
+        2, tickets, moscow2antalya_roundtrip_direction, direction_ids[1]
+    )
+    assert await consume_notifications(uow, user_notifier, batch_size=10) == 0
+    assert user_notifier.notify_user.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_notifications_for_deleted_directions_are_dropped(
+    moscow2spb_one_way_direction,
+):
+    uow = FakeUnitOfWork()
+    direction_id = await uow.flight_directions.add_direction_info(
+        moscow2spb_one_way_direction, 100, datetime.now() - timedelta(minutes=1)
+    )
+    await uow.pending_notifications.add(
+        PendingNotification(
+            user_id=1,
+            direction_id=direction_id,
+            tickets=get_tickets([89]),
+            created_at=datetime.now(),
+        )
+    )
+    await uow.flight_directions.delete_direction(direction_id)
+    user_notifier = AsyncMock()
+    assert await consume_notifications(uow, user_notifier, batch_size=10) == 1
+    user_notifier.notify_user.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cached_prices_of_notified_directions_are_invalidated(
+    moscow2spb_one_way_direction,
+):
+    uow = FakeUnitOfWork()
+    direction_id = await uow.flight_directions.add_direction_info(
+        moscow2spb_one_way_direction, 100, datetime.now()
+    )
+    await uow.pending_notifications.add(
+        PendingNotification(
+            user_id=1,
+            direction_id=direction_id,
+            tickets=get_tickets([89]),
+            created_at=datetime.now(),
+        )
+    )
+    tickets_api = Mock()
+    await consume_notifications(
+        uow, AsyncMock(), batch_size=10, tickets_api=tickets_api
+    )
+    tickets_api.invalidate_cache.assert_called_once_with(moscow2spb_one_way_direction)
@@ -0,0 +1,197 @@
+import asyncio
+from dataclasses import replace
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from air_bot.adapters import tickets_api
+from air_bot.adapters.tickets_api import (
+    AviasalesTicketsApi,
+    CachingTicketsApi,
+    CircuitBreakerTicketsApi,
+    CircuitState,
+    SingleFlightTicketsApi,
+    datetime_from_ticket,
+    decode_response,
+    parse_tickets,
+)
+from air_bot.domain.exceptions import (
+    TicketsAPIConnectionError,
+    TicketsAPIError,
+    TicketsAPIRateLimitedError,
+    TicketsAPIUnavailableError,
+    TicketsParsingError,
+)
+from air_bot.http_session import RateLimitExceeded, RequestPriority
+from air_bot.json_decoder import response_error
+from tests.unit.fakes import FakeTimer
+from tests.unit.test_direction_updater import get_tickets
+
+
+def make_slow_api(result=None, error: Exception | None = None):
+    calls = []
+
+    async def slow_get_tickets(direction, limit):
+        calls.append((direction, limit))
+        await asyncio.sleep(0.05)
+        if error:
+            raise error
+        return result
+
+    return Mock(get_tickets=slow_get_tickets), calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(
+    moscow2spb_one_way_direction,
+):
+    tickets = get_tickets([100, 200])
+    api, calls = make_slow_api(result=tickets)
+    single_flight_api = SingleFlightTicketsApi(api)
+    results = await asyncio.gather(
+        *[
+            single_flight_api.get_tickets(moscow2spb_one_way_direction, 3)
+            for _ in range(5)
+        ]
+    )
+    assert len(calls) == 1
+    assert all(result == tickets for result in results)
+
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_coalesced(moscow2spb_one_way_direction):
+    api, calls = make_slow_api(result=[])
+    single_flight_api = SingleFlightTicketsApi(api)
+    with_transfer = replace(moscow2spb_one_way_direction, with_transfer=True)
+    await asyncio.gather(
+        single_flight_api.get_tickets(moscow2spb_one_way_direction, 3),
+        single_flight_api.get_tickets(moscow2spb_one_way_direction, 1),
+        single_flight_api.get_tickets(with_transfer, 3),
+    )
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_error_is_propagated_to_every_caller(moscow2spb_one_way_direction):
+    api, calls = make_slow_api(error=TicketsAPIConnectionError())
+    single_flight_api = SingleFlightTicketsApi(api)
+    results = await asyncio.gather(
+        single_flight_api.get_tickets(moscow2spb_one_way_direction, 3),
+        single_flight_api.get_tickets(moscow2spb_one_way_direction, 3),
+        return_exceptions=True,
+    )
+    assert len(calls) == 1
+    assert all(isinstance(result, TicketsAPIConnectionError) for result in results)
+
+    # Failed request is not cached
+    with pytest.raises(TicketsAPIConnectionError):
+        await single_flight_api.get_tickets(moscow2spb_one_way_direction, 3)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cheapest_tickets_for_month_are_cached(moscow2spb_one_way_direction):
+    tickets_by_date = {"2023-05-16": get_tickets([100])[0]}
+    api = Mock(get_cheapest_tickets_for_month=AsyncMock(return_value=tickets_by_date))
+    caching_api = CachingTicketsApi(api, maxsize=10, ttl=60)
+    other_day = replace(moscow2spb_one_way_direction, departure_at="2023-05-20")
+    for direction in [moscow2spb_one_way_direction, other_day]:
+        result = await caching_api.get_cheapest_tickets_for_month(direction, 2023, 5)
+        assert result == tickets_by_date
+    assert api.get_cheapest_tickets_for_month.call_count == 1
+    assert (caching_api.month_prices.hits, caching_api.month_prices.misses) == (1, 1)
+
+    await caching_api.get_cheapest_tickets_for_month(other_day, 2023, 6)
+    assert api.get_cheapest_tickets_for_month.call_count == 2
+
+    caching_api.invalidate_cache(moscow2spb_one_way_direction)
+    await caching_api.get_cheapest_tickets_for_month(other_day, 2023, 5)
+    assert api.get_cheapest_tickets_for_month.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_probes(moscow2spb_one_way_direction):
+    api = Mock(get_tickets=AsyncMock(side_effect=TicketsAPIConnectionError()))
+    timer = FakeTimer()
+    breaker = CircuitBreakerTicketsApi(
+        api, failure_threshold=2, reset_timeout=30, timer=timer
+    )
+    for _ in range(2):
+        with pytest.raises(TicketsAPIConnectionError):
+            await breaker.get_tickets(moscow2spb_one_way_direction)
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.is_available()
+    with pytest.raises(TicketsAPIUnavailableError):
+        await breaker.get_tickets(moscow2spb_one_way_direction)
+    assert api.get_tickets.await_count == 2
+
+    # Failed probe opens the circuit again
+    timer.now += 30
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(TicketsAPIConnectionError):
+        await breaker.get_tickets(moscow2spb_one_way_direction)
+    assert breaker.state == CircuitState.OPEN
+
+    # Error response means the API is up
+    timer.now += 30
+    api.get_tickets.side_effect = TicketsAPIError()
+    with pytest.raises(TicketsAPIError):
+        await breaker.get_tickets(moscow2spb_one_way_direction)
+    assert breaker.state == CircuitState.CLOSED
+    assert api.get_tickets.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_local_rate_limit_is_not_connection_error(
+    monkeypatch, moscow2spb_one_way_direction
+):
+    rejected = AsyncMock(
+        side_effect=RateLimitExceeded("endpoint", RequestPriority.BACKGROUND)
+    )
+    monkeypatch.setattr(tickets_api, "get_tickets_response", rejected)
+    monkeypatch.setattr(tickets_api, "get_grouped_prices", rejected)
+    api = AviasalesTicketsApi(Mock(retry_policy=None))
+    with pytest.raises(TicketsAPIRateLimitedError):
+        await api.get_tickets(moscow2spb_one_way_direction)
+    with pytest.raises(TicketsAPIRateLimitedError):
+        await api.get_cheapest_tickets_for_month(moscow2spb_one_way_direction, 2023, 5)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_ignores_local_rate_limit(moscow2spb_one_way_direction):
+    api = Mock(get_tickets=AsyncMock(side_effect=TicketsAPIRateLimitedError()))
+    breaker = CircuitBreakerTicketsApi(
+        api, failure_threshold=2, reset_timeout=30, timer=FakeTimer()
+    )
+    for _ in range(5):
+        with pytest.raises(TicketsAPIRateLimitedError):
+            await breaker.get_tickets(moscow2spb_one_way_direction)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.is_available()
+    assert api.get_tickets.await_count == 5
+
+
+def test_error_is_detected_by_parsed_field():
+    response = (
+        b'{"success": true, "currency": "rub", "data": [{"origin": "MOW", '
+        b'"destination": "LED", "price": 1500, "link": "/search/MOW1510LED1?error=0", '
+        b'"departure_at": "2023-10-15T06:55:00+03:00", "duration_to": 95}]}'
+    )
+    json_response = decode_response(response)
+    assert response_error(json_response) is None
+    assert parse_tickets(json_response)[0].price == 1500
+
+    error_response = decode_response(b'{"success": false, "error": "invalid token"}')
+    assert response_error(error_response) == "invalid token"
+
+
+def test_invalid_json_is_parsing_error():
+    with pytest.raises(TicketsParsingError):
+        decode_response(b"<html>502 Bad Gateway</html>")
+
+
+def test_datetime_from_ticket_ditches_timezone():
+    assert datetime_from_ticket("2023-10-15T06:55:00+03:00") == datetime(
+        2023, 10, 15, 6, 55
+    )
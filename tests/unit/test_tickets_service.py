@@ -8,8 +8,13 @@ from pytest_unordered import unordered
 
 from air_bot.domain.exceptions import StartAndEndOfDirectionAreTheSameError
 from air_bot.domain.model import FlightDirection, Ticket
+from air_bot.service.direction_updater import update
 from air_bot.service.user import track
 from tests.unit.fakes import FakeUnitOfWork
+from tests.unit.test_direction_updater import make_settings
+
+SETTINGS = make_settings()
+UPDATE_SETTINGS = SETTINGS.direction_updater
 
 FLIGHT_DIRECTION_NO_RETURN = FlightDirection(
     start_code="STA",
@@ -40,7 +45,9 @@ async def test_add_new_direction_with_no_tickets_available(direction):
     tickets_api = Mock(get_tickets=AsyncMock(return_value=[]))
     uow = FakeUnitOfWork()
     user_id = 1
-    tickets, direction_id = await track(user_id, direction, tickets_api, uow)
+    tickets, direction_id = await track(
+        user_id, direction, tickets_api, uow, UPDATE_SETTINGS
+    )
     assert tickets == []
     directions_info = await uow.flight_directions.get_directions_info([direction_id])
     user_directions = await uow.users_directions.get_directions(user_id)
@@ -83,7 +90,7 @@ async def test_add_new_direction_and_get_tickets():
     uow = FakeUnitOfWork()
     user_id = 1
     received_tickets, direction_id = await track(
-        user_id, FLIGHT_DIRECTION_WITH_RETURN, tickets_api, uow
+        user_id, FLIGHT_DIRECTION_WITH_RETURN, tickets_api, uow, UPDATE_SETTINGS
     )
     assert received_tickets == tickets
     directions_info = await uow.flight_directions.get_directions_info([direction_id])
@@ -105,7 +112,7 @@ async def test_get_tickets_from_repo_for_existing_direction():
     await uow.tickets.add(tickets, direction_id)
     user_id = 1
     received_tickets, tracked_direction_id = await track(
-        user_id, FLIGHT_DIRECTION_NO_RETURN, tickets_api, uow
+        user_id, FLIGHT_DIRECTION_NO_RETURN, tickets_api, uow, UPDATE_SETTINGS
     )
     assert tracked_direction_id == direction_id
     assert received_tickets == tickets
@@ -121,7 +128,7 @@ async def test_get_tickets_from_api_for_existing_direction_with_no_tickets():
         FLIGHT_DIRECTION_WITH_RETURN, 1000, datetime.datetime.now()
     )
     received_tickets, tracked_direction_id = await track(
-        user_id, FLIGHT_DIRECTION_WITH_RETURN, tickets_api, uow
+        user_id, FLIGHT_DIRECTION_WITH_RETURN, tickets_api, uow, UPDATE_SETTINGS
     )
     assert received_tickets == tickets
     assert tracked_direction_id == direction_id
@@ -135,4 +142,14 @@ async def test_cant_add_direction_with_destination_same_as_origin():
     direction_dict["end_code"] = direction_dict["start_code"]
     direction = FlightDirection(**direction_dict)
     with pytest.raises(StartAndEndOfDirectionAreTheSameError):
-        await track(42, direction, Mock(), Mock())
+        await track(42, direction, Mock(), Mock(), UPDATE_SETTINGS)
+
+
+@pytest.mark.asyncio
+async def test_new_direction_is_not_updated_right_away():
+    tickets_api = Mock(get_tickets=AsyncMock(return_value=[]))
+    uow = FakeUnitOfWork()
+    await track(1, FLIGHT_DIRECTION_NO_RETURN, tickets_api, uow, UPDATE_SETTINGS)
+    stats = await update(lambda: uow, tickets_api, None, SETTINGS)
+    assert stats.changed + stats.unchanged + stats.failed == 0
+    assert tickets_api.get_tickets.await_count == 1
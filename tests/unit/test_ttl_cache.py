@@ -0,0 +1,34 @@
+from air_bot.ttl_cache import TTLCache
+from tests.unit.fakes import FakeTimer
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    timer.now = 60
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_invalidate_entries():
+    cache: TTLCache[tuple, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set(("MOW", 1), 1)
+    cache.set(("MOW", 2), 2)
+    cache.set(("LED", 1), 3)
+    assert cache.invalidate_if(lambda key: key[0] == "MOW") == 2
+    cache.invalidate(("LED", 1))
+    assert len(cache) == 0
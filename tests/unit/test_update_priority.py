@@ -0,0 +1,82 @@
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+from air_bot.domain.model import FlightDirectionInfo
+from air_bot.service.update_priority import (
+    direction_priority,
+    schedule_next_update,
+    update_interval,
+    updated_volatility,
+)
+from air_bot.settings import DirectionUpdaterSettings
+
+MIN_INTERVAL = timedelta(minutes=10)
+MAX_INTERVAL = timedelta(minutes=720)
+
+
+def test_popular_and_close_directions_have_higher_priority():
+    base = direction_priority(
+        n_subscribers=1, days_to_departure=330, price_volatility=0
+    )
+    assert 1 <= base < 1.1
+    assert direction_priority(500, 330, 0) > 5 * base
+    assert direction_priority(1, 7, 0) > 2 * base
+    assert direction_priority(1, 330, 1) > 1.9 * base
+    assert direction_priority(500, 7, 1) > direction_priority(500, 7, 0)
+
+
+def test_update_interval_is_shorter_for_higher_priority():
+    base_interval = timedelta(minutes=60)
+    assert update_interval(base_interval, 1, 0, MIN_INTERVAL, MAX_INTERVAL) == (
+        base_interval
+    )
+    assert update_interval(base_interval, 4, 0, MIN_INTERVAL, MAX_INTERVAL) == (
+        timedelta(minutes=15)
+    )
+
+
+def test_update_interval_backs_off_for_stable_prices_within_bounds():
+    base_interval = timedelta(minutes=60)
+    intervals = [
+        update_interval(base_interval, 1, n, MIN_INTERVAL, MAX_INTERVAL)
+        for n in range(20)
+    ]
+    assert intervals == sorted(intervals)
+    assert intervals[1] > base_interval
+    assert intervals[-1] == MAX_INTERVAL
+    assert update_interval(base_interval, 100, 0, MIN_INTERVAL, MAX_INTERVAL) == (
+        MIN_INTERVAL
+    )
+
+
+def test_schedule_tightens_when_price_changes(moscow2spb_one_way_direction):
+    now = datetime.now()
+    direction_info = FlightDirectionInfo(
+        **asdict(moscow2spb_one_way_direction),
+        price=100,
+        last_update=now,
+        last_update_try=now,
+        unchanged_price_updates=5,
+    )
+    settings = DirectionUpdaterSettings(
+        needs_update_after=60,
+        max_directions_for_single_update=10,
+        min_update_interval=10,
+        max_update_interval=720,
+    )
+    stable = schedule_next_update(direction_info, False, 1, now, settings)
+    assert stable.unchanged_price_updates == 6
+    changed = schedule_next_update(direction_info, True, 1, now, settings)
+    assert changed.unchanged_price_updates == 0
+    assert changed.price_volatility > stable.price_volatility
+    assert changed.next_update_at < stable.next_update_at
+
+
+def test_volatility_follows_price_changes():
+    volatility = 0.0
+    for _ in range(10):
+        volatility = updated_volatility(volatility, price_changed=True)
+    assert volatility > 0.9
+    for _ in range(10):
+        volatility = updated_volatility(volatility, price_changed=False)
+    assert volatility < 0.1